@@ -1,9 +1,10 @@
 """Aplicação Flask principal do projeto Cosmo-Casa.
 
 Responsabilidades:
-- Registrar blueprints de Professor (admin), Aluno e Missão;
+- Montar a aplicação em `create_app(config)`: blueprints de Professor (admin),
+  Aluno e Missão, hooks e configuração (padrões vindos do ambiente);
 - Expor rotas de índice e seleção de missão (landing e seleção);
-- Manter dados de contexto (naves, módulos, eventos) para páginas e simulação;
+- Recarregar o catálogo (naves, módulos, eventos) quando o arquivo muda;
 - Fornecer alias de imagens estáticas para compatibilidade com caminhos de front-end.
 
 Fluxo resumido:
@@ -13,11 +14,17 @@ Fluxo resumido:
 
 Este arquivo deve permanecer leve em lógica de negócio; operações de CRUD e
 simulação residem nos blueprints e em `services.db`.
+
+Importar o módulo (ou chamar `create_app`) não abre o banco nem calcula nada
+pesado: o schema é migrado na primeira conexão do processo e as cargas de
+referência são calculadas em segundo plano (ou no primeiro uso). Assim novos
+workers sobem em milissegundos (`python scripts/check_tempo_importacao.py`).
 """
 # app.py
 import math
 import logging
-from flask import Flask, render_template, request, redirect, url_for, session, jsonify, send_from_directory
+from flask import Flask, render_template, request, redirect, url_for, session, jsonify
+from jinja2 import FileSystemBytecodeCache
 import random
 import json
 import sqlite3
@@ -26,16 +33,19 @@ from datetime import datetime, timedelta
 import secrets
 import threading
 
-# Inicializa a aplicação Flask
-app = Flask(__name__)
-# Usa SECRET_KEY do ambiente em produção; mantém fallback para desenvolvimento
-app.secret_key = os.getenv('SECRET_KEY', 'minha_nasa_minha_vida_secret_key_2024')
-
 from services.db import db_manager  # Gerencia SQLite e operações de persistência
+from services import monte_carlo  # Estimativa de chegada por Monte Carlo (pool opcional)
+from services.carga_otima import referencia_cargas  # Cargas ótimas por nave × destino
 from routes.professor import professor_bp
 from routes.aluno import aluno_bp
 from routes.missao import missao_bp
-from services.data import NAVES_ESPACIAIS, MODULOS_HABITAT, EVENTOS_ALEATORIOS  # Catálogos estáticos para UI/simulações
+from services.data import configurar_catalogo, verificar_catalogo  # Catálogo (services/catalogo.json) com recarga a quente
+from services.estaticos import assets_versionados  # Estáticos com hash (scripts/construir_estaticos.py)
+from services.imagens import imagens_responsivas  # <picture>/srcset (scripts/otimizar_imagens.py)
+from services.icones import sprite_icones  # Sprite SVG do editor de Habitat
+from services.cache_estaticos import cache_estaticos  # /static/images e /icons servidos da memória
+from services.cache_fragmentos import cache_fragmentos  # Páginas/trechos derivados do catálogo
+from services.compressao import CompressaoWSGI  # gzip/brotli em fluxo para respostas de texto
 
 
 # Removido o uso de json_store: sistema unificado em SQLite
@@ -50,67 +60,6 @@ CONSTANTE_GRAVITACIONAL = 6.67430e-11  # m³/kg/s²
 MASA_TERRA = 5.972e24  # kg
 RAIO_TERRA = 6371000  # m
 
-# --- BANCO DE DADOS DAS NAVES (com parâmetros de propulsão realistas) ---
-NAVES_ESPACIAIS = {
-    'falcon9': {
-        'nome': 'Falcon 9',
-        'operador': 'EUA / SpaceX',
-        'imagem': 'Falcon9.png',
-        'descricao': 'Foguete de dois estágios reutilizável com excelente relação empuxo-peso. Ideal para cargas pesadas em órbita baixa.',
-        'capacidade_carga': 22.8,  # toneladas para LEO
-        'perfil_missao': 'Dois Estágios',
-        # Parâmetros de propulsão adicionados
-        'empuxo_total': 7607,  # kN (1º estágio: 7.607 kN)
-        'impulso_especifico': 282,  # segundos (vacuum)
-        'massa_seca': 28.2,  # toneladas (dry mass)
-        'massa_combustivel': 433.1,  # toneladas (propellant mass)
-        'delta_v_total': 9300,  # m/s (total capability)
-        'taxa_empuxo_peso': 1.8  # T/W ratio
-    },
-    'pslv': {
-        'nome': 'PSLV',
-        'operador': 'Índia / ISRO',
-        'imagem': 'PSLV.jpg',
-        'descricao': 'Foguete confiável com múltiplos estágios e capacidade de inserção em órbitas polares e sincronizadas com o sol.',
-        'capacidade_carga': 3.8,  # toneladas para LEO
-        'perfil_missao': 'Múltiplas Queimas',
-        'empuxo_total': 4800,  # kN
-        'impulso_especifico': 262,  # segundos
-        'massa_seca': 18.5,  # toneladas
-        'massa_combustivel': 230.0,  # toneladas
-        'delta_v_total': 8200,  # m/s
-        'taxa_empuxo_peso': 1.4
-    },
-    'longmarch8a': {
-        'nome': 'Long-March8A',
-        'operador': 'China',
-        'imagem': 'foguete-longa-marcha.png',
-        'descricao': 'Foguete de médio porte com capacidade para múltiplas órbitas e fases de coasting estendidas.',
-        'capacidade_carga': 9.8,  # toneladas para LEO
-        'perfil_missao': 'Coasting Estendido',
-        'empuxo_total': 5800,  # kN
-        'impulso_especifico': 275,  # segundos
-        'massa_seca': 22.1,  # toneladas
-        'massa_combustivel': 320.5,  # toneladas
-        'delta_v_total': 8800,  # m/s
-        'taxa_empuxo_peso': 1.6
-    },
-    'gslv': {
-        'nome': 'GSLV',
-        'operador': 'Índia / ISRO',
-        'imagem': 'LVM3_M3.png',
-        'descricao': 'Foguete com estágio criogênico superior para inserção precisa em órbitas de transferência geossíncronas.',
-        'capacidade_carga': 2.5,  # toneladas para GTO
-        'perfil_missao': 'Estágio Criogênico',
-        'empuxo_total': 4200,  # kN
-        'impulso_especifico': 295,  # segundos (estágio criogênico)
-        'massa_seca': 16.8,  # toneladas
-        'massa_combustivel': 198.7,  # toneladas
-        'delta_v_total': 9500,  # m/s
-        'taxa_empuxo_peso': 1.3
-    }
-}
-
 # --- FUNÇÕES DE CÁLCULO DE PERFORMANCE ---
 def calcular_delta_v(massa_seca, massa_combustivel, impulso_especifico):
     """
@@ -142,7 +91,7 @@ def calcular_distancia_maxima_sem_carga(nave, destino='leo'):
     - Lua: ~10800 m/s Delta-V necessário
     - Marte: ~13600 m/s Delta-V necessário
     """
-    delta_v_disponivel = nave['delta_v_total']
+    delta_v_disponivel = nave.delta_v_total
     
     # Delta-V necessário para diferentes destinos (em m/s)
     requisitos_delta_v = {
@@ -202,120 +151,60 @@ def calcular_carga_maxima_para_destino(nave, destino, distancia_destino):
     fator_reducao = max(0, min(1, fator_reducao))
     
     # Capacidade nominal da nave (em kg)
-    capacidade_nominal = nave['capacidade_carga'] * 1000  # Convertendo para kg
+    capacidade_nominal = nave.capacidade_carga * 1000  # Convertendo para kg
     
     return capacidade_nominal * fator_reducao
 
-# --- BANCO DE DADOS DOS MÓDULOS (com imagens e observações para tooltips) ---
-MODULOS_HABITAT = {
-    'suporte_vida': {"nome": "Suporte à Vida", "massa": 800, "energia": 15, "agua": 50, 
-                     "imagem": "suporte_vida.svg", "obs": "Essencial. Conecta-se ao Habitacional, Sanitário e Produção de Alimentos."},
-    'habitacional': {"nome": "Habitacional Privado", "massa": 200, "energia": 1, "agua": 5, 
-                     "imagem": "Privado.svg", "obs": "Acomodações para a tripulação. Pode ser integrado com Lazer."},
-    'alimentacao': {"nome": "Alimentação e Refeições", "massa": 300, "energia": 3, "agua": 20, 
-                    "imagem": "Cultura.svg", "obs": "Área de preparo e consumo de alimentos."},
-    'medico': {"nome": "Módulo Médico", "massa": 250, "energia": 2, "agua": 5, 
-               "imagem": "Medicina.svg", "obs": "Para emergências médicas e monitoramento da saúde da tripulação."},
-    'exercicios': {"nome": "Exercícios", "massa": 400, "energia": 5, "agua": 2, 
-                   "imagem": "Exercicio.svg", "obs": "Equipamentos para mitigar a perda de massa muscular e óssea."},
-    'pesquisa': {"nome": "Trabalho e Pesquisa", "massa": 350, "energia": 4, "agua": 2, 
-                 "imagem": "Pesquisa.svg", "obs": "Laboratório para condução de experimentos científicos."},
-    'armazenamento': {"nome": "Armazenamento", "massa": 150, "energia": 0.5, "agua": 0, 
-                      "imagem": "Armazenagem.svg", "obs": "Estoque de suprimentos, ferramentas e amostras."},
-    'sanitario': {"nome": "Sanitário e Higiene", "massa": 250, "energia": 2, "agua": 30, 
-                  "imagem": "Sanitário.svg", "obs": "Banheiro, chuveiro e sistemas de reciclagem de água."},
-    'inflavel': {"nome": "Inflável Expansível", "massa": 500, "energia": 2, "agua": 5, 
-                 "imagem": "Inflavel.svg", "obs": "Módulo de grande volume quando inflado, altamente versátil."},
-    'airlock': {"nome": "Airlock", "massa": 300, "energia": 2, "agua": 2, 
-                "imagem": "AirLock.svg", "obs": "Câmara de descompressão para atividades extraveiculares (EVAs)."},
-    'hidroponia': {"nome": "Produção de Alimentos (Hidroponia)", "massa": 500, "energia": 8, "agua": 40, 
-                   "imagem": "Hidroponia.svg", "obs": "Cultivo de plantas em ambiente controlado para suplementar a dieta."},
-    'impressao3d': {"nome": "Impressão 3D/Manufatura", "massa": 300, "energia": 5, "agua": 2, 
-                    "imagem": "Impressora.svg", "obs": "Fabricação de peças de reposição e ferramentas sob demanda."}
-}
-
-# --- BANCO DE DADOS DE EVENTOS ALEATÓRIOS ---
-EVENTOS_ALEATORIOS = [
-    {
-        "nome": "Tempestade Solar",
-        "descricao": "Uma onda de radiação atinge a nave. Módulos com baixa blindagem podem sofrer avarias.",
-        "efeito": "risco_avaria_modulo"
-    },
-    {
-        "nome": "Falha Mecânica Menor",
-        "descricao": "Um subsistema apresenta uma pequena falha, consumindo recursos extras para reparo e causando um pequeno atraso.",
-        "efeito": "atraso_e_consumo_extra"
-    },
-    {
-        "nome": "Impacto de Micrometeoroide",
-        "descricao": "Pequenos detritos espaciais colidem com o casco. A blindagem da nave é testada.",
-        "efeito": "risco_perda_carga"
-    },
-    {
-        "nome": "Surto de Energia",
-        "descricao": "Uma flutuação nos sistemas de energia força um desvio de recursos para estabilização.",
-        "efeito": "consumo_extra"
-    },
-    {
-        "nome": "Tudo Calmo",
-        "descricao": "A viagem prossegue sem incidentes. A equipe aproveita a calmaria para verificar os sistemas.",
-        "efeito": "nenhum"
-    },
-    {
-        "nome": "Navegação Otimizada",
-        "descricao": "A equipe de voo encontra uma trajetória mais eficiente, economizando propelente e adiantando levemente a chegada.",
-        "efeito": "bonus_economia"
-    }
-]
-
 # --- DEFINIÇÃO DAS ROTAS ---
 
-# Rota para a página inicial ('/') com endpoint 'index' para compatibilidade
-@app.route('/', endpoint='index')
+# Página inicial ('/') com endpoint 'index' para compatibilidade (registrada em create_app)
 def tela_inicial():
     """Landing page com links para aluno e professor."""
     return render_template('index.html')
 
-# Rota para a página de seleção de missão ('/selecao')
-@app.route('/selecao')
-def tela_selecao():
-    """Tela de seleção de destino com cards educativos e estatísticas."""
-    missoes = {
-        'lua': {
-            'nome': 'Lua', 
-            'imagem': 'lua.png',
-            # ADIÇÃO: Descrição e stats para o card
-            'descricao': 'A porta de entrada para a exploração espacial. Um ambiente conhecido, ideal para testar novos habitats e tecnologias com menor risco.',
-            'stats': {
-                'Distância': '384.400 km',
-                'Duração Estimada': 'Curta (15 turnos)',
-                'Riscos': 'Baixos'
-            }
-        },
-        'marte': {
-            'nome': 'Marte', 
-            'imagem': 'marte.png',
-            # ADIÇÃO: Descrição e stats para o card
-            'descricao': 'O próximo grande salto da humanidade. Enfrente tempestades de poeira e um ambiente hostil em uma missão de longa duração.',
-            'stats': {
-                'Distância': '225 milhões km',
-                'Duração Estimada': 'Longa (60 turnos)',
-                'Riscos': 'Elevados'
-            }
-        },
-        'exoplaneta': {
-            'nome': 'Exoplaneta', 
-            'imagem': 'Exoplaneta.png',
-            # ADIÇÃO: Descrição e stats para o card
-            'descricao': 'Uma jornada para as estrelas em busca de um novo lar. Desafios desconhecidos e extremos aguardam no primeiro habitat interestelar.',
-            'stats': {
-                'Distância': '500 anos-luz',
-                'Duração Estimada': 'Extrema (250 turnos)',
-                'Riscos': 'Desconhecidos'
-            }
+# Cards da tela de seleção de destino (fixos; a página fica em cache por código de sala)
+MISSOES = {
+    'lua': {
+        'nome': 'Lua', 
+        'imagem': 'lua.png',
+        # ADIÇÃO: Descrição e stats para o card
+        'descricao': 'A porta de entrada para a exploração espacial. Um ambiente conhecido, ideal para testar novos habitats e tecnologias com menor risco.',
+        'stats': {
+            'Distância': '384.400 km',
+            'Duração Estimada': 'Curta (15 turnos)',
+            'Riscos': 'Baixos'
+        }
+    },
+    'marte': {
+        'nome': 'Marte', 
+        'imagem': 'marte.png',
+        # ADIÇÃO: Descrição e stats para o card
+        'descricao': 'O próximo grande salto da humanidade. Enfrente tempestades de poeira e um ambiente hostil em uma missão de longa duração.',
+        'stats': {
+            'Distância': '225 milhões km',
+            'Duração Estimada': 'Longa (60 turnos)',
+            'Riscos': 'Elevados'
+        }
+    },
+    'exoplaneta': {
+        'nome': 'Exoplaneta', 
+        'imagem': 'Exoplaneta.png',
+        # ADIÇÃO: Descrição e stats para o card
+        'descricao': 'Uma jornada para as estrelas em busca de um novo lar. Desafios desconhecidos e extremos aguardam no primeiro habitat interestelar.',
+        'stats': {
+            'Distância': '500 anos-luz',
+            'Duração Estimada': 'Extrema (250 turnos)',
+            'Riscos': 'Desconhecidos'
         }
     }
-    return render_template('selecao.html', missoes=missoes, codigo_sala=request.args.get('codigo_sala'))
+}
+
+# Página de seleção de missão ('/selecao')
+def tela_selecao():
+    """Tela de seleção de destino com cards educativos e estatísticas."""
+    # Só códigos de salas existentes entram na chave do cache (a URL é livre)
+    codigo_sala = db_manager.codigo_sala_existente(request.args.get('codigo_sala'))
+    return cache_fragmentos.pagina('selecao.html', (codigo_sala,), missoes=MISSOES, codigo_sala=codigo_sala)
 
 # NOVA ROTA: Tela para montar o transporte
 # Rota de montagem de transporte movida para blueprint missao
@@ -326,19 +215,13 @@ def tela_selecao():
 # NOVA ROTA: Simula a viagem em turnos
 # Rota de viagem movida para blueprint missao
 
-# --- EXECUÇÃO DO SERVIDOR ---
-app.register_blueprint(professor_bp, url_prefix='/professor')
-app.register_blueprint(aluno_bp)
-app.register_blueprint(missao_bp)
-
 # Proteção global redundante para rotas da missão
 # Garante bloqueio mesmo que alguma configuração de blueprint/before_request não seja aplicada.
-@app.before_request
 def _global_guard_missao():
     try:
         ep = (request.endpoint or '')
         # Apenas protege rotas do blueprint `missao`, excetuando páginas públicas
-        if ep.startswith('missao.') and ep not in {'missao.ranking_rodada', 'missao.game_over'}:
+        if ep.startswith('missao.') and ep not in {'missao.ranking_rodada', 'missao.api_ranking', 'missao.api_ranking_versao', 'missao.api_regras', 'missao.api_catalogo', 'missao.game_over'}:
             # Permitir acesso de professor/admin à montagem de transporte
             if ep == 'missao.montagem_transporte' and (session.get('user_role') in {'professor', 'admin'} or session.get('professor_id')):
                 return None
@@ -374,17 +257,15 @@ IMAGENS_ALIAS_MAP = {
     'exoplaneta.png': 'Exoplaneta.png'
 }
 
-@app.route('/static/images/<path:filename>')
 def static_images_alias(filename):
     """Alias `/static/images/*` para arquivos em `static/imagens/*`.
 
     Traduz nomes conhecidos `.png` para os `.svg` reais quando aplicável.
     """
     alvo = IMAGENS_ALIAS_MAP.get(filename, filename)
-    return send_from_directory(os.path.join(app.root_path, 'static', 'imagens'), alvo)
+    return cache_estaticos.servir('imagens', alvo)
 
 # Alias de acesso direto à sala para compatibilidade
-@app.route('/sala/<codigo_sala>', endpoint='sala_detalhes_alias')
 def sala_detalhes_alias(codigo_sala):
     # Redireciona para a rota do blueprint de professor
     return redirect(url_for('professor.professor_sala_detalhes', codigo_sala=codigo_sala))
@@ -439,6 +320,126 @@ def criar_desafios_padrao(destino):
             }
         ]
 
+def _config_ambiente():
+    """Configuração padrão, lida do ambiente (`create_app(config)` sobrescreve)."""
+    return {
+        # Usa SECRET_KEY do ambiente em produção; mantém fallback para desenvolvimento
+        'SECRET_KEY': os.getenv('SECRET_KEY', 'minha_nasa_minha_vida_secret_key_2024'),
+        # Arquivo SQLite (padrão: salas_virtuais.db na raiz do projeto)
+        'BANCO_ARQUIVO': os.getenv('BANCO_ARQUIVO') or None,
+        # Catálogo (padrão services/catalogo.json) e intervalo em segundos entre
+        # verificações de mudança no arquivo (0 = a cada requisição)
+        'CATALOGO_ARQUIVO': os.getenv('CATALOGO_ARQUIVO') or None,
+        'CATALOGO_VERIFICAR_S': float(os.getenv('CATALOGO_VERIFICAR_S', '2')),
+        # Gravação em lote (group commit) das respostas: opcional.
+        # RESPOSTAS_LOTE_AGUARDAR=false troca a confirmação durável por fire-and-forget.
+        'RESPOSTAS_EM_LOTE': os.getenv('RESPOSTAS_EM_LOTE', 'false').lower() == 'true',
+        'RESPOSTAS_LOTE_INTERVALO_MS': int(os.getenv('RESPOSTAS_LOTE_INTERVALO_MS', '5')),
+        'RESPOSTAS_LOTE_MAX': int(os.getenv('RESPOSTAS_LOTE_MAX', '200')),
+        'RESPOSTAS_LOTE_AGUARDAR': os.getenv('RESPOSTAS_LOTE_AGUARDAR', 'true').lower() == 'true',
+        'RESPOSTAS_LOTE_TIMEOUT_S': float(os.getenv('RESPOSTAS_LOTE_TIMEOUT_S', '5')),
+        # Estimativa Monte Carlo: processos extras só para n acima de um lote (0 = serial)
+        'MONTE_CARLO_PROCESSOS': int(os.getenv('MONTE_CARLO_PROCESSOS', '0')),
+        # Cargas de referência (nave × destino) em segundo plano ao criar o app;
+        # false = calculadas no primeiro acesso
+        'REFERENCIAS_NA_INICIALIZACAO': os.getenv('REFERENCIAS_NA_INICIALIZACAO', 'true').lower() == 'true',
+        # Arquivos de /static/images e /icons em memória: orçamento total e maior
+        # arquivo guardado (acima disso vai direto do disco)
+        'ESTATICOS_MEMORIA_MB': float(os.getenv('ESTATICOS_MEMORIA_MB', '16')),
+        'ESTATICOS_MEMORIA_ARQUIVO_KB': float(os.getenv('ESTATICOS_MEMORIA_ARQUIVO_KB', '1024')),
+        # Cache de páginas/trechos que só dependem do catálogo (false ao editar templates)
+        'CACHE_FRAGMENTOS': os.getenv('CACHE_FRAGMENTOS', 'true').lower() == 'true',
+        # Templates compilados em disco, reaproveitados por novos workers
+        # (pasta vazia = diretório temporário do sistema; JINJA_CACHE=false desliga)
+        'JINJA_CACHE': os.getenv('JINJA_CACHE', 'true').lower() == 'true',
+        'JINJA_CACHE_DIR': os.getenv('JINJA_CACHE_DIR') or None,
+        # Compressão das respostas de texto (HTML, JSON, CSV) acima de um tamanho mínimo;
+        # níveis baixos para gastar pouca CPU
+        'COMPRESSAO': os.getenv('COMPRESSAO', 'true').lower() == 'true',
+        'COMPRESSAO_MINIMO_BYTES': int(os.getenv('COMPRESSAO_MINIMO_BYTES', '1024')),
+        'COMPRESSAO_NIVEL_GZIP': int(os.getenv('COMPRESSAO_NIVEL_GZIP', '5')),
+        'COMPRESSAO_NIVEL_BROTLI': int(os.getenv('COMPRESSAO_NIVEL_BROTLI', '4')),
+    }
+
+
+def _recarregar_catalogo():
+    """Troca o catálogo se o arquivo mudou, sem reiniciar os workers.
+
+    Regras, tabelas de eventos e cargas de referência são refeitas sob demanda
+    pela nova `Catalogo.versao`.
+    """
+    verificar_catalogo()
+
+
+def _calcular_referencias():
+    try:
+        referencia_cargas.obter()
+    except Exception:
+        logging.exception('Falha ao calcular cargas de referência')
+
+
+def create_app(config=None):
+    """Cria e configura a aplicação Flask.
+
+    `config` sobrescreve os padrões de `_config_ambiente()`. Banco, fila de
+    respostas, catálogo e Monte Carlo são serviços do processo: a última
+    aplicação criada define a configuração deles.
+    """
+    app = Flask(__name__)
+    app.config.update(_config_ambiente())
+    app.config.update(config or {})
+
+    if app.config['BANCO_ARQUIVO']:
+        db_manager.configurar(app.config['BANCO_ARQUIVO'])
+    if app.config['RESPOSTAS_EM_LOTE']:
+        db_manager.ativar_fila_respostas(
+            intervalo_ms=app.config['RESPOSTAS_LOTE_INTERVALO_MS'],
+            max_lote=app.config['RESPOSTAS_LOTE_MAX'],
+            aguardar_confirmacao=app.config['RESPOSTAS_LOTE_AGUARDAR'],
+            timeout_confirmacao=app.config['RESPOSTAS_LOTE_TIMEOUT_S'],
+        )
+    monte_carlo.configurar(processos=app.config['MONTE_CARLO_PROCESSOS'])
+    configurar_catalogo(
+        caminho=app.config['CATALOGO_ARQUIVO'],
+        intervalo_verificacao=app.config['CATALOGO_VERIFICAR_S'],
+    )
+
+    app.register_blueprint(professor_bp, url_prefix='/professor')
+    app.register_blueprint(aluno_bp)
+    app.register_blueprint(missao_bp)
+
+    app.before_request(_recarregar_catalogo)
+    app.before_request(_global_guard_missao)
+
+    app.add_url_rule('/', 'index', tela_inicial)
+    app.add_url_rule('/selecao', 'tela_selecao', tela_selecao)
+    app.add_url_rule('/static/images/<path:filename>', 'static_images_alias', static_images_alias)
+    app.add_url_rule('/sala/<codigo_sala>', 'sala_detalhes_alias', sala_detalhes_alias)
+    assets_versionados.init_app(app)
+    imagens_responsivas.init_app(app)
+    sprite_icones.init_app(app)
+    cache_estaticos.registrar('imagens', os.path.join(app.static_folder, 'imagens'))
+    cache_estaticos.registrar('icones', os.path.join(app.root_path, 'templates', 'icons'))
+    cache_estaticos.init_app(app)
+    cache_fragmentos.init_app(app)
+    if app.config['JINJA_CACHE']:
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(app.config['JINJA_CACHE_DIR'])
+    if app.config['COMPRESSAO']:
+        app.wsgi_app = CompressaoWSGI(
+            app.wsgi_app,
+            minimo=app.config['COMPRESSAO_MINIMO_BYTES'],
+            nivel_gzip=app.config['COMPRESSAO_NIVEL_GZIP'],
+            nivel_brotli=app.config['COMPRESSAO_NIVEL_BROTLI'],
+        )
+
+    if app.config['REFERENCIAS_NA_INICIALIZACAO']:
+        threading.Thread(target=_calcular_referencias, name='referencias-cargas', daemon=True).start()
+    return app
+
+
+# Aplicação padrão (wsgi.py, scripts e `python app.py`)
+app = create_app()
+
 # --- EXECUÇÃO DO SERVIDOR ---
 if __name__ == '__main__':
     logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
@@ -9,7 +9,6 @@ Foco em usabilidade e clareza para estudantes:
 Mantém a mesma API pública, separando responsabilidades de app.py.
 """
 
-import sqlite3
 import logging
 from flask import Blueprint, render_template, request, redirect, url_for, session, jsonify
 
@@ -83,7 +82,7 @@ def aluno_login(codigo_sala):
             erro = 'Digite seu nome completo.'
         else:
             try:
-                with sqlite3.connect(db_manager.db_path) as conn:
+                with db_manager.conexao_leitura() as conn:
                     cursor = conn.cursor()
                     cursor.execute('''
                         SELECT id, nome FROM alunos WHERE sala_id = ?
@@ -102,7 +101,7 @@ def aluno_login(codigo_sala):
                             for k in [
                                 'missao_etapa','viagem_diario','viagem_destino','viagem_nave_id','viagem_nave',
                                 'viagem_modulos','viagem_chegada_ok','viagem_pontuacao','missao_score','chegada_ok',
-                                'missao_feedback','erro_modulos'
+                                'missao_feedback','erro_modulos','missao_run_id'
                             ]:
                                 session.pop(k, None)
                             session['missao_etapa'] = 'selecao'
@@ -149,34 +148,31 @@ def aluno_entrar():
                     erro = 'Sala não encontrada. Verifique o código e tente novamente.'
             else:
                 try:
-                    with sqlite3.connect(db_manager.db_path) as conn:
-                        cursor = conn.cursor()
-                        # Validação estrita diretamente no banco: nome precisa existir exatamente na sala
-                        nome_exato = (nome or '').strip()
-                        logging.info(f"Nome digitado (estrito): '{nome_exato}'")
-                        cursor.execute('SELECT id, nome FROM alunos WHERE sala_id = ? AND nome = ?', (sala['id'], nome_exato))
-                        row = cursor.fetchone()
-                        if row:
-                            session['aluno_id'] = row[0]
-                            session['nome_aluno'] = row[1]
-                            session['sala_id'] = sala['id']
-                            # Limpar qualquer estado anterior de viagem para garantir ida à seleção
-                            try:
-                                for k in [
-                                    'missao_etapa','viagem_diario','viagem_destino','viagem_nave_id','viagem_nave',
-                                    'viagem_modulos','viagem_chegada_ok','viagem_pontuacao','missao_score','chegada_ok',
-                                    'missao_feedback','erro_modulos'
-                                ]:
-                                    session.pop(k, None)
-                                session['missao_etapa'] = 'selecao'
-                                session['missao_destino'] = sala.get('destino')
-                                session['missao_nave'] = sala.get('nave_id')
-                            except Exception:
-                                pass
-                            logging.info(f"Entrada bem-sucedida para aluno {row[1]} na sala {codigo}")
-                            return redirect(url_for('missao.selecao_modulos', destino=sala['destino'], nave_id=sala['nave_id']))
-                        else:
-                            erro = 'Nome não encontrado na lista dessa sala. Digite exatamente como está no arquivo do professor.'
+                    # Validação estrita diretamente no banco: nome precisa existir exatamente na sala
+                    nome_exato = (nome or '').strip()
+                    logging.info(f"Nome digitado (estrito): '{nome_exato}'")
+                    aluno = db_manager.buscar_aluno_por_nome(sala['id'], nome_exato)
+                    if aluno:
+                        session['aluno_id'] = aluno['id']
+                        session['nome_aluno'] = aluno['nome']
+                        session['sala_id'] = sala['id']
+                        # Limpar qualquer estado anterior de viagem para garantir ida à seleção
+                        try:
+                            for k in [
+                                'missao_etapa','viagem_diario','viagem_destino','viagem_nave_id','viagem_nave',
+                                'viagem_modulos','viagem_chegada_ok','viagem_pontuacao','missao_score','chegada_ok',
+                                'missao_feedback','erro_modulos','missao_run_id'
+                            ]:
+                                session.pop(k, None)
+                            session['missao_etapa'] = 'selecao'
+                            session['missao_destino'] = sala.get('destino')
+                            session['missao_nave'] = sala.get('nave_id')
+                        except Exception:
+                            pass
+                        logging.info(f"Entrada bem-sucedida para aluno {aluno['nome']} na sala {codigo}")
+                        return redirect(url_for('missao.selecao_modulos', destino=sala['destino'], nave_id=sala['nave_id']))
+                    else:
+                        erro = 'Nome não encontrado na lista dessa sala. Digite exatamente como está no arquivo do professor.'
                 except Exception:
                     logging.exception("Erro ao processar entrada do aluno")
                     erro = 'Ocorreu um erro ao processar sua entrada.'
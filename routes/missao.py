@@ -11,15 +11,20 @@ Design pedagógico:
 - Eventos aleatórios ilustram trade-offs de engenharia e sustentabilidade.
 """
 
-import random
 import json
+import base64
 import logging
-import os
-import sqlite3
-from flask import Blueprint, render_template, request, redirect, url_for, session, send_from_directory, current_app
+from flask import Blueprint, render_template, request, redirect, url_for, session, current_app, jsonify
 
 from services.db import db_manager
-from services.data import NAVES_ESPACIAIS, MODULOS_HABITAT, EVENTOS_ALEATORIOS
+from services.cache_http import etag_para, resposta_304, com_etag
+from services.data import obter_catalogo
+from services import simulacao
+from services.regras import obter_regras
+from services.icones import ICONES_HABITAT, sprite_icones
+from services.estaticos import CACHE_IMUTAVEL
+from services.cache_estaticos import cache_estaticos
+from services.cache_fragmentos import cache_fragmentos
 
 
 missao_bp = Blueprint('missao', __name__)
@@ -35,7 +40,7 @@ def _require_aluno_session():
     """
     try:
         # Endpoints públicos do blueprint
-        public_endpoints = {'missao.ranking_rodada', 'missao.game_over'}
+        public_endpoints = {'missao.ranking_rodada', 'missao.api_ranking', 'missao.api_ranking_versao', 'missao.api_regras', 'missao.api_catalogo', 'missao.game_over'}
         ep = request.endpoint
         if ep in public_endpoints:
             return None
@@ -55,8 +60,8 @@ def _require_aluno_session():
         # Controle de fluxo por etapa (apenas para alunos): impedir volta à montagem, permitir voltar à seleção
         etapa = session.get('missao_etapa')
         if etapa == 'viagem' and ep in {'missao.montagem_transporte'}:
-            destino = session.get('viagem_destino') or session.get('missao_destino')
-            nave_id = session.get('viagem_nave_id') or session.get('missao_nave')
+            destino = session.get('missao_destino')
+            nave_id = session.get('missao_nave')
             if destino and nave_id:
                 return redirect(url_for('missao.viagem_get', destino=destino, nave_id=nave_id))
             return redirect(url_for('missao.ranking_rodada'))
@@ -72,10 +77,12 @@ def _require_aluno_session():
 def _missao_no_cache(response):
     """Evita cache/bfcache nas páginas HTML da missão.
 
-    Garante revalidação pelo navegador ao pressionar Voltar/Avançar.
+    Garante revalidação pelo navegador ao pressionar Voltar/Avançar. A
+    página pública com ETag (`/ranking-rodada`) fica com `private, no-cache`
+    de `com_etag`, para o 304 valer.
     """
     try:
-        if response.mimetype == 'text/html':
+        if response.mimetype == 'text/html' and 'ETag' not in response.headers:
             response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, private'
             response.headers['Pragma'] = 'no-cache'
             response.headers['Expires'] = '0'
@@ -96,7 +103,13 @@ def montagem_transporte(destino):
             session['missao_etapa'] = 'montagem'
         except Exception:
             pass
-        return render_template('montagem_transporte.html', naves=NAVES_ESPACIAIS, destino=destino, codigo_sala=request.args.get('codigo_sala'))
+        catalogo = obter_catalogo()
+        # Só códigos de salas existentes entram na chave do cache (a URL é livre)
+        codigo_sala = db_manager.codigo_sala_existente(request.args.get('codigo_sala'))
+        return cache_fragmentos.pagina(
+            'montagem_transporte.html', (catalogo.versao, destino, codigo_sala),
+            naves=catalogo.naves, destino=destino, codigo_sala=codigo_sala,
+        )
     except Exception:
         logging.exception("Falha ao renderizar montagem_transporte")
         return "Erro ao preparar montagem de transporte", 500
@@ -113,15 +126,9 @@ def selecao_modulos(destino, nave_id):
         destino_norm = (destino or '').lower()
         if destino_norm not in {'lua', 'marte', 'exoplaneta'}:
             return redirect(url_for('tela_selecao', codigo_sala=request.args.get('codigo_sala')))
-        # Normalização de aliases de nave vindos por imagem/nome
-        alias = {
-            'foguete-longa-marcha': 'longmarch8a',
-            'longmarch8a': 'longmarch8a',
-            'falcon9': 'falcon9',
-            'pslv': 'pslv'
-        }
-        nave_key = alias.get((nave_id or '').lower(), nave_id)
-        nave_selecionada = NAVES_ESPACIAIS.get(nave_key)
+        catalogo = obter_catalogo()
+        nave_key = catalogo.nave_id(nave_id)
+        nave_selecionada = catalogo.naves.get(nave_key)
         if not nave_selecionada:
             return "Nave não encontrada!", 404
         try:
@@ -130,28 +137,54 @@ def selecao_modulos(destino, nave_id):
             session['missao_nave'] = nave_key
         except Exception:
             pass
-        return render_template('selecao_modulos.html', destino=destino, nave=nave_selecionada, nave_id=nave_key, modulos=MODULOS_HABITAT, codigo_sala=request.args.get('codigo_sala'))
+        return render_template('selecao_modulos.html', destino=destino, nave=nave_selecionada, nave_id=nave_key, modulos=catalogo.modulos, codigo_sala=request.args.get('codigo_sala'), catalogo_versao=catalogo.versao)
     except Exception:
         logging.exception("Falha ao renderizar selecao_modulos")
         return "Erro ao preparar seleção de módulos", 500
 
 
+# Chaves que guardavam a viagem inteira no cookie antes de `missao_runs`
+CHAVES_VIAGEM_LEGADAS = (
+    'viagem_diario', 'viagem_destino', 'viagem_nave_id', 'viagem_nave', 'viagem_modulos',
+    'viagem_chegada_ok', 'viagem_pontuacao', 'modulos_selecionados', 'chegada_ok',
+    'missao_score', 'missao_feedback',
+)
+
+
+def _run_atual():
+    """Execução corrente da sessão, carregada do banco sob demanda (ou None)."""
+    run_id = session.get('missao_run_id')
+    if not run_id:
+        return None
+    try:
+        return db_manager.buscar_missao_run(run_id)
+    except Exception:
+        logging.exception('Falha ao carregar execução %s', run_id)
+        return None
+
+
+def _modulos_da_run(run):
+    """`[(id, nome, avariado)]` dos módulos da execução (o catálogo não é copiado)."""
+    avariados = set(run['avariados'])
+    catalogo = obter_catalogo()
+    modulos = []
+    for mod_id in dict.fromkeys(run['modulos']):
+        modulo = catalogo.modulos.get(mod_id)
+        modulos.append((mod_id, modulo.nome if modulo else mod_id, mod_id in avariados))
+    return modulos
+
+
 @missao_bp.route('/viagem/<string:destino>/<string:nave_id>', methods=['POST'])
 def viagem(destino, nave_id):
     """Processa módulos selecionados e simula a viagem em turnos."""
     try:
-        # Normalizar id de nave para chave interna
-        alias = {
-            'foguete-longa-marcha': 'longmarch8a',
-            'longmarch8a': 'longmarch8a',
-            'falcon9': 'falcon9',
-            'pslv': 'pslv'
-        }
-        nave_key = alias.get((nave_id or '').lower(), nave_id)
-        nave = NAVES_ESPACIAIS.get(nave_key)
+        catalogo = obter_catalogo()
+        nave_key = catalogo.nave_id(nave_id)
+        nave = catalogo.naves.get(nave_key)
 
         # Ler módulos selecionados e validar pelo menos um
-        modulos_selecionados_ids = request.form.getlist('modulos_selecionados')
+        # Só ids do catálogo; avarias ficam num bitset da execução (o catálogo é imutável)
+        modulos_selecionados_ids = [m for m in request.form.getlist('modulos_selecionados') if m in catalogo.modulos]
         if not modulos_selecionados_ids:
             try:
                 session['erro_modulos'] = 'Selecione pelo menos um módulo antes de lançar a missão.'
@@ -162,99 +195,14 @@ def viagem(destino, nave_id):
                 return redirect(url_for('missao.selecao_modulos', destino=destino, nave_id=nave_key, codigo_sala=codigo_sala))
             return redirect(url_for('missao.selecao_modulos', destino=destino, nave_id=nave_key))
 
-        modulos_a_bordo = {id: MODULOS_HABITAT[id] for id in modulos_selecionados_ids}
-
-        if destino == 'marte':
-            total_turnos = 60
-        elif destino == 'exoplaneta':
-            total_turnos = 250
-        else:
-            total_turnos = 15
-
-        # Guardar módulos escolhidos para uso posterior no Habitat
-        try:
-            session['modulos_selecionados'] = modulos_selecionados_ids
-        except Exception:
-            logging.exception('Falha ao salvar módulos selecionados na sessão')
-
-        # IA simples: personalizar mensagens por turno com base nos módulos e destino
-        ids_set = set(modulos_selecionados_ids)
-        ids_list = list(ids_set)
-        diario_de_bordo = []
-
-        def evento_personalizado(turno:int):
-            # 30% de chance de evento aleatório conhecido; caso contrário, evento positivo personalizado
-            if random.random() < (0.3 if destino != 'exoplaneta' else 0.4):
-                base = random.choice([e for e in EVENTOS_ALEATORIOS if e.get('nome') != 'Tudo Calmo'])
-                evt = dict(base)
-                # Ícones por evento aleatório
-                icones_eventos = {
-                    'Tempestade Solar': 'solar-storm.svg',
-                    'Falha Mecânica Menor': 'wrench.svg',
-                    'Impacto de Micrometeoroide': 'meteor.svg',
-                    'Surto de Energia': 'surge.svg',
-                    'Navegação Otimizada': 'navigation.svg'
-                }
-                evt['icone'] = icones_eventos.get(base['nome'], 'event-default.svg')
-                # Ajuste descritivo conforme módulos presentes
-                if base['nome'] == 'Tempestade Solar':
-                    if 'suporte_vida' in ids_set:
-                        evt['descricao'] += ' Sistemas de suporte mantêm níveis estáveis para a tripulação.'
-                    else:
-                        evt['descricao'] += ' A ausência de Suporte à Vida agrava a resposta da tripulação.'
-                elif base['nome'] == 'Falha Mecânica Menor' and 'impressao3d' in ids_set:
-                    evt['descricao'] += ' A Impressão 3D fabrica uma peça de reposição e reduz o atraso.'
-                elif base['nome'] == 'Impacto de Micrometeoroide' and 'armazenamento' in ids_set:
-                    evt['descricao'] += ' A carga está bem acondicionada; danos são mínimos.'
-                elif base['nome'] == 'Surto de Energia' and 'controle' in ids_set:
-                    evt['descricao'] += ' O módulo de Controle estabiliza rapidamente os sistemas.'
-                elif base['nome'] == 'Navegação Otimizada' and 'exercicios' in ids_set:
-                    evt['descricao'] += ' A equipe em boa forma física mantém procedimentos com precisão.'
-                return evt
-            # Evento positivo relacionado a um módulo selecionado
-            if ids_list:
-                mod_id = ids_list[(turno - 1) % len(ids_list)]
-                mod = MODULOS_HABITAT.get(mod_id, {"nome": mod_id})
-                nome_evt = f"Operação do Módulo: {mod.get('nome')}"
-                dicas = {
-                    'hidroponia': 'Produção de alimentos estabiliza moral e reduz consumo de estoque.',
-                    'medico': 'Atendimento médico lida com indisposição leve na tripulação.',
-                    'airlock': 'EVA realizada para inspeção externa; retorno seguro ao habitat.',
-                    'impressao3d': 'Peça fabricada para reparo rápido de um subsistema.',
-                    'sanitario': 'Sistema de reciclagem de água mantém níveis adequados.',
-                    'armazenamento': 'Reorganização de suprimentos otimiza acesso e segurança.',
-                    'exercicios': 'Rotina de exercícios mitiga fadiga em microgravidade.',
-                    'inflavel': 'Módulo expansível aumenta volume útil para operações.',
-                    'pesquisa': 'Experimento científico rende dados importantes da missão.',
-                    'alimentacao': 'Refeição balanceada melhora coesão da equipe.',
-                    'habitacional': 'Descanso adequado melhora desempenho da equipe.',
-                    'suporte_vida': 'Níveis de oxigênio e pressão se mantêm estáveis.'
-                }
-                icones_modulos = {
-                    'hidroponia': 'plant.svg',
-                    'medico': 'medical.svg',
-                    'airlock': 'airlock.svg',
-                    'impressao3d': 'printer3d.svg',
-                    'sanitario': 'water-recycle.svg',
-                    'armazenamento': 'storage.svg',
-                    'exercicios': 'dumbbell.svg',
-                    'inflavel': 'expand.svg',
-                    'pesquisa': 'flask.svg',
-                    'alimentacao': 'food.svg',
-                    'habitacional': 'habitat.svg',
-                    'suporte_vida': 'life-support.svg'
-                }
-                desc = dicas.get(mod_id, 'O módulo contribui positivamente para o andamento da missão.')
-                return {"nome": nome_evt, "descricao": desc, "efeito": "nenhum", "icone": icones_modulos.get(mod_id, 'module-default.svg')}
-            # Fallback
-            return {"nome": "Rotina Estável", "descricao": "A equipe segue procedimentos padrão enquanto sistemas operam normalmente.", "efeito": "nenhum", "icone": "calm.svg"}
-
-        for turno_atual in range(1, total_turnos + 1):
-            evento = evento_personalizado(turno_atual)
-            diario_de_bordo.append({"turno": turno_atual, "evento": evento})
-            if evento.get('efeito') == 'risco_avaria_modulo' and modulos_a_bordo:
-                modulo_avariado_id = random.choice(list(modulos_a_bordo.keys()))
-                modulos_a_bordo[modulo_avariado_id]['status'] = 'Avariado'
+        # Simulação em turnos (RNG próprio da execução; a semente permite repeti-la)
+        semente = simulacao.nova_semente()
+        eventos = simulacao.simular(destino, modulos_selecionados_ids, semente)
+        diario_de_bordo = simulacao.montar_diario(eventos, modulos_selecionados_ids)
+        avarias = simulacao.mascara_avarias(eventos)
+        avariados = simulacao.modulos_avariados(eventos)
+        recursos = simulacao.simular_recursos(destino, modulos_selecionados_ids, eventos)
+        esgotados = simulacao.recursos_esgotados(recursos)
 
         codigo_sala = request.args.get('codigo_sala') or request.form.get('codigo_sala')
         if codigo_sala:
@@ -263,123 +211,35 @@ def viagem(destino, nave_id):
                     db_manager.atualizar_destino_e_nave(codigo_sala, destino, nave_key)
                 except Exception:
                     logging.exception("Falha ao atualizar destino/nave da sala")
-                titulo = f"Missão {destino.capitalize()} — {nave['nome'] if nave else nave_id}"
-                descricao = f"Missão planejada com {len(modulos_a_bordo)} módulos selecionados."
-                sala = db_manager.buscar_sala_por_codigo_any(codigo_sala)
-                if sala:
-                    try:
-                        desafios = json.loads(sala.get('desafios_json') or '[]')
-                    except Exception:
-                        desafios = []
-                    desafios.append({'titulo': titulo, 'descricao': descricao})
-                    db_manager.atualizar_desafios_json(codigo_sala, json.dumps(desafios, ensure_ascii=False))
+                titulo = f"Missão {destino.capitalize()} — {nave.nome if nave else nave_id}"
+                descricao = f"Missão planejada com {len(set(modulos_selecionados_ids))} módulos selecionados."
+                db_manager.adicionar_desafio(codigo_sala, titulo, descricao)
             except Exception:
                 logging.exception("Falha ao anexar desafio à sala")
             # Permitir que a simulação prossiga mesmo sem aluno logado
 
         # --- Cálculo de chegada e pontuação ---
-        def calcular_resultado_e_pontos(destino_val, nave_val, modulos_dict, diario):
-            # Base da pontuação por dificuldade
-            dificuldade_base = {'lua': 50, 'marte': 120, 'exoplaneta': 300}.get(destino_val, 50)
-
-            # Essenciais por destino
-            essenciais_por_destino = {
-                'lua': {'suporte_vida', 'habitacional'},
-                'marte': {'suporte_vida', 'habitacional', 'medico'},
-                'exoplaneta': {'suporte_vida', 'habitacional', 'blindagem', 'controle', 'hidroponia'}
-            }
-            essenciais = essenciais_por_destino.get(destino_val, {'suporte_vida', 'habitacional'})
-
-            presentes = set(modulos_dict.keys())
-            faltantes = essenciais - presentes
-            pontos = dificuldade_base
-            pontos += 20 * len(essenciais.intersection(presentes))
-            pontos -= 25 * len(faltantes)
-
-            # Massa e capacidade por dificuldade
-            capacidade_kg = (nave_val.get('capacidade_carga', 0) or 0) * 1000 if nave_val else 0
-            massa_total = sum(m.get('massa', 0) for m in modulos_dict.values())
-            if capacidade_kg > 0:
-                ratio = (massa_total / capacidade_kg)
-                if destino_val == 'lua':
-                    # Lua: mais maleável, aceita até 120% da capacidade com penalização
-                    if massa_total > capacidade_kg * 1.2:
-                        pontos -= 60
-                    elif massa_total > capacidade_kg:
-                        pontos -= 30
-                    elif 0.5 <= ratio <= 1.0:
-                        pontos += 20
-                elif destino_val == 'marte':
-                    # Marte: mediano, precisa respeitar capacidade, premia boa ocupação
-                    if massa_total > capacidade_kg:
-                        pontos -= 50
-                    elif 0.6 <= ratio <= 0.95:
-                        pontos += 30
-                else:
-                    # Exoplaneta: difícil, exige margem de segurança
-                    if massa_total > capacidade_kg * 0.95:
-                        pontos -= 60
-                    elif 0.6 <= ratio <= 0.9:
-                        pontos += 25
-
-            # Avarias com penalização por destino
-            avariados = sum(1 for m in modulos_dict.values() if m.get('status') == 'Avariado')
-            penal_por_avaria = {'lua': 8, 'marte': 10, 'exoplaneta': 14}.get(destino_val, 10)
-            pontos -= avariados * penal_por_avaria
-
-            # Gate de chegada por dificuldade
-            allowed_missing = {'lua': 2, 'marte': 1, 'exoplaneta': 0}.get(destino_val, 1)
-            tolerancia_avarias = {'lua': 3, 'marte': 2, 'exoplaneta': 1}.get(destino_val, 2)
-
-            # Regras de massa para gate
-            if destino_val == 'lua':
-                massa_ok = (capacidade_kg == 0) or (massa_total <= capacidade_kg * 1.2)
-            elif destino_val == 'marte':
-                massa_ok = (capacidade_kg == 0) or (massa_total <= capacidade_kg)
-            else:
-                massa_ok = (capacidade_kg == 0) or (massa_total <= capacidade_kg * 0.95)
-
-            chegou = (len(faltantes) <= allowed_missing) and massa_ok and (avariados <= tolerancia_avarias)
-            return chegou, max(pontos, 0), massa_total, capacidade_kg
-
-        chegada_ok, pontuacao, massa_total, capacidade_kg = calcular_resultado_e_pontos(destino, nave, modulos_a_bordo, diario_de_bordo)
+        chegada_ok, pontuacao, massa_total, capacidade_kg = simulacao.calcular_resultado_e_pontos(
+            destino, nave, modulos_selecionados_ids, avarias, len(esgotados)
+        )
 
-        # Persistir em sessão para gate do Habitat
-        session['chegada_ok'] = chegada_ok
-        session['missao_score'] = pontuacao
         session['missao_destino'] = destino
         session['missao_nave'] = nave_key
 
         # Gerar feedback inteligente em caso de falha
+        feedback = None
         try:
             if not chegada_ok:
-                essenciais_por_destino = {
-                    'lua': {'suporte_vida', 'habitacional'},
-                    'marte': {'suporte_vida', 'habitacional', 'medico'},
-                    'exoplaneta': {'suporte_vida', 'habitacional', 'blindagem', 'controle', 'hidroponia'}
-                }
-                essenciais = essenciais_por_destino.get(destino, {'suporte_vida', 'habitacional'})
-                presentes = set(modulos_a_bordo.keys())
-                faltantes = list(essenciais - presentes)
-                avariados = [k for k, m in modulos_a_bordo.items() if m.get('status') == 'Avariado']
+                regras = obter_regras()
                 ratio = (massa_total / capacidade_kg) if (capacidade_kg or 0) > 0 else 0
-                causas = []
-                if faltantes:
-                    causas.append(f"Módulos essenciais ausentes: {', '.join(faltantes)}.")
-                if destino == 'lua' and capacidade_kg and massa_total > capacidade_kg * 1.2:
-                    causas.append('Excesso de massa acima de 120% da capacidade da nave.')
-                elif destino == 'marte' and capacidade_kg and massa_total > capacidade_kg:
-                    causas.append('Massa total excedeu a capacidade da nave.')
-                elif destino == 'exoplaneta' and capacidade_kg and massa_total > capacidade_kg * 0.95:
-                    causas.append('Para exoplaneta, a margem de segurança de massa não foi atendida (95%).')
-                if avariados:
-                    causas.append(f"Avarias em módulos críticos: {', '.join(avariados)}.")
+                causas = regras.causas_falha(
+                    destino, regras.mascara(modulos_selecionados_ids), massa_total, capacidade_kg, avariados, esgotados
+                )
                 resumo = (
-                    f"Destino: {destino.capitalize()} | Nave: {nave.get('nome') if nave else nave_key} | "
+                    f"Destino: {destino.capitalize()} | Nave: {nave.nome if nave else nave_key} | "
                     f"Massa: {int(massa_total)}kg / Capacidade: {int(capacidade_kg)}kg (uso {int(ratio*100)}%)."
                 )
                 feedback = "\n".join(["Análise de Game Over:", resumo] + (causas or ["Condições insuficientes para a missão."]))
-                session['missao_feedback'] = feedback
         except Exception:
             logging.exception('Falha ao gerar feedback de Game Over')
 
@@ -405,18 +265,18 @@ def viagem(destino, nave_id):
         except Exception:
             logging.exception('Falha ao registrar pontuação da missão no ranking')
 
-        # PRG: salvar resultados e redirecionar para GET
+        # PRG: gravar a execução no servidor (a sessão guarda só o id) e redirecionar para GET
         try:
-            session['viagem_diario'] = diario_de_bordo
-            session['viagem_destino'] = destino
-            session['viagem_nave_id'] = nave_key
-            session['viagem_nave'] = nave
-            session['viagem_modulos'] = modulos_a_bordo
-            session['viagem_chegada_ok'] = chegada_ok
-            session['viagem_pontuacao'] = pontuacao
+            session['missao_run_id'] = db_manager.criar_missao_run(
+                session.get('aluno_id'), session.get('sala_id'), destino, nave_key,
+                modulos_selecionados_ids, avariados, diario_de_bordo, chegada_ok, pontuacao, feedback,
+                semente=semente, recursos=recursos
+            )
+            for k in CHAVES_VIAGEM_LEGADAS:
+                session.pop(k, None)
             session['missao_etapa'] = 'viagem'
         except Exception:
-            logging.exception('Falha ao salvar dados da viagem na sessão')
+            logging.exception('Falha ao gravar execução da missão')
         codigo_sala = request.args.get('codigo_sala') or request.form.get('codigo_sala')
         if codigo_sala:
             return redirect(url_for('missao.viagem_get', destino=destino, nave_id=nave_key, codigo_sala=codigo_sala))
@@ -430,10 +290,11 @@ def viagem(destino, nave_id):
 def habitat():
     """Gate para a montagem do Habitat: somente após chegada bem-sucedida."""
     try:
-        if not session.get('chegada_ok'):
+        run = _run_atual()
+        if not run or not run['chegada_ok']:
             return redirect(url_for('missao.game_over'))
         # Carregar módulos previamente selecionados para limitar a paleta
-        mod_ids = session.get('modulos_selecionados') or []
+        mod_ids = run['modulos']
         # Mapear para chaves usadas no editor de Habitat (normalização simples)
         # Tabela de equivalência: ids de seleção -> chaves de ícone do editor
         mapper = {
@@ -449,7 +310,7 @@ def habitat():
             'airlock': 'airlock',
             'hidroponia': 'hidroponia',
             'impressao3d': 'imp3d',
-            # novos módulos adicionados ao catálogo (services/data.py)
+            # novos módulos adicionados ao catálogo (services/catalogo.json)
             'blindagem': 'blindagem',
             'estrutural': 'tesserae',    # Estrutural Modular (TESSERAE)
             'lazer': 'cultura',          # Cultura e Lazer
@@ -473,7 +334,9 @@ def habitat():
             modulos_permitidos=modulos_permitidos,
             max_modulos=max_modulos,
             limites_por_tipo=limites_por_tipo,
-            destino=session.get('missao_destino')
+            destino=run['destino'],
+            icones=list(ICONES_HABITAT),
+            sprite_url=url_for('missao.icones_sprite', v=sprite_icones.versao)
         )
     except Exception:
         logging.exception('Falha ao abrir Habitat')
@@ -491,33 +354,25 @@ def habitat_finalizar():
             try:
                 nome_aluno = session.get('nome_aluno')
                 if nome_aluno:
-                    with sqlite3.connect(db_manager.db_path) as conn:
-                        cursor = conn.cursor()
-                        cursor.execute('SELECT id FROM alunos WHERE sala_id = ? AND nome = ?', (sala_id, nome_aluno))
-                        row = cursor.fetchone()
-                        if row:
-                            aluno_id = row[0]
+                    aluno = db_manager.buscar_aluno_por_nome(sala_id, nome_aluno)
+                    if aluno:
+                        aluno_id = aluno['id']
             except Exception:
                 logging.exception('Fallback de aluno_id por nome/sala falhou')
-        itens = session.get('modulos_selecionados') or []
+        run = _run_atual() or {}
+        itens = run.get('modulos') or []
         # Análise de sobrevivência com base nos itens selecionados
-        essenciais_por_destino = {
-            'lua': {'suporte_vida', 'habitacional'},
-            'marte': {'suporte_vida', 'habitacional', 'medico'},
-            'exoplaneta': {'suporte_vida', 'habitacional', 'blindagem', 'controle', 'hidroponia'}
-        }
-        destino = session.get('missao_destino')
-        essenciais = essenciais_por_destino.get(destino, {'suporte_vida', 'habitacional'})
-        presentes = set(itens)
-        faltantes = list(essenciais - presentes)
-        sobrevivencia_ok = len(faltantes) == 0
+        destino = run.get('destino') or session.get('missao_destino')
+        regras = obter_regras()
+        sobrevivencia_ok, faltantes = regras.sobrevivencia(destino, regras.mascara(itens))
 
+        pontuacao = run.get('pontuacao') or 0
         detalhes = {
-            'destino': session.get('missao_destino'),
-            'nave_id': session.get('missao_nave'),
+            'destino': destino,
+            'nave_id': run.get('nave_id') or session.get('missao_nave'),
             'modulos': itens,
-            'chegada_ok': session.get('chegada_ok'),
-            'score': session.get('missao_score'),
+            'chegada_ok': run.get('chegada_ok'),
+            'score': run.get('pontuacao'),
             'avaliacao_sobrevivencia': {
                 'ok': sobrevivencia_ok,
                 'faltantes': faltantes
@@ -526,7 +381,7 @@ def habitat_finalizar():
         if aluno_id and sala_id:
             try:
                 db_manager.registrar_resposta_desafio(
-                    aluno_id, sala_id, 'habitat_finalizado', json.dumps(detalhes, ensure_ascii=False), 1, int(session.get('missao_score') or 0)
+                    aluno_id, sala_id, 'habitat_finalizado', json.dumps(detalhes, ensure_ascii=False), 1, int(pontuacao)
                 )
             except Exception:
                 logging.exception('Falha ao registrar finalização de habitat no ranking')
@@ -541,7 +396,7 @@ def habitat_finalizar():
 def game_over():
     """Tela de Game Over caso a missão não tenha chegado ao destino."""
     try:
-        return render_template('game_over.html')
+        return render_template('game_over.html', run=_run_atual())
     except Exception:
         logging.exception('Falha ao renderizar Game Over')
         return "Erro ao renderizar página", 500
@@ -575,18 +430,12 @@ def retry_modulos():
         if not nave_id:
             nave_id = session.get('missao_nave')
 
-        # Normalização de aliases
-        alias = {
-            'foguete-longa-marcha': 'longmarch8a',
-            'longmarch8a': 'longmarch8a',
-            'falcon9': 'falcon9',
-            'pslv': 'pslv'
-        }
-        nave_key = alias.get((nave_id or '').lower(), nave_id)
+        catalogo = obter_catalogo()
+        nave_key = catalogo.nave_id(nave_id)
         destino_norm = (destino or '').lower()
 
         # Sem fallback para outras páginas: aluno deve ir apenas à seleção de módulos
-        if destino_norm not in {'lua', 'marte', 'exoplaneta'} or (nave_key not in NAVES_ESPACIAIS):
+        if destino_norm not in {'lua', 'marte', 'exoplaneta'} or (nave_key not in catalogo.naves):
             return "Configuração de missão ausente ou inválida. Solicite ao professor para configurar a sala.", 400
 
         # Inclui codigo_sala se disponível
@@ -608,42 +457,197 @@ def retry_modulos():
         return redirect(url_for('tela_selecao'))
 
 
+@missao_bp.route('/icons/sprite.svg')
+def icones_sprite():
+    """Sprite com todos os ícones do editor; imutável quando pedido com a versão atual (`?v=`)."""
+    versao, conteudo = sprite_icones.obter()
+    etag = etag_para(request.endpoint, versao)
+    nao_modificado = resposta_304(etag)
+    if nao_modificado is not None:
+        return nao_modificado
+    resposta = current_app.response_class(conteudo, mimetype='image/svg+xml')
+    if request.args.get('v') == versao:
+        resposta.headers['Cache-Control'] = CACHE_IMUTAVEL
+    return com_etag(resposta, etag)
+
+
 @missao_bp.route('/icons/<path:filename>')
 def icons(filename):
-    """Serve os ícones adicionados em templates/icons para uso no Habitat."""
-    try:
-        base = os.path.join(current_app.root_path, 'templates', 'icons')
-        return send_from_directory(base, filename)
-    except Exception:
-        logging.exception('Falha ao servir ícone %s', filename)
-        return "Ícone não encontrado", 404
+    """Serve os ícones de templates/icons (da memória, ver services/cache_estaticos.py)."""
+    return cache_estaticos.servir('icones', filename)
 
 
 @missao_bp.route('/ranking-rodada')
 def ranking_rodada():
     """Painel simples de ranking dos participantes da rodada (salas ativas)."""
     try:
+        versao = db_manager.versao_dados()
+        etag = etag_para(request.endpoint, versao)
+        nao_modificado = resposta_304(etag)
+        if nao_modificado is not None:
+            return nao_modificado
         try:
             ranking = db_manager.obter_ranking_salas_ativas(limit=100)
         except Exception:
             ranking = []
-        return render_template('ranking_rodada.html', ranking=ranking)
+        return com_etag(render_template('ranking_rodada.html', ranking=ranking, versao_dados=versao), etag)
     except Exception:
         logging.exception('Falha ao renderizar ranking da rodada')
         return "Erro ao renderizar ranking", 500
+
+
+# Campos que o cliente pode pedir em `/api/ranking?campos=...`
+CAMPOS_RANKING = ('posicao', 'id', 'nome', 'total', 'tentativas', 'concluidos')
+LIMITE_PAGINA_RANKING = 200
+
+
+def _codificar_cursor(item):
+    """Cursor opaco com a chave de ordenação (total, nome, id) do último item."""
+    bruto = json.dumps([item['total'], item['nome'], item['id']], separators=(',', ':'))
+    return base64.urlsafe_b64encode(bruto.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def _decodificar_cursor(cursor):
+    """Inverso de `_codificar_cursor`; levanta ValueError para cursores inválidos."""
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        total, nome, aluno_id = json.loads(bruto.decode('utf-8'))
+    except Exception:
+        raise ValueError('cursor inválido')
+    if not (isinstance(total, int) and isinstance(nome, str) and isinstance(aluno_id, int)):
+        raise ValueError('cursor inválido')
+    return total, nome, aluno_id
+
+
+@missao_bp.route('/api/ranking', endpoint='api_ranking')
+def api_ranking():
+    """Ranking em JSON paginado por keyset (total desc, nome, id).
+
+    Parâmetros: `sala` (código da sala; sem ele, salas ativas), `limite`,
+    `cursor` (valor de `proximo_cursor` da página anterior) e `campos`
+    (lista separada por vírgulas para projetar apenas parte dos campos).
+    """
+    try:
+        limite = min(max(int(request.args.get('limite', 20)), 1), LIMITE_PAGINA_RANKING)
+    except ValueError:
+        return jsonify({'error': 'limite inválido'}), 400
+    campos = CAMPOS_RANKING
+    if request.args.get('campos'):
+        campos = tuple(c.strip() for c in request.args['campos'].split(',') if c.strip())
+        desconhecidos = [c for c in campos if c not in CAMPOS_RANKING]
+        if desconhecidos:
+            return jsonify({'error': 'campos desconhecidos: ' + ', '.join(desconhecidos)}), 400
+    apos = None
+    if request.args.get('cursor'):
+        try:
+            apos = _decodificar_cursor(request.args['cursor'])
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+    sala_id = None
+    codigo_sala = request.args.get('sala')
+    if codigo_sala:
+        sala = db_manager.versao_dados_por_codigo(codigo_sala)
+        if not sala or sala['ativa'] != 1:
+            return jsonify({'error': 'sala não encontrada ou inativa'}), 404
+        sala_id, versao = sala['id'], sala['versao']
+    else:
+        versao = db_manager.versao_dados()
+    etag = etag_para(request.endpoint, sala_id, versao, limite, campos, apos)
+    nao_modificado = resposta_304(etag)
+    if nao_modificado is not None:
+        return nao_modificado
+    try:
+        # Um item a mais indica se existe próxima página
+        itens = db_manager.obter_ranking_pagina(sala_id, limite + 1, apos)
+    except Exception:
+        logging.exception('Falha ao paginar ranking')
+        return jsonify({'error': 'falha ao consultar ranking'}), 500
+    proximo = _codificar_cursor(itens[limite - 1]) if len(itens) > limite else None
+    return com_etag(jsonify({
+        'itens': [{c: item[c] for c in campos} for item in itens[:limite]],
+        'proximo_cursor': proximo,
+        'limite': limite,
+    }), etag)
+
+
+@missao_bp.route('/api/ranking/versao', endpoint='api_ranking_versao')
+def api_ranking_versao():
+    """Versão de dados do ranking para polling: 304 enquanto nada mudar."""
+    versao = db_manager.versao_dados()
+    etag = etag_para(request.endpoint, versao)
+    nao_modificado = resposta_304(etag)
+    if nao_modificado is not None:
+        return nao_modificado
+    return com_etag(jsonify({'versao': versao}), etag)
+
+
+@missao_bp.route('/api/regras-missao', endpoint='api_regras')
+def api_regras():
+    """Regras compiladas da missão em JSON (mesmas usadas pelo servidor), com ETag da versão."""
+    regras = obter_regras()
+    etag = etag_para(request.endpoint, regras.versao)
+    nao_modificado = resposta_304(etag)
+    if nao_modificado is not None:
+        return nao_modificado
+    return com_etag(jsonify(regras.para_json()), etag)
+
+
+@missao_bp.route('/api/catalogo', endpoint='api_catalogo')
+def api_catalogo():
+    """Catálogo de naves, módulos e eventos em JSON, com ETag do hash do arquivo."""
+    catalogo = obter_catalogo()
+    etag = etag_para(request.endpoint, catalogo.versao)
+    nao_modificado = resposta_304(etag)
+    if nao_modificado is not None:
+        return nao_modificado
+    return com_etag(jsonify(catalogo.para_json()), etag)
+
+
 @missao_bp.route('/viagem/<string:destino>/<string:nave_id>', methods=['GET'], endpoint='viagem_get')
 def viagem_get(destino, nave_id):
-    """Exibe resultados da viagem via GET (PRG)."""
+    """Exibe resultados da viagem via GET (PRG), lidos da execução corrente."""
     try:
-        diario = session.get('viagem_diario')
-        destino_sess = session.get('viagem_destino') or destino
-        nave = session.get('viagem_nave')
-        modulos = session.get('viagem_modulos')
-        chegada_ok = session.get('viagem_chegada_ok')
-        pontuacao = session.get('viagem_pontuacao')
-        if not diario or not modulos:
+        run = _run_atual()
+        if not run or not run['diario'] or not run['modulos']:
             return redirect(url_for('missao.retry_modulos'))
-        return render_template('viagem.html', diario=diario, destino=destino_sess, nave=nave, modulos=modulos, chegada_ok=chegada_ok, pontuacao=pontuacao)
+        return render_template(
+            'viagem.html',
+            diario=run['diario'],
+            destino=run['destino'] or destino,
+            nave=obter_catalogo().naves.get(run['nave_id']),
+            modulos=_modulos_da_run(run),
+            chegada_ok=run['chegada_ok'],
+            pontuacao=run['pontuacao'],
+            recursos=run.get('recursos'),
+        )
     except Exception:
         logging.exception('Falha ao exibir viagem (GET)')
         return "Erro ao exibir a viagem", 500
+
+
+@missao_bp.route('/missoes', endpoint='historico_missoes')
+def historico_missoes():
+    """Histórico de execuções do aluno logado (mais recentes primeiro)."""
+    try:
+        runs = db_manager.listar_missao_runs(session.get('aluno_id'), limite=50)
+        return render_template('missoes_historico.html', runs=runs, run_atual=session.get('missao_run_id'))
+    except Exception:
+        logging.exception('Falha ao listar histórico de missões')
+        return "Erro ao listar missões", 500
+
+
+@missao_bp.route('/missoes/<int:run_id>', endpoint='reabrir_missao')
+def reabrir_missao(run_id):
+    """Reabre uma execução anterior do próprio aluno como execução corrente."""
+    try:
+        run = db_manager.buscar_missao_run(run_id)
+        if not run or run.get('aluno_id') != session.get('aluno_id'):
+            return redirect(url_for('missao.historico_missoes'))
+        session['missao_run_id'] = run['id']
+        session['missao_destino'] = run['destino']
+        session['missao_nave'] = run['nave_id']
+        session['missao_etapa'] = 'viagem'
+        return redirect(url_for('missao.viagem_get', destino=run['destino'], nave_id=run['nave_id']))
+    except Exception:
+        logging.exception('Falha ao reabrir missão %s', run_id)
+        return redirect(url_for('missao.historico_missoes'))
@@ -13,15 +13,17 @@ Notas de usabilidade (para docentes):
 """
 
 import json
-import sqlite3
 import logging
-from datetime import datetime
 
-from flask import Blueprint, render_template, request, redirect, url_for, Response, session
+from flask import Blueprint, render_template, request, redirect, url_for, Response, session, jsonify
 import os
 from werkzeug.security import check_password_hash, generate_password_hash
 
 from services.db import db_manager
+from services.painel import painel_professor
+from services import monte_carlo
+from services.carga_otima import referencia_cargas
+from services.cache_http import etag_para, resposta_304, com_etag
 
 
 professor_bp = Blueprint('professor', __name__)
@@ -59,7 +61,9 @@ def _professor_no_cache(response):
     """Força revalidação e evita bfcache nas páginas HTML do professor.
 
     Garante que, após logout, o botão Voltar não exiba versões em cache
-    de páginas protegidas como dashboard e detalhes de sala.
+    de páginas protegidas como dashboard e detalhes de sala. Essas páginas
+    não usam ETag: elas consultam `/professor/api/versao-dados` (JSON, com
+    304) e só recarregam quando a versão muda.
     """
     try:
         if response.mimetype == 'text/html':
@@ -78,32 +82,7 @@ def login():
     Define `session['user_role']='professor'` e `session['professor_id']` ao autenticar.
     """
     erro = None
-    # Garantir tabela e admin padrão
-    try:
-        with sqlite3.connect(db_manager.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS admins (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    username TEXT UNIQUE NOT NULL,
-                    password_hash TEXT NOT NULL,
-                    must_change INTEGER DEFAULT 1,
-                    created_at TEXT
-                )
-            ''')
-            cursor.execute('SELECT COUNT(*) FROM admins')
-            count = cursor.fetchone()[0]
-            if count == 0:
-                # Cria admin padrão com senha 'admin' e exige troca
-                default_hash = generate_password_hash('admin')
-                cursor.execute(
-                    'INSERT INTO admins (username, password_hash, must_change, created_at) VALUES (?, ?, ?, ?)',
-                    ('admin', default_hash, 1, datetime.utcnow().isoformat())
-                )
-                conn.commit()
-    except Exception:
-        logging.exception('Falha ao garantir tabela admins')
-
+    # Tabela `admins` e admin padrão vêm da migração 11 (services/db.py)
     if request.method == 'POST':
         usuario = (request.form.get('usuario') or '').strip()
         senha = request.form.get('senha') or ''
@@ -112,7 +91,7 @@ def login():
         else:
             # Autenticar via tabela admins (por enquanto, apenas usuário 'admin')
             try:
-                with sqlite3.connect(db_manager.db_path) as conn:
+                with db_manager.conexao_leitura() as conn:
                     cursor = conn.cursor()
                     cursor.execute('SELECT id, username, password_hash, must_change FROM admins WHERE username = ?', (usuario,))
                     row = cursor.fetchone()
@@ -160,11 +139,10 @@ def reset_password():
             erro = 'As senhas não coincidem.'
         else:
             try:
-                with sqlite3.connect(db_manager.db_path) as conn:
+                with db_manager.conexao_escrita() as conn:
                     cursor = conn.cursor()
                     cursor.execute('UPDATE admins SET password_hash = ?, must_change = 0 WHERE username = ?',
                                    (generate_password_hash(nova), 'admin'))
-                    conn.commit()
                 destino = request.args.get('next') or url_for('professor.professor_dashboard')
                 return redirect(destino)
             except Exception:
@@ -173,120 +151,112 @@ def reset_password():
     return render_template('professor_reset_password.html', erro=erro)
 
 
+def _must_change_admin():
+    """Flag de troca de senha obrigatória do admin (0 fora da sessão de admin)."""
+    try:
+        if session.get('user_role') == 'admin':
+            return db_manager.obter_must_change_admin()
+    except Exception:
+        logging.exception('Falha ao obter flag must_change do admin')
+    return 0
+
+
 @professor_bp.route('/dashboard', endpoint='professor_dashboard')
 def dashboard():
     """Dashboard do professor com listas de salas ativas e inativas.
 
-    Lê diretamente do SQLite e agrega contagem de alunos e desafios para
-    oferecer uma visão rápida da turma e da organização atual.
+    A visão (salas, contagens, estatísticas e ranking) vem de
+    `painel_professor`, montada em um único snapshot e reaproveitada enquanto
+    a versão de dados não mudar; a flag `must_change` do admin é lida no
+    mesmo snapshot.
     """
-    ranking = []
-    salas = []
-    salas_inativas = []
-    estatisticas_salas = []
-    must_change_admin = 0
     professor_nome = session.get('professor_nome') or 'Administrador'
 
-    # Salas ativas
     try:
-        with sqlite3.connect(db_manager.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT s.id, s.codigo_sala, s.nome_sala, s.destino, s.nave_id,
-                       s.data_criacao, s.desafios_json, s.desafio_selecionado_index,
-                       COUNT(a.id) AS aluno_count
-                FROM salas_virtuais s
-                LEFT JOIN alunos a ON a.sala_id = s.id
-                WHERE s.ativa = 1
-                GROUP BY s.id
-                ORDER BY s.data_criacao DESC
-            ''')
-            rows = cursor.fetchall()
-            cols = [d[0] for d in cursor.description]
-            for r in rows:
-                d = dict(zip(cols, r))
-                try:
-                    desafios = json.loads(d.get('desafios_json') or '[]')
-                except Exception:
-                    desafios = []
-                salas.append({
-                    'id': d.get('id'),
-                    'codigo': d.get('codigo_sala'),
-                    'nome_sala': d.get('nome_sala'),
-                    'destino': d.get('destino'),
-                    'nave_id': d.get('nave_id'),
-                    'aluno_count': d.get('aluno_count') or 0,
-                    'data_criacao': d.get('data_criacao'),
-                    'desafios': desafios,
-                    'desafio_selecionado_index': d.get('desafio_selecionado_index')
-                })
+        painel, must_change_admin = painel_professor.obter(admin=session.get('user_role') == 'admin')
     except Exception:
-        pass
+        logging.exception('Falha ao montar painel do professor')
+        painel = {'versao': None, 'ranking': [], 'salas': [], 'salas_inativas': [], 'estatisticas_salas': []}
+        must_change_admin = _must_change_admin()
 
-    # Salas inativas
-    try:
-        with sqlite3.connect(db_manager.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT s.id, s.codigo_sala, s.nome_sala, s.destino, s.nave_id,
-                       s.data_criacao, COUNT(a.id) AS aluno_count
-                FROM salas_virtuais s
-                LEFT JOIN alunos a ON a.sala_id = s.id
-                WHERE s.ativa = 0
-                GROUP BY s.id
-                ORDER BY s.data_criacao DESC
-            ''')
-            rows = cursor.fetchall()
-            cols = [d[0] for d in cursor.description]
-            for r in rows:
-                d = dict(zip(cols, r))
-                salas_inativas.append({
-                    'codigo': d.get('codigo_sala'),
-                    'nome_sala': d.get('nome_sala'),
-                    'destino': d.get('destino'),
-                    'nave_id': d.get('nave_id'),
-                    'aluno_count': d.get('aluno_count') or 0,
-                    'data_criacao': d.get('data_criacao')
-                })
-    except Exception:
-        pass
+    return render_template(
+        'professor_dashboard.html',
+        ranking=painel['ranking'],
+        salas=painel['salas'],
+        salas_inativas=painel['salas_inativas'],
+        estatisticas_salas=painel['estatisticas_salas'],
+        must_change_admin=must_change_admin,
+        professor_nome=professor_nome,
+        versao_dados=painel['versao'],
+    )
 
-    # Popular ranking com base nas salas ativas
-    try:
-        if len(salas) == 1 and salas[0].get('id'):
-            ranking = db_manager.obter_ranking_sala(salas[0]['id'], limit=50)
-        elif len(salas) > 1:
-            ranking = db_manager.obter_ranking_salas_ativas(limit=100)
-    except Exception:
-        logging.exception('Falha ao obter ranking')
 
-    # Estatísticas agregadas por sala (ativas e inativas)
+@professor_bp.route('/api/versao-dados', endpoint='professor_versao_dados')
+def versao_dados():
+    """Versão de dados (global ou da sala em `?sala=`) para polling com If-None-Match.
+
+    Enquanto nada mudar, responde 304; a página só precisa recarregar quando
+    `versao` for diferente da que foi renderizada.
+    """
+    sala_id = None
+    codigo_sala = request.args.get('sala')
+    if codigo_sala:
+        sala = db_manager.versao_dados_por_codigo(codigo_sala)
+        if not sala:
+            return jsonify({'error': 'sala não encontrada'}), 404
+        sala_id, versao = sala['id'], sala['versao']
+    else:
+        versao = db_manager.versao_dados()
+    etag = etag_para(request.endpoint, sala_id, versao)
+    nao_modificado = resposta_304(etag)
+    if nao_modificado is not None:
+        return nao_modificado
+    return com_etag(jsonify({'versao': versao}), etag)
+
+
+@professor_bp.route('/api/metricas-respostas', endpoint='professor_metricas_respostas')
+def metricas_respostas():
+    """Métricas da fila de gravação em lote (flush e backpressure) em JSON."""
+    fila = db_manager.fila_respostas
+    if fila is None:
+        return jsonify({'ativa': False})
+    return jsonify(dict(fila.metricas(), ativa=True))
+
+
+@professor_bp.route('/api/estimativa-chegada', endpoint='professor_estimativa_chegada')
+def estimativa_chegada():
+    """Chance de chegada de uma carga por Monte Carlo (`services/monte_carlo.py`).
+
+    Parâmetros: `destino`, `nave`, `modulos` (repetido ou separado por vírgula),
+    `n` (viagens simuladas, padrão 10 000) e `semente` opcional.
+    """
+    modulos = []
+    for valor in request.args.getlist('modulos'):
+        modulos.extend(m.strip() for m in valor.split(',') if m.strip())
     try:
-        estatisticas_salas = db_manager.obter_estatisticas_por_sala()
+        resultado = monte_carlo.estimar_chegada(
+            (request.args.get('destino') or '').lower(),
+            (request.args.get('nave') or '').lower(),
+            modulos,
+            n=request.args.get('n', monte_carlo.N_PADRAO),
+            semente=request.args.get('semente', monte_carlo.SEMENTE_PADRAO),
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception:
-        estatisticas_salas = []
+        logging.exception('Falha na estimativa de chegada')
+        return jsonify({'error': 'falha na estimativa'}), 500
+    return jsonify(resultado)
 
-    # Verificar necessidade de troca de senha (somente admin)
+
+@professor_bp.route('/api/cargas-referencia', endpoint='professor_cargas_referencia')
+def cargas_referencia():
+    """Carga de maior pontuação esperada por nave × destino (referência para o professor)."""
     try:
-        if session.get('user_role') == 'admin':
-            with sqlite3.connect(db_manager.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('SELECT must_change FROM admins WHERE username = ?', ('admin',))
-                row = cursor.fetchone()
-                if row:
-                    must_change_admin = row[0] or 0
+        return jsonify(referencia_cargas.obter())
     except Exception:
-        logging.exception('Falha ao obter flag must_change do admin')
-
-    return render_template(
-        'professor_dashboard.html',
-        ranking=ranking,
-        salas=salas,
-        salas_inativas=salas_inativas,
-        estatisticas_salas=estatisticas_salas,
-        must_change_admin=must_change_admin,
-        professor_nome=professor_nome,
-    )
+        logging.exception('Falha ao obter cargas de referência')
+        return jsonify({'error': 'falha ao calcular cargas de referência'}), 500
 
 
 @professor_bp.route('/criar-desafio', methods=['POST'], endpoint='professor_criar_desafio')
@@ -299,20 +269,10 @@ def criar_desafio():
 def criar_desafio_para_sala(codigo_sala):
     """Cria um desafio simples diretamente no SQLite e retorna ao dashboard.
 
-    O desafio é anexado ao JSON de desafios da sala, preservando histórico.
+    O desafio é acrescentado ao fim da lista da sala, preservando histórico.
     """
     try:
-        sala = db_manager.buscar_sala_por_codigo_any(codigo_sala)
-        if sala:
-            try:
-                desafios = json.loads(sala.get('desafios_json') or '[]')
-            except Exception:
-                desafios = []
-            desafios.append({
-                'titulo': 'Novo desafio',
-                'descricao': 'Desafio criado a partir do dashboard.'
-            })
-            db_manager.atualizar_desafios_json(codigo_sala, json.dumps(desafios, ensure_ascii=False))
+        db_manager.adicionar_desafio(codigo_sala, 'Novo desafio', 'Desafio criado a partir do dashboard.')
     except Exception:
         pass
     return redirect(url_for('professor.professor_dashboard'))
@@ -346,45 +306,49 @@ def sala_reabrir():
         return redirect(url_for('professor.professor_dashboard'))
     try:
         # Garante apenas uma sala ativa: desativa todas e ativa a escolhida
-        with sqlite3.connect(db_manager.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('UPDATE salas_virtuais SET ativa = 0')
-            cursor.execute('UPDATE salas_virtuais SET ativa = 1 WHERE UPPER(codigo_sala) = UPPER(?)', (codigo_sala,))
-            conn.commit()
+        db_manager.reabrir_sala_exclusiva(codigo_sala)
     except Exception:
         logging.exception("Falha ao reabrir sala")
     return redirect(url_for('professor.professor_dashboard'))
 
 
+def _desafio_do_form(codigo_sala):
+    """(desafio_id, versao) enviados pelo formulário.
+
+    Formulários antigos (página aberta antes da atualização) enviam apenas
+    `desafio_index`; nesse caso o id é resolvido pela posição, sem checar versão.
+    """
+    try:
+        if request.form.get('desafio_id'):
+            versao = request.form.get('versao')
+            return int(request.form['desafio_id']), (int(versao) if versao else None)
+        idx_raw = request.form.get('desafio_index')
+        if idx_raw is not None:
+            return db_manager.id_desafio_por_posicao(codigo_sala, int(idx_raw)), None
+    except ValueError:
+        pass
+    return None, None
+
+
 @professor_bp.route('/desafio/editar', methods=['POST'], endpoint='professor_editar_desafio')
 def editar_desafio():
-    """Edita título/descrição de um desafio pelo índice.
+    """Edita título/descrição de um desafio (id + versão do formulário).
 
-    Usa índice baseado no array de desafios da sala; valida faixas.
+    Se outra pessoa alterou o desafio depois que a página foi aberta, a
+    edição é descartada em vez de sobrescrever a alteração alheia.
     """
     codigo_sala = request.form.get('codigo_sala')
-    idx_raw = request.form.get('desafio_index')
     titulo = request.form.get('titulo', '').strip()
     descricao = request.form.get('descricao', '').strip()
-    if not codigo_sala or idx_raw is None:
+    if not codigo_sala:
         return redirect(url_for('professor.professor_dashboard'))
-    try:
-        idx = int(idx_raw)
-    except ValueError:
+    desafio_id, versao = _desafio_do_form(codigo_sala)
+    if desafio_id is None:
         return redirect(url_for('professor.professor_dashboard'))
 
     try:
-        sala = db_manager.buscar_sala_por_codigo_any(codigo_sala)
-        if not sala:
-            return redirect(url_for('professor.professor_dashboard'))
-        try:
-            desafios = json.loads(sala.get('desafios_json') or '[]')
-        except Exception:
-            desafios = []
-        if 0 <= idx < len(desafios):
-            desafios[idx]['titulo'] = titulo or f'Desafio {idx+1}'
-            desafios[idx]['descricao'] = descricao or ''
-            db_manager.atualizar_desafios_json(codigo_sala, json.dumps(desafios, ensure_ascii=False))
+        if not db_manager.atualizar_desafio(codigo_sala, desafio_id, titulo or None, descricao, versao):
+            logging.warning('Edição do desafio %s ignorada: inexistente ou alterado por outra pessoa', desafio_id)
     except Exception:
         pass
     return redirect(url_for('professor.professor_dashboard'))
@@ -392,27 +356,17 @@ def editar_desafio():
 
 @professor_bp.route('/desafio/excluir', methods=['POST'], endpoint='professor_excluir_desafio')
 def excluir_desafio():
-    """Exclui um desafio de uma sala a partir do índice enviado."""
+    """Exclui um desafio de uma sala (id + versão do formulário)."""
     codigo_sala = request.form.get('codigo_sala')
-    idx_raw = request.form.get('desafio_index')
-    if not codigo_sala or idx_raw is None:
+    if not codigo_sala:
         return redirect(url_for('professor.professor_dashboard'))
-
-    try:
-        idx = int(idx_raw)
-    except ValueError:
+    desafio_id, versao = _desafio_do_form(codigo_sala)
+    if desafio_id is None:
         return redirect(url_for('professor.professor_dashboard'))
 
     try:
-        sala = db_manager.buscar_sala_por_codigo_any(codigo_sala)
-        if sala:
-            try:
-                desafios = json.loads(sala.get('desafios_json') or '[]')
-            except Exception:
-                desafios = []
-            if 0 <= idx < len(desafios):
-                desafios.pop(idx)
-                db_manager.atualizar_desafios_json(codigo_sala, json.dumps(desafios, ensure_ascii=False))
+        if not db_manager.excluir_desafio(codigo_sala, desafio_id, versao):
+            logging.warning('Exclusão do desafio %s ignorada: inexistente ou alterado por outra pessoa', desafio_id)
     except Exception:
         pass
 
@@ -455,10 +409,9 @@ def criar_sala():
     try:
         # Desativar qualquer sala ativa existente para manter apenas uma ativa
         try:
-            with sqlite3.connect(db_manager.db_path) as conn:
+            with db_manager.conexao_escrita() as conn:
                 cursor = conn.cursor()
                 cursor.execute('UPDATE salas_virtuais SET ativa = 0 WHERE ativa = 1')
-                conn.commit()
         except Exception:
             logging.exception("Falha ao desativar salas ativas")
 
@@ -477,16 +430,17 @@ def criar_sala():
         )
 
         # Buscar sala para obter id
-        with sqlite3.connect(db_manager.db_path) as conn:
+        with db_manager.conexao_leitura() as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT id FROM salas_virtuais WHERE codigo_sala = ?', (codigo_sala,))
             sala_row = cursor.fetchone()
             sala_id = sala_row[0] if sala_row else None
 
-        # Inserir alunos
+        # Inserir alunos (uma única transação para a turma inteira)
         if sala_id:
-            for nome in nomes:
-                db_manager.adicionar_aluno(sala_id, nome)
+            with db_manager.conexao_escrita():
+                for nome in nomes:
+                    db_manager.adicionar_aluno(sala_id, nome)
 
         # Removida a sincronização com JSONStore: agora usamos apenas SQLite
         # Permanecer no dashboard após criação, sem redirecionar para detalhes
@@ -503,10 +457,7 @@ def excluir_aluno_ranking():
     if not aluno_id:
         return redirect(url_for('professor.professor_dashboard'))
     try:
-        with sqlite3.connect(db_manager.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('UPDATE alunos SET excluir_ranking = 1 WHERE id = ?', (aluno_id,))
-            conn.commit()
+        db_manager.excluir_aluno_do_ranking(aluno_id)
     except Exception:
         pass
     return redirect(url_for('professor.professor_dashboard'))
@@ -520,10 +471,12 @@ def sala_detalhes(codigo_sala):
     e exibe os desafios com estatísticas resumidas.
     """
     print(f'Função sala_detalhes chamada para código: {codigo_sala}')  # Print de depuração
-    must_change_admin = 0
+    must_change_admin = _must_change_admin()
     professor_nome = session.get('professor_nome') or 'Administrador'
+    # Versão da sala lida antes dos dados (a página recarrega quando ela muda)
+    versao = db_manager.versao_dados_por_codigo(codigo_sala)
     # Tentar buscar pelo banco (inclui salas inativas)
-    sala_db = db_manager.buscar_sala_por_codigo_any(codigo_sala)
+    sala_db = db_manager.buscar_sala_por_codigo_any(codigo_sala) if versao else None
     if sala_db:
         try:
             alunos = db_manager.buscar_alunos_por_sala(sala_db['id'])
@@ -558,9 +511,9 @@ def sala_detalhes(codigo_sala):
             except Exception:
                 aluno['acesso_url'] = base
 
-        # Desafios do banco (JSON campo desafios_json)
+        # Desafios da sala (tabela `desafios`, em ordem de posição)
         try:
-            desafios = json.loads(sala_db.get('desafios_json') or '[]')
+            desafios = db_manager.listar_desafios(sala_db['id'])
         except Exception:
             desafios = []
 
@@ -595,18 +548,6 @@ def sala_detalhes(codigo_sala):
                 'media_pontos_por_tentativa': 0.0
             }
 
-        # Verificar necessidade de troca de senha (somente admin)
-        try:
-            if session.get('user_role') == 'admin':
-                with sqlite3.connect(db_manager.db_path) as conn:
-                    cursor = conn.cursor()
-                    cursor.execute('SELECT must_change FROM admins WHERE username = ?', ('admin',))
-                    row = cursor.fetchone()
-                    if row:
-                        must_change_admin = row[0] or 0
-        except Exception:
-            logging.exception('Falha ao obter flag must_change do admin (detalhes)')
-
         sala_view = {
             'codigo_sala': sala_db.get('codigo_sala'),
             'nome_sala': sala_db.get('nome_sala'),
@@ -626,6 +567,7 @@ def sala_detalhes(codigo_sala):
             desempenho_desafios=desempenho_desafios,
             must_change_admin=must_change_admin,
             professor_nome=professor_nome,
+            versao_dados=versao['versao'],
         )
 
     # Apenas SQLite
@@ -651,14 +593,7 @@ def registrar_desafio():
         titulo = f"Missão {destino.capitalize()} — {nave_id}"
         descricao = "Desafio criado pelo professor com seleção de destino e foguete."
         try:
-            sala = db_manager.buscar_sala_por_codigo_any(codigo_sala)
-            if sala:
-                try:
-                    desafios = json.loads(sala.get('desafios_json') or '[]')
-                except Exception:
-                    desafios = []
-                desafios.append({'titulo': titulo, 'descricao': descricao})
-                db_manager.atualizar_desafios_json(codigo_sala, json.dumps(desafios, ensure_ascii=False))
+            db_manager.adicionar_desafio(codigo_sala, titulo, descricao)
         except Exception:
             pass
     except Exception:
@@ -696,7 +631,7 @@ def sala_exportar(codigo_sala):
         if not sala:
             return redirect(url_for('professor.professor_dashboard'))
         # Coletar alunos e respostas
-        with sqlite3.connect(db_manager.db_path) as conn:
+        with db_manager.conexao_leitura() as conn:
             cur = conn.cursor()
             cur.execute('SELECT id, nome, email, data_ingresso FROM alunos WHERE sala_id = ? ORDER BY nome ASC', (sala['id'],))
             alunos = cur.fetchall()
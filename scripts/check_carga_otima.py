@@ -0,0 +1,111 @@
+"""Confere `carga_otima.melhor_carga` contra a busca exaustiva.
+
+Avalia todas as 2^n cargas possíveis (n = módulos do catálogo) de cada
+nave × destino com as mesmas regras, distribuições de avarias e de reservas
+esgotadas, sem a mochila nem o agrupamento por chave de recursos do solver.
+Falha (exit 1) se alguma carga tiver pontuação esperada maior que a do
+solver, ou igual com chance de chegada maior, ou se a carga escolhida não
+valer o que o solver informa.
+
+A varredura completa leva menos de um minuto; `--amostra N` avalia só N
+cargas sorteadas por destino (semente fixa), para uma conferência rápida.
+
+Uso: python scripts/check_carga_otima.py [--amostra N]
+"""
+import os
+import random
+import sys
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from services.carga_otima import _esperado, melhor_carga
+from services.data import obter_catalogo
+from services.monte_carlo import categorias_turno, distribuicao_esgotamento
+from services.regras import obter_regras
+from services.simulacao import DESTINOS
+
+
+TOLERANCIA = 1e-9
+
+
+def _massas(regras):
+    """Massa de cada máscara em duas tabelas de meia largura (massa = baixa + alta)."""
+    n = len(regras.ids)
+    meio = n // 2
+    baixa = [regras.massa(m) for m in range(1 << meio)]
+    alta = [regras.massa(m << meio) for m in range(1 << (n - meio))]
+    return meio, baixa, alta
+
+
+def _mascaras(n, amostra):
+    if amostra is None:
+        return range(1, 1 << n)
+    rng = random.Random(2024)
+    return sorted({rng.randrange(1, 1 << n) for _ in range(amostra)})
+
+
+def main():
+    amostra = None
+    if '--amostra' in sys.argv:
+        amostra = int(sys.argv[sys.argv.index('--amostra') + 1])
+    regras = obter_regras()
+    catalogo = obter_catalogo()
+    naves = catalogo.naves
+    n = len(regras.ids)
+    meio, baixa, alta = _massas(regras)
+    mascara_baixa = (1 << meio) - 1
+    falhas = []
+    inicio = time.perf_counter()
+
+    for destino in DESTINOS:
+        solver = {}
+        for nave_id, nave in naves.items():
+            carga = melhor_carga(destino, nave)
+            capacidade_kg = carga['capacidade_kg']
+            mascara = regras.mascara(carga['modulos'])
+            esgotamento = distribuicao_esgotamento(
+                destino, *categorias_turno(destino, regras.plano_recursos(destino, mascara)))
+            avaliada = regras.avaliar(destino, mascara, carga['massa_total'], capacidade_kg)
+            esperado, chance = _esperado(destino, avaliada, len(carga['modulos']), esgotamento)
+            if (round(esperado, 2), round(chance, 4)) != (carga['pontuacao_esperada'], carga['probabilidade_chegada']):
+                falhas.append(f'{nave_id}/{destino}: carga escolhida vale {esperado:.4f}/{chance:.4f}, '
+                              f"solver informa {carga['pontuacao_esperada']}/{carga['probabilidade_chegada']}")
+            solver[nave_id] = (esperado, chance, capacidade_kg)
+
+        melhores = {nave_id: None for nave_id in naves}
+        avaliadas = 0
+        for mascara in _mascaras(n, amostra):
+            massa = baixa[mascara & mascara_baixa] + alta[mascara >> meio]
+            n_modulos = bin(mascara).count('1')
+            esgotamento = distribuicao_esgotamento(
+                destino, *categorias_turno(destino, regras.plano_recursos(destino, mascara)))
+            for nave_id, (_, _, capacidade_kg) in solver.items():
+                avaliada = regras.avaliar(destino, mascara, massa, capacidade_kg)
+                esperado, chance = _esperado(destino, avaliada, n_modulos, esgotamento)
+                melhor = melhores[nave_id]
+                if melhor is None or (esperado, chance) > melhor[:2]:
+                    melhores[nave_id] = (esperado, chance, mascara)
+            avaliadas += 1
+
+        for nave_id, (esperado, chance, mascara) in melhores.items():
+            esperado_solver, chance_solver, _ = solver[nave_id]
+            melhor_que_solver = esperado > esperado_solver + TOLERANCIA or (
+                abs(esperado - esperado_solver) <= TOLERANCIA and chance > chance_solver + TOLERANCIA)
+            if melhor_que_solver:
+                falhas.append(f'{nave_id}/{destino}: {regras.ids_de(mascara)} vale '
+                              f'{esperado:.4f}/{chance:.4f} > solver {esperado_solver:.4f}/{chance_solver:.4f}')
+            else:
+                print(f'[OK] {nave_id}/{destino}: solver {esperado_solver:.2f} pontos, '
+                      f'chegada {chance_solver:.4f} ({avaliadas} cargas)')
+
+    print(f'busca {"por amostra" if amostra else "exaustiva"}: {time.perf_counter() - inicio:.1f} s')
+    if falhas:
+        print('Falhas:', *falhas, sep='\n  ')
+        sys.exit(1)
+    print('Nenhuma carga supera a do solver.')
+
+
+if __name__ == '__main__':
+    main()
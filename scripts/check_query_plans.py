@@ -0,0 +1,65 @@
+"""Verifica via EXPLAIN QUERY PLAN que as consultas quentes usam índices.
+
+Cria um banco temporário com as migrações atuais e falha (exit 1) se alguma
+consulta de sala por código, ranking, login ou estatísticas cair em varredura
+completa de tabela.
+
+Uso: python scripts/check_query_plans.py
+"""
+import os
+import sys
+import tempfile
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from services import db as db_module
+
+
+# (nome, sql, parâmetros, aliases cuja varredura completa é esperada)
+CONSULTAS = [
+    ('sala por código', db_module.SQL_SALA_POR_CODIGO, ('ABCD1234',), set()),
+    ('login do aluno', db_module.SQL_ALUNO_POR_NOME, (1, 'Fulano'), set()),
+    ('ranking da sala', db_module.SQL_RANKING_SALA, (1, 50), set()),
+    ('salas ativas', db_module.SQL_IDS_SALAS_ATIVAS, (), set()),
+    ('listagem de salas do painel', db_module.SQL_LISTAR_SALAS, (1,), set()),
+    ('desafios da sala', db_module.SQL_DESAFIOS_SALA, (1,), set()),
+    ('desafios das salas ativas', db_module.SQL_DESAFIOS_SALAS_ATIVAS, (), set()),
+    ('inserir desafio (próxima posição)', db_module.SQL_INSERIR_DESAFIO, ('t', 'd', None, 1), set()),
+    ('histórico de missões do aluno', db_module.SQL_MISSAO_RUNS_ALUNO, (1, 20), set()),
+    ('versao de dados', db_module.SQL_VERSAO_DADOS, (0,), set()),
+    ('versao da sala por código', db_module.SQL_VERSAO_SALA_POR_CODIGO, ('ABCD1234',), set()),
+    # Lista todas as salas por definição; apenas as respostas precisam de índice
+    ('estatisticas por sala', db_module.SQL_ESTATISTICAS_POR_SALA, (), {'s'}),
+    ('estatisticas por desafio', db_module.SQL_ESTATISTICAS_POR_DESAFIO, (1,), set()),
+]
+
+
+def varreduras_completas(conn, sql, params):
+    """Retorna os detalhes do plano que indicam SCAN sem índice."""
+    plano = conn.execute('EXPLAIN QUERY PLAN ' + sql, params).fetchall()
+    return [row[3] for row in plano if row[3].startswith('SCAN ') and 'USING' not in row[3]]
+
+
+def main():
+    falhas = []
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = db_module.DatabaseManager(os.path.join(tmp, 'plano.db'))
+        try:
+            with manager.conexao_leitura() as conn:
+                for nome, sql, params, permitidos in CONSULTAS:
+                    scans = [d for d in varreduras_completas(conn, sql, params) if d.split()[1] not in permitidos]
+                    status = 'OK' if not scans else 'FALHA'
+                    print(f'[{status}] {nome}' + (f' -> {scans}' if scans else ''))
+                    if scans:
+                        falhas.append(nome)
+        finally:
+            manager.fechar_conexoes()
+    if falhas:
+        print('Consultas com varredura completa:', ', '.join(falhas))
+        sys.exit(1)
+    print('Todas as consultas usam índices.')
+
+
+if __name__ == '__main__':
+    main()
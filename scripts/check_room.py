@@ -7,7 +7,8 @@ def main():
         print("Usage: python scripts/check_room.py <codigo_sala>")
         sys.exit(1)
 
-    codigo = sys.argv[1]
+    # Códigos são gravados em maiúsculas (ver normalizar_codigo_sala em services/db.py)
+    codigo = sys.argv[1].strip().upper()
     # Resolve caminho do banco relativo ao projeto
     project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
     db_path = os.path.join(project_root, 'salas_virtuais.db')
@@ -20,7 +21,7 @@ def main():
 
     # Consulta específica da sala
     cur.execute(
-        "SELECT id, codigo_sala, nome_sala, ativa, data_criacao FROM salas_virtuais WHERE UPPER(codigo_sala)=UPPER(?)",
+        "SELECT id, codigo_sala, nome_sala, ativa, data_criacao FROM salas_virtuais WHERE codigo_sala = ?",
         (codigo,)
     )
     row = cur.fetchone()
@@ -30,7 +31,7 @@ def main():
     cur.execute(
         "SELECT s.id, s.codigo_sala, s.professor_id, p.id AS prof_id, p.nome AS prof_nome "
         "FROM salas_virtuais s LEFT JOIN professores p ON s.professor_id = p.id "
-        "WHERE UPPER(s.codigo_sala) = UPPER(?)",
+        "WHERE s.codigo_sala = ?",
         (codigo,)
     )
     join_row = cur.fetchone()
@@ -0,0 +1,103 @@
+"""Testes golden do motor de simulação (`services/simulacao.py`).
+
+Para cada caso (destino, módulos, semente) compara o SHA-256 do diário e
+das reservas serializados com o valor gravado abaixo: qualquer mudança de
+textos, tabelas, regras de recursos ou consumo do RNG altera o resultado e
+falha o script (exit 1). Confere as reservas (somas acumuladas) contra um
+laço turno a turno e mede o tempo de uma viagem de 250 turnos (exoplaneta).
+
+Após uma mudança intencional, rode com `--atualizar` e copie os novos hashes.
+
+Uso: python scripts/check_simulacao.py [--atualizar]
+"""
+import hashlib
+import json
+import os
+import sys
+import timeit
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from services import simulacao
+from services.regras import obter_regras
+
+
+# (destino, módulos, semente, sha256 do diário + avarias + reservas)
+CASOS = [
+    ('lua', ['suporte_vida', 'habitacional'], 1, '4604b6f7f1c76f7323fee0e7b838c6dd42d44880414790406cd330f18e3921d8'),
+    ('marte', ['suporte_vida', 'habitacional', 'medico', 'impressao3d'], 42, 'bf9728be43619eadbb047581e85bb5e6a13eecee22d27eda94c1cd145c44e263'),
+    ('exoplaneta', ['suporte_vida', 'habitacional', 'blindagem', 'controle', 'hidroponia'], 2024, 'd2a011a6953e8f0b85ff3286067a163eebcda6039a4f03348ab84b860cf92f04'),
+    ('exoplaneta', [], 7, '585bc33546e555e790dce4831e3967d42641013ab8b74e67a6ab0a2d0b52bfe6'),
+]
+
+
+def assinatura(destino, modulos, semente):
+    eventos = simulacao.simular(destino, modulos, semente)
+    diario = simulacao.montar_diario(eventos, modulos)
+    recursos = simulacao.simular_recursos(destino, modulos, eventos)
+    bruto = json.dumps([diario, simulacao.modulos_avariados(eventos), recursos], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(bruto.encode('utf-8')).hexdigest()
+
+
+def esgotamento_turno_a_turno(destino, modulos, eventos):
+    """Referência ingênua: desconta o consumo de cada turno até a reserva acabar."""
+    regras = obter_regras()
+    esgotados = {}
+    for recurso, (consumo, reciclagem, extras, margem) in regras.plano_recursos(destino, regras.mascara(modulos)).items():
+        reserva = consumo * len(eventos) * (1 + margem)
+        for turno, evento_id, _ in eventos:
+            extra = extras[evento_id] if evento_id >= 0 else 0.0
+            reserva -= consumo * (1 - reciclagem) * (1 + extra)
+            if reserva < -1e-6 * consumo:
+                esgotados[recurso] = turno
+                break
+    return esgotados
+
+
+def main():
+    atualizar = '--atualizar' in sys.argv
+    falhas = []
+    for destino, modulos, semente, esperado in CASOS:
+        obtido = assinatura(destino, modulos, semente)
+        if assinatura(destino, modulos, semente) != obtido:
+            falhas.append(f'{destino}/{semente}: mesma semente gerou diários diferentes')
+        if atualizar:
+            print(f"    ({destino!r}, {modulos!r}, {semente}, '{obtido}'),")
+        elif obtido != esperado:
+            falhas.append(f'{destino}/{semente}: {obtido} != {esperado}')
+        else:
+            print(f'[OK] {destino} semente={semente}')
+
+    modulos_sem_controle = ['suporte_vida', 'habitacional', 'blindagem', 'hidroponia']
+    divergencias = 0
+    for semente in range(500):
+        for destino in ('marte', 'exoplaneta'):
+            eventos = simulacao.simular(destino, modulos_sem_controle, semente)
+            recursos = simulacao.simular_recursos(destino, modulos_sem_controle, eventos)
+            if simulacao.recursos_esgotados(recursos) != esgotamento_turno_a_turno(destino, modulos_sem_controle, eventos):
+                divergencias += 1
+    if divergencias:
+        falhas.append(f'reservas divergem do laço turno a turno em {divergencias} viagens')
+    else:
+        print('[OK] reservas iguais ao laço turno a turno (1000 viagens)')
+
+    modulos = ['suporte_vida', 'habitacional', 'blindagem', 'controle', 'hidroponia']
+    n = 2000
+    seg = timeit.timeit(lambda: simulacao.simular('exoplaneta', modulos, 99), number=n)
+    print(f'simular (250 turnos): {seg / n * 1e6:.1f} µs por execução')
+    seg = timeit.timeit(lambda: simulacao.montar_diario(simulacao.simular('exoplaneta', modulos, 99), modulos), number=n)
+    print(f'simular + montar_diario: {seg / n * 1e6:.1f} µs por execução')
+    eventos = simulacao.simular('exoplaneta', modulos, 99)
+    seg = timeit.timeit(lambda: simulacao.simular_recursos('exoplaneta', modulos, eventos), number=n)
+    print(f'simular_recursos (250 turnos): {seg / n * 1e6:.1f} µs por execução')
+
+    if falhas:
+        print('Falhas:', *falhas, sep='\n  ')
+        sys.exit(1)
+    if not atualizar:
+        print('Diários idênticos aos valores golden.')
+
+
+if __name__ == '__main__':
+    main()
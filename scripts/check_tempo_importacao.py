@@ -0,0 +1,67 @@
+"""Verifica o orçamento de tempo para importar `app` (subida de um worker).
+
+Mede, em processos novos, quanto leva `import app` depois do Flask já
+importado (o custo que é do projeto) e confere que a importação não abriu o
+banco nem calculou as cargas de referência. Falha (exit 1) se o melhor tempo
+passar do orçamento.
+
+Uso: python scripts/check_tempo_importacao.py [orcamento_ms]
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+ORCAMENTO_MS = 150
+REPETICOES = 5
+
+# Roda em um processo limpo; o banco aponta para um arquivo que não deve ser criado
+MEDICAO = '''
+import json, os, sys, time
+sys.path.insert(0, {raiz!r})
+import flask
+inicio = time.perf_counter()
+import app
+decorrido = (time.perf_counter() - inicio) * 1000
+from services.db import db_manager
+print(json.dumps({{
+    'ms': decorrido,
+    'banco_criado': os.path.exists(db_manager.db_path),
+    'conexoes': len(db_manager._leitores) + (db_manager._escritor is not None),
+}}))
+'''
+
+
+def medir(banco):
+    env = dict(os.environ, BANCO_ARQUIVO=banco, REFERENCIAS_NA_INICIALIZACAO='false')
+    saida = subprocess.run(
+        [sys.executable, '-c', MEDICAO.format(raiz=PROJECT_ROOT)],
+        capture_output=True, text=True, env=env, cwd=PROJECT_ROOT, check=True,
+    )
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+
+def main():
+    orcamento = float(sys.argv[1]) if len(sys.argv) > 1 else ORCAMENTO_MS
+    falhas = []
+    with tempfile.TemporaryDirectory() as tmp:
+        banco = os.path.join(tmp, 'nao_criar.db')
+        medidas = [medir(banco) for _ in range(REPETICOES)]
+    melhor = min(m['ms'] for m in medidas)
+    print(f'import app: melhor {melhor:.1f} ms em {REPETICOES} processos (orçamento {orcamento:.0f} ms)')
+    if melhor > orcamento:
+        falhas.append('tempo de importação acima do orçamento')
+    if any(m['banco_criado'] or m['conexoes'] for m in medidas):
+        falhas.append('a importação abriu o banco')
+    for falha in falhas:
+        print('[FALHA]', falha)
+    if falhas:
+        sys.exit(1)
+    print('[OK] importação sem abrir o banco e dentro do orçamento')
+
+
+if __name__ == '__main__':
+    main()
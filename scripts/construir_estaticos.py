@@ -0,0 +1,30 @@
+"""Gera os estáticos versionados em `static/dist/` (ver `services/estaticos.py`).
+
+Rode a cada deploy ou depois de editar CSS, JS, fontes ou imagens; o app lê o
+manifesto ao ser criado. Instale o pacote opcional `brotli` para gerar também
+as variantes `.br`.
+
+Uso: python scripts/construir_estaticos.py
+"""
+import os
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from services import estaticos
+
+
+def main():
+    pasta_static = os.path.join(PROJECT_ROOT, 'static')
+    arquivos = estaticos.construir(pasta_static)['arquivos']
+    total = sum(e['bytes'] for e in arquivos.values())
+    comprimidos = sum(1 for e in arquivos.values() if e['variantes'])
+    print(f'{len(arquivos)} arquivos ({total / 1024:.0f} KiB), {comprimidos} com variantes comprimidas')
+    if estaticos.brotli is None:
+        print('Pacote brotli não instalado: apenas variantes gzip.')
+    print('Manifesto:', os.path.join(pasta_static, estaticos.PASTA_DIST, estaticos.MANIFESTO))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""Gera as variantes responsivas das imagens em `static/otimizadas/` (ver `services/imagens.py`).
+
+Grava também o sprite de ícones do editor de Habitat (`services/icones.py`),
+com os PNGs embutidos recodificados em WebP.
+
+Rode depois de trocar imagens em `static/imagens/` e antes de
+`scripts/construir_estaticos.py` (que dá hash às variantes). Requer o pacote
+opcional Pillow para redimensionar e gerar WebP; sem ele só minifica os SVGs.
+
+Uso: python scripts/otimizar_imagens.py
+"""
+import os
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from services import icones, imagens
+
+
+def tamanho_pasta(pasta):
+    return sum(os.path.getsize(os.path.join(pasta, n)) for n in os.listdir(pasta))
+
+
+def main():
+    pasta_static = os.path.join(PROJECT_ROOT, 'static')
+    if imagens.pillow() is None:
+        print('Pillow não instalado: apenas minificação dos SVGs.')
+    manifesto = imagens.otimizar(pasta_static)
+    variantes = sum(len(e.get('webp', ())) + len(e.get('fallback', ())) for e in manifesto.values())
+    origem = tamanho_pasta(os.path.join(pasta_static, imagens.PASTA_ORIGEM))
+    print(f'{len(manifesto)} imagens, {variantes} variantes raster')
+    print(f'Originais: {origem / 1024:.0f} KiB')
+    for logico, entrada in sorted(manifesto.items()):
+        if 'svg' in entrada:
+            antes = os.path.getsize(os.path.join(pasta_static, logico))
+            depois = os.path.getsize(os.path.join(pasta_static, entrada['svg']))
+            print(f'  {logico}: {antes / 1024:.0f} -> {depois / 1024:.0f} KiB')
+        else:
+            w, caminho = entrada['webp'][-1]
+            print(f"  {logico}: {entrada['largura']}px, maior WebP {w}px "
+                  f"{os.path.getsize(os.path.join(pasta_static, caminho)) / 1024:.0f} KiB")
+    sprite = icones.montar_sprite(os.path.join(PROJECT_ROOT, 'templates', 'icons'))
+    with open(os.path.join(pasta_static, imagens.PASTA_SAIDA, icones.ARQUIVO_SPRITE), 'w', encoding='utf-8') as f:
+        f.write(sprite)
+    print(f'Sprite de ícones: {len(icones.ICONES_HABITAT)} ícones, {len(sprite.encode()) / 1024:.0f} KiB')
+    print('Manifesto:', os.path.join(pasta_static, imagens.PASTA_SAIDA, imagens.MANIFESTO))
+
+
+if __name__ == '__main__':
+    main()
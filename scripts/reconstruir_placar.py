@@ -0,0 +1,32 @@
+"""Recalcula a tabela `placar_alunos` a partir das respostas brutas.
+
+Uso: python scripts/reconstruir_placar.py [caminho_do_banco] [sala_id]
+
+Sem `sala_id`, reconstrói o placar de todas as salas.
+"""
+import os
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from services.db import DatabaseManager
+
+
+def main():
+    db_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(PROJECT_ROOT, 'salas_virtuais.db')
+    sala_id = int(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    print('DB path:', db_path)
+    manager = DatabaseManager(db_path)
+    try:
+        manager.reconstruir_placar(sala_id)
+        with manager.conexao_leitura() as conn:
+            linhas = conn.execute('SELECT COUNT(*) FROM placar_alunos').fetchone()[0]
+        print('Placar reconstruído:', 'todas as salas' if sala_id is None else f'sala {sala_id}', f'({linhas} alunos)')
+    finally:
+        manager.fechar_conexoes()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""Arquivos das rotas de alias (`/static/images/*`, `/icons/*`) servidos da memória.
+
+Na criação do app, `init_app` indexa as pastas registradas (um `stat` por
+arquivo): só os arquivos indexados são servidos, com ETag e Last-Modified já
+calculados, de modo que um 304 não toca o disco. O corpo (e a variante gzip,
+ou brotli com o pacote opcional, quando compensa) é lido no primeiro pedido e
+fica em memória dentro de um orçamento de bytes com descarte LRU; arquivos
+maiores que o limite por arquivo vão direto do disco pelo `wsgi.file_wrapper`
+do servidor.
+
+Como nos estáticos versionados (`services/estaticos.py`), arquivos trocados
+depois da subida só são vistos no próximo reinício.
+"""
+
+import gzip
+import logging
+import mimetypes
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from flask import abort, request
+from werkzeug.http import is_resource_modified
+from werkzeug.wrappers import Response
+from werkzeug.wsgi import wrap_file
+
+from services.estaticos import EXTENSOES_COMPRIMIVEIS, GANHO_MINIMO, brotli
+
+
+ORCAMENTO_PADRAO = 16 * 1024 * 1024
+LIMITE_ARQUIVO_PADRAO = 1024 * 1024
+# Mesma política do send_from_directory que estas rotas usavam: revalidar sempre
+CACHE_CONTROL = 'no-cache'
+
+
+class _Arquivo:
+    __slots__ = ('caminho', 'tamanho', 'etag', 'modificado', 'mimetype', 'comprimivel')
+
+    def __init__(self, caminho, estado):
+        self.caminho = caminho
+        self.tamanho = estado.st_size
+        self.etag = f'{estado.st_mtime_ns:x}-{estado.st_size:x}'
+        self.modificado = datetime.fromtimestamp(int(estado.st_mtime), timezone.utc)
+        self.mimetype = mimetypes.guess_type(caminho)[0] or 'application/octet-stream'
+        self.comprimivel = os.path.splitext(caminho)[1].lower() in EXTENSOES_COMPRIMIVEIS
+
+
+def _variantes(conteudo):
+    """`{codificacao: corpo}` com as versões comprimidas que valem a pena."""
+    variantes = {None: conteudo}
+    comprimido = gzip.compress(conteudo, compresslevel=9, mtime=0)
+    if len(comprimido) < len(conteudo) * GANHO_MINIMO:
+        variantes['gzip'] = comprimido
+    if brotli is not None:
+        comprimido = brotli.compress(conteudo, quality=11)
+        if len(comprimido) < len(conteudo) * GANHO_MINIMO:
+            variantes['br'] = comprimido
+    return variantes
+
+
+class CacheEstaticos:
+    """Pastas registradas por nome, com corpos em memória sob um orçamento LRU."""
+
+    def __init__(self, orcamento=ORCAMENTO_PADRAO, limite_arquivo=LIMITE_ARQUIVO_PADRAO):
+        self.orcamento = orcamento
+        self.limite_arquivo = limite_arquivo
+        self._pastas = {}  # nome -> caminho
+        self._indices = {}  # nome -> {arquivo: _Arquivo}
+        self._corpos = OrderedDict()  # caminho -> {codificacao: bytes}, do menos ao mais recente
+        self._bytes = 0
+        self._trava = threading.Lock()
+
+    def registrar(self, nome, pasta):
+        """Serve `pasta` (sem subpastas) sob `nome`; indexada no `init_app`."""
+        self._pastas[nome] = pasta
+
+    def init_app(self, app):
+        if app.config.get('ESTATICOS_MEMORIA_MB') is not None:
+            self.orcamento = int(app.config['ESTATICOS_MEMORIA_MB'] * 1024 * 1024)
+        if app.config.get('ESTATICOS_MEMORIA_ARQUIVO_KB') is not None:
+            self.limite_arquivo = int(app.config['ESTATICOS_MEMORIA_ARQUIVO_KB'] * 1024)
+        with self._trava:
+            self._corpos.clear()
+            self._bytes = 0
+            self._indices = {nome: self._indexar(pasta) for nome, pasta in self._pastas.items()}
+
+    @staticmethod
+    def _indexar(pasta):
+        indice = {}
+        try:
+            with os.scandir(pasta) as entradas:
+                for entrada in entradas:
+                    if entrada.is_file():
+                        indice[entrada.name] = _Arquivo(entrada.path, entrada.stat())
+        except OSError:
+            logging.exception('Falha ao indexar estáticos em %s', pasta)
+        return indice
+
+    def _corpo(self, arquivo):
+        """Variantes do arquivo, da memória ou lidas agora (e guardadas, se couberem)."""
+        with self._trava:
+            variantes = self._corpos.get(arquivo.caminho)
+            if variantes is not None:
+                self._corpos.move_to_end(arquivo.caminho)
+                return variantes
+        with open(arquivo.caminho, 'rb') as f:
+            conteudo = f.read()
+        variantes = _variantes(conteudo) if arquivo.comprimivel else {None: conteudo}
+        tamanho = sum(len(v) for v in variantes.values())
+        with self._trava:
+            if arquivo.caminho not in self._corpos and tamanho <= self.orcamento:
+                self._corpos[arquivo.caminho] = variantes
+                self._bytes += tamanho
+                while self._bytes > self.orcamento:
+                    _, descartado = self._corpos.popitem(last=False)
+                    self._bytes -= sum(len(v) for v in descartado.values())
+        return variantes
+
+    def servir(self, nome, arquivo_nome):
+        """Resposta para `arquivo_nome` da pasta `nome` (404 se não indexado)."""
+        arquivo = self._indices.get(nome, {}).get(arquivo_nome)
+        if arquivo is None:
+            abort(404)
+        if not is_resource_modified(request.environ, etag=arquivo.etag, last_modified=arquivo.modificado):
+            resposta = Response(status=304)
+        elif arquivo.tamanho > self.limite_arquivo:
+            resposta = Response(wrap_file(request.environ, open(arquivo.caminho, 'rb')),
+                                mimetype=arquivo.mimetype, direct_passthrough=True)
+            resposta.content_length = arquivo.tamanho
+        else:
+            variantes = self._corpo(arquivo)
+            codificacao = next((c for c in ('br', 'gzip') if c in variantes and request.accept_encodings[c]), None)
+            resposta = Response(variantes[codificacao], mimetype=arquivo.mimetype)
+            if codificacao:
+                resposta.headers['Content-Encoding'] = codificacao
+            if len(variantes) > 1:
+                resposta.vary.add('Accept-Encoding')
+        # Fraco nos comprimíveis: o mesmo ETag vale para as variantes gzip/brotli
+        resposta.set_etag(arquivo.etag, weak=arquivo.comprimivel)
+        resposta.last_modified = arquivo.modificado
+        resposta.headers['Cache-Control'] = CACHE_CONTROL
+        return resposta
+
+    def estatisticas(self):
+        with self._trava:
+            return {'arquivos_em_memoria': len(self._corpos), 'bytes': self._bytes, 'orcamento': self.orcamento}
+
+
+# Instância compartilhada (pastas registradas e ligada ao app em create_app)
+cache_estaticos = CacheEstaticos()
@@ -0,0 +1,102 @@
+"""Cache de páginas e trechos de template que dependem só do catálogo.
+
+As telas de escolha (destino, nave, módulos) são iguais para toda a turma,
+exceto por poucos valores (`codigo_sala`, destino, nave). Em vez de renderizar
+tudo a cada aluno, o HTML é guardado por chave:
+
+- página inteira: `cache_fragmentos.pagina(template, chave, **contexto)`;
+- trecho: `{% call fragmento('nome', catalogo_versao, ...) %}...{% endcall %}`.
+
+A chave deve conter tudo de que o HTML depende (em geral `Catalogo.versao`);
+o que vem da sessão fica fora do trecho, e o que vem da URL entra validado
+(ex.: `db_manager.codigo_sala_existente`), para a URL não criar chaves à vontade. Uma chave ausente é renderizada por um
+só pedido enquanto os concorrentes esperam, então uma turma de 40 alunos custa
+uma renderização e 39 acertos. O cache é do processo, limitado em itens (LRU);
+`CACHE_FRAGMENTOS=false` desliga (útil ao editar templates).
+"""
+
+import threading
+from collections import OrderedDict
+
+from flask import render_template
+from markupsafe import Markup
+
+
+MAX_ITENS_PADRAO = 256
+
+
+class CacheFragmentos:
+    """HTML renderizado por chave, com descarte LRU."""
+
+    def __init__(self, max_itens=MAX_ITENS_PADRAO):
+        self.max_itens = max_itens
+        self.ativo = True
+        self.acertos = 0
+        self.renderizacoes = 0
+        self._itens = OrderedDict()
+        self._gerando = {}  # chave -> trava da renderização em andamento
+        self._trava = threading.Lock()
+
+    def init_app(self, app):
+        self.ativo = app.config.get('CACHE_FRAGMENTOS', True)
+        self.max_itens = int(app.config.get('CACHE_FRAGMENTOS_MAX', self.max_itens))
+        self.limpar()
+        app.add_template_global(self.fragmento, 'fragmento')
+
+    def limpar(self):
+        with self._trava:
+            self._itens.clear()
+
+    def _buscar(self, chave):
+        with self._trava:
+            valor = self._itens.get(chave)
+            if valor is not None:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+            return valor
+
+    def obter_ou_gerar(self, chave, gerar):
+        """HTML de `chave`; na ausência, `gerar()` roda uma única vez por chave."""
+        if not self.ativo:
+            return gerar()
+        valor = self._buscar(chave)
+        if valor is not None:
+            return valor
+        with self._trava:
+            trava = self._gerando.setdefault(chave, threading.Lock())
+        with trava:
+            valor = self._buscar(chave)
+            if valor is not None:
+                return valor
+            try:
+                valor = gerar()
+            except BaseException:
+                with self._trava:
+                    self._gerando.pop(chave, None)
+                raise
+            # Guarda o valor antes de soltar a trava da chave, na mesma seção:
+            # quem chegar depois acha o item ou a trava, nunca nenhum dos dois
+            with self._trava:
+                self._itens[chave] = valor
+                self._gerando.pop(chave, None)
+                self.renderizacoes += 1
+                while len(self._itens) > self.max_itens:
+                    self._itens.popitem(last=False)
+        return valor
+
+    def pagina(self, template, chave, **contexto):
+        """`render_template(template, **contexto)` guardado sob `chave`."""
+        return self.obter_ou_gerar(('pagina', template) + tuple(chave),
+                                   lambda: render_template(template, **contexto))
+
+    def fragmento(self, nome, *chave, caller):
+        """Corpo de um `{% call fragmento(...) %}` guardado sob `(nome, *chave)`."""
+        return Markup(self.obter_ou_gerar(('fragmento', nome) + chave, caller))
+
+    def estatisticas(self):
+        with self._trava:
+            return {'itens': len(self._itens), 'acertos': self.acertos, 'renderizacoes': self.renderizacoes}
+
+
+# Instância compartilhada (ligada ao app em create_app)
+cache_fragmentos = CacheFragmentos()
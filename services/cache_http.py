@@ -0,0 +1,87 @@
+"""ETags fortes a partir da versão de dados e respostas 304.
+
+O ranking público (`/ranking-rodada`, `/api/ranking`) e os endpoints JSON de
+versão calculam o ETag antes de qualquer agregação: se o cliente já tem a
+versão atual, a resposta é um 304 sem corpo. Por isso usam `private,
+no-cache` (de `com_etag`). As páginas autenticadas do professor seguem com
+`no-store` (Voltar após logout) e consultam a versão para recarregar.
+
+O ETag também leva a versão da implantação e a do catálogo, iguais em todos
+os workers e entre reinícios: um 304 só deixa de valer quando os dados, o
+código/templates ou o catálogo mudam. A versão da implantação é
+`VERSAO_DEPLOY` (ex.: o commit), ou o hash do código, dos templates e dos
+manifestos de estáticos, calculado no primeiro uso.
+"""
+
+import hashlib
+import os
+import threading
+
+from flask import request, make_response
+
+from services.data import obter_catalogo
+
+
+_RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# O que muda o HTML/JSON gerado para os mesmos dados
+_PASTAS_IMPLANTACAO = ('routes', 'services', 'templates')
+_ARQUIVOS_IMPLANTACAO = ('app.py', 'static/dist/manifest.json', 'static/otimizadas/imagens.json')
+
+_versao_implantacao = None
+_trava = threading.Lock()
+
+
+def _hash_implantacao():
+    caminhos = [os.path.join(_RAIZ, arquivo) for arquivo in _ARQUIVOS_IMPLANTACAO]
+    for pasta in _PASTAS_IMPLANTACAO:
+        for raiz, pastas, arquivos in os.walk(os.path.join(_RAIZ, pasta)):
+            pastas[:] = [p for p in pastas if p != '__pycache__']
+            caminhos.extend(os.path.join(raiz, a) for a in arquivos if not a.endswith('.pyc'))
+    h = hashlib.sha1()
+    for caminho in sorted(caminhos):
+        try:
+            with open(caminho, 'rb') as f:
+                conteudo = f.read()
+        except OSError:
+            continue
+        h.update(os.path.relpath(caminho, _RAIZ).encode('utf-8'))
+        h.update(hashlib.sha1(conteudo).digest())
+    return h.hexdigest()[:16]
+
+
+def versao_implantacao():
+    """`VERSAO_DEPLOY` ou o hash do código e templates (calculado uma vez por processo)."""
+    global _versao_implantacao
+    if _versao_implantacao is None:
+        with _trava:
+            if _versao_implantacao is None:
+                _versao_implantacao = os.getenv('VERSAO_DEPLOY') or _hash_implantacao()
+    return _versao_implantacao
+
+
+def etag_para(*partes):
+    """ETag forte derivado das partes (versão de dados, rota, sessão...)."""
+    bruto = repr((versao_implantacao(), obter_catalogo().versao) + partes).encode('utf-8')
+    return hashlib.sha1(bruto).hexdigest()
+
+
+def resposta_304(etag):
+    """Devolve um 304 se o `If-None-Match` do cliente contém `etag`; senão None.
+
+    Comparação fraca (como manda o If-None-Match): a compressão em
+    `services/compressao.py` envia o ETag como `W/"..."`.
+    """
+    if request.if_none_match.contains_weak(etag):
+        resposta = make_response('', 304)
+        resposta.set_etag(etag)
+        return resposta
+    return None
+
+
+def com_etag(resposta, etag):
+    """Anexa o ETag à resposta; sem política própria, exige revalidação."""
+    resposta = make_response(resposta)
+    resposta.set_etag(etag)
+    if 'Cache-Control' not in resposta.headers:
+        resposta.headers['Cache-Control'] = 'private, no-cache'
+    return resposta
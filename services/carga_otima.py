@@ -0,0 +1,173 @@
+"""Carga de referência por nave × destino: a de maior pontuação esperada.
+
+Com as regras de `services.regras`, a pontuação de uma carga depende só
+de quais essenciais estão a bordo, da massa total (por faixas de ocupação da
+nave), de quantos módulos podem ser avariados e de quanto as reservas
+aguentam (`RegrasMissao.chave_recursos`). Para cada destino o solver:
+
+1. monta uma mochila por massa dos módulos não essenciais: para cada
+   quantidade de módulos e chave de recursos, as massas alcançáveis (e um
+   conjunto que a alcança);
+2. para cada subconjunto de essenciais, quantidade de extras e chave, avalia
+   só a carga mais leve de cada faixa de ocupação (`RegrasMissao.limiares`);
+3. calcula a pontuação esperada com as distribuições exatas de avarias
+   (`monte_carlo.distribuicao_avarias`) e de reservas esgotadas
+   (`monte_carlo.distribuicao_esgotamento`), tratadas como independentes.
+
+A tabela inteira sai em uma fração de segundo; `referencia_cargas.obter()`
+a recalcula quando a versão do catálogo muda.
+"""
+
+import logging
+import threading
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+
+from .data import obter_catalogo
+from .monte_carlo import categorias_turno, distribuicao_avarias, distribuicao_esgotamento
+from .regras import obter_regras, RegrasMissao
+from .simulacao import DESTINOS
+
+
+def _mochila(itens):
+    """Para cada quantidade de itens: `{(massa, chave): máscara}` com a primeira
+    máscara que alcança a massa com aquela chave de recursos."""
+    tabela = [{(0, 0): 0}] + [{} for _ in itens]
+    for bit, (_, massa, chave_item) in enumerate(itens):
+        for qtd in range(bit, -1, -1):
+            proxima = tabela[qtd + 1]
+            for (soma, chave), mascara in tabela[qtd].items():
+                proxima.setdefault((soma + massa, chave | chave_item), mascara | (1 << bit))
+    return tabela
+
+
+def _esperado(destino, carga, n_modulos, esgotamento):
+    """(pontuação esperada, chance de chegada) da carga avaliada."""
+    pontos, penal, chegada, tolerancia = carga[:4]
+    avarias = distribuicao_avarias(destino, n_modulos)
+    return _esperado_resumo(avarias, pontos, penal, chegada, tolerancia, carga[6], esgotamento)
+
+
+@lru_cache(maxsize=None)
+def _esperado_resumo(avarias, pontos, penal, chegada, tolerancia, penal_recurso, esgotamento):
+    # Poucas combinações distintas entre milhares de cargas candidatas
+    esperado = 0.0
+    chance = 0.0
+    for k, p in enumerate(avarias):
+        for j, pj in enumerate(esgotamento):
+            esperado += p * pj * max(pontos - k * penal - j * penal_recurso, 0)
+        if k <= tolerancia:
+            chance += p
+    return esperado, (chance * esgotamento[0] if chegada else 0.0)
+
+
+def melhor_carga(destino, nave, modulos=None):
+    """Carga de maior pontuação esperada para a nave no destino.
+
+    Empates: maior chance de chegada, menos módulos, menor massa.
+    """
+    regras = obter_regras() if modulos is None else RegrasMissao(modulos)
+    modulos = obter_catalogo().modulos if modulos is None else modulos
+    capacidade_kg = (nave.capacidade_carga or 0) * 1000 if nave else 0
+    mascara_essenciais = regras.regra(destino)['essenciais']
+    essenciais = regras.ids_de(mascara_essenciais)
+    extras = [
+        (m, dados.massa, regras.chave_recursos(regras.mascara([m])))
+        for m, dados in modulos.items() if m not in essenciais
+    ]
+    mochila = _mochila(extras)
+    # Por quantidade de extras: {chave de recursos: massas ordenadas}
+    massas_por_qtd = []
+    for tabela in mochila:
+        por_chave = {}
+        for soma, chave in tabela:
+            por_chave.setdefault(chave, []).append(soma)
+        massas_por_qtd.append({chave: sorted(massas) for chave, massas in por_chave.items()})
+    limiares = [capacidade_kg * r for r in regras.limiares(destino)] if capacidade_kg > 0 else []
+
+    esgotamentos = {}
+
+    def esgotamento(chave, mascara, mascara_extras):
+        # Mesma chave, mesma distribuição: basta uma carga que a tenha
+        if chave not in esgotamentos:
+            mascara |= regras.mascara(m for bit, (m, _, _) in enumerate(extras) if mascara_extras >> bit & 1)
+            plano = regras.plano_recursos(destino, mascara)
+            esgotamentos[chave] = distribuicao_esgotamento(destino, *categorias_turno(destino, plano))
+        return esgotamentos[chave]
+
+    melhor = None
+    for selecao in range(1 << len(essenciais)):
+        presentes = [m for i, m in enumerate(essenciais) if selecao >> i & 1]
+        mascara = regras.mascara(presentes)
+        massa_ess = regras.massa(mascara)
+        chave_ess = regras.chave_recursos(mascara)
+        for qtd, por_chave in enumerate(massas_por_qtd):
+            n_modulos = len(presentes) + qtd
+            if n_modulos == 0:
+                continue
+            for chave_extras, massas in por_chave.items():
+                # Carga mais leve de cada faixa de ocupação
+                indices = {0}
+                for limiar in limiares:
+                    indices.add(bisect_left(massas, limiar - massa_ess))
+                    indices.add(bisect_right(massas, limiar - massa_ess))
+                for i in indices:
+                    if i >= len(massas):
+                        continue
+                    massa_total = massa_ess + massas[i]
+                    mascara_extras = mochila[qtd][(massas[i], chave_extras)]
+                    carga = regras.avaliar(destino, mascara, massa_total, capacidade_kg)
+                    esperado, chance = _esperado(
+                        destino, carga, n_modulos,
+                        esgotamento(chave_ess | chave_extras, mascara, mascara_extras),
+                    )
+                    chave = (esperado, chance, -n_modulos, -massa_total)
+                    if melhor is None or chave > melhor[0]:
+                        melhor = (chave, presentes, mascara_extras, massa_total)
+
+    (esperado, chance, _, _), presentes, mascara, massa_total = melhor
+    escolhidos = presentes + [m for bit, (m, _, _) in enumerate(extras) if mascara >> bit & 1]
+    return {
+        'modulos': escolhidos,
+        'pontuacao_esperada': round(esperado, 2),
+        'probabilidade_chegada': round(chance, 4),
+        'massa_total': massa_total,
+        'capacidade_kg': capacidade_kg,
+        'ocupacao': round(massa_total / capacidade_kg, 3) if capacidade_kg else None,
+    }
+
+
+class ReferenciaCargas:
+    """Tabela nave × destino de cargas ótimas, calculada uma vez e servida aos professores."""
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self._tabela = (None, None)  # (versão do catálogo, tabela)
+
+    def recalcular(self, naves=None, modulos=None):
+        """Refaz a tabela (na inicialização ou quando o catálogo muda)."""
+        catalogo = obter_catalogo()
+        naves = catalogo.naves if naves is None else naves
+        tabela = {}
+        for nave_id, nave in naves.items():
+            tabela[nave_id] = {}
+            for destino in DESTINOS:
+                try:
+                    tabela[nave_id][destino] = melhor_carga(destino, nave, modulos)
+                except Exception:
+                    logging.exception('Falha ao calcular carga de referência %s/%s', nave_id, destino)
+        with self._trava:
+            self._tabela = (catalogo.versao, tabela)
+        return tabela
+
+    def obter(self):
+        """Tabela `{nave_id: {destino: carga}}` do catálogo atual; compartilhada, não altere."""
+        with self._trava:
+            versao, tabela = self._tabela
+        if tabela is None or versao != obter_catalogo().versao:
+            return self.recalcular()
+        return tabela
+
+
+# Instância compartilhada (recalculada na inicialização do app)
+referencia_cargas = ReferenciaCargas()
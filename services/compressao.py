@@ -0,0 +1,153 @@
+"""Compressão gzip/brotli das respostas de texto (HTML, JSON, CSV...) em WSGI.
+
+`CompressaoWSGI` envolve `app.wsgi_app` (em create_app): respostas 200 com
+tipo de texto, sem `Content-Encoding` próprio e com pelo menos `minimo` bytes
+(ou de tamanho desconhecido, como as transmitidas) saem comprimidas na melhor
+codificação aceita pelo navegador: brotli, com o pacote opcional, ou gzip.
+
+A compressão é em fluxo: cada bloco produzido pelo app é comprimido e enviado
+na hora (com flush de sincronização), sem juntar o corpo em memória, então
+respostas transmitidas continuam chegando aos poucos. Os níveis são baixos de
+propósito (gzip 5, brotli 4): boa parte do ganho por uma fração da CPU dos
+níveis máximos, que ficam para os estáticos pré-comprimidos de
+`services/estaticos.py` (já com `Content-Encoding`, passam direto).
+"""
+
+import zlib
+
+from werkzeug.http import parse_accept_header
+
+from services.estaticos import brotli
+
+
+TIPOS_COMPRIMIVEIS = {
+    'application/json', 'application/javascript', 'application/xml', 'image/svg+xml',
+}
+MINIMO_PADRAO = 1024
+NIVEL_GZIP_PADRAO = 5
+NIVEL_BROTLI_PADRAO = 4
+
+
+def _comprimivel(tipo):
+    tipo = tipo.split(';', 1)[0].strip().lower()
+    return tipo.startswith('text/') or tipo in TIPOS_COMPRIMIVEIS
+
+
+class _Gzip:
+    def __init__(self, nivel):
+        self._z = zlib.compressobj(nivel, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def bloco(self, dados):
+        return self._z.compress(dados) + self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def fim(self):
+        return self._z.flush()
+
+
+class _Brotli:
+    def __init__(self, nivel):
+        self._c = brotli.Compressor(quality=nivel)
+
+    def bloco(self, dados):
+        return self._c.process(dados) + self._c.flush()
+
+    def fim(self):
+        return self._c.finish()
+
+
+class CompressaoWSGI:
+    """Middleware WSGI que comprime em fluxo respostas de texto acima de `minimo` bytes."""
+
+    def __init__(self, app, minimo=MINIMO_PADRAO, nivel_gzip=NIVEL_GZIP_PADRAO,
+                 nivel_brotli=NIVEL_BROTLI_PADRAO):
+        self.app = app
+        self.minimo = minimo
+        self.nivel_gzip = nivel_gzip
+        self.nivel_brotli = nivel_brotli
+
+    def _codificacao(self, environ):
+        if environ.get('REQUEST_METHOD') == 'HEAD':
+            return None
+        aceitas = parse_accept_header(environ.get('HTTP_ACCEPT_ENCODING'))
+        if brotli is not None and aceitas['br']:
+            return 'br'
+        if aceitas['gzip']:
+            return 'gzip'
+        return None
+
+    def _deve_comprimir(self, status, cabecalhos):
+        if not status.startswith('200'):
+            return False
+        nomes = {nome.lower(): valor for nome, valor in cabecalhos}
+        if 'content-encoding' in nomes or 'no-transform' in nomes.get('cache-control', ''):
+            return False
+        if not _comprimivel(nomes.get('content-type', '')):
+            return False
+        tamanho = nomes.get('content-length')
+        return tamanho is None or int(tamanho) >= self.minimo
+
+    def __call__(self, environ, start_response):
+        codificacao = self._codificacao(environ)
+        if codificacao is None:
+            return self.app(environ, start_response)
+
+        estado = {'iniciado': False, 'compressor': None}
+
+        def iniciar(status, cabecalhos, exc_info=None):
+            estado['iniciado'] = True
+            if not self._deve_comprimir(status, cabecalhos):
+                estado['compressor'] = None
+                return start_response(status, cabecalhos, exc_info)
+            novos, vary = [], []
+            for nome, valor in cabecalhos:
+                chave = nome.lower()
+                if chave == 'content-length':
+                    continue
+                if chave == 'vary':
+                    vary.append(valor)
+                    continue
+                if chave == 'etag' and not valor.startswith('W/'):
+                    # O corpo enviado não é mais byte a byte o do ETag original
+                    valor = 'W/' + valor
+                novos.append((nome, valor))
+            if not any('accept-encoding' in v.lower() or v.strip() == '*' for v in vary):
+                vary.append('Accept-Encoding')
+            novos.append(('Vary', ', '.join(vary)))
+            novos.append(('Content-Encoding', codificacao))
+            if codificacao == 'br':
+                estado['compressor'] = _Brotli(self.nivel_brotli)
+            else:
+                estado['compressor'] = _Gzip(self.nivel_gzip)
+            escrever = start_response(status, novos, exc_info)
+
+            def escrever_comprimido(dados):
+                saida = estado['compressor'].bloco(dados)
+                if saida:
+                    escrever(saida)
+            return escrever_comprimido
+
+        corpo = self.app(environ, iniciar)
+        if estado['iniciado'] and estado['compressor'] is None:
+            # Não comprimido: o iterável segue intacto (inclusive wsgi.file_wrapper)
+            return corpo
+        return self._comprimir(corpo, estado)
+
+    @staticmethod
+    def _comprimir(corpo, estado):
+        # O compressor é lido a cada bloco: um app pode chamar start_response só
+        # ao produzir o primeiro bloco
+        try:
+            for dados in corpo:
+                compressor = estado['compressor']
+                if compressor is None:
+                    yield dados
+                elif dados:
+                    saida = compressor.bloco(dados)
+                    if saida:
+                        yield saida
+            if estado['compressor'] is not None:
+                yield estado['compressor'].fim()
+        finally:
+            fechar = getattr(corpo, 'close', None)
+            if fechar is not None:
+                fechar()
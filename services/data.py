@@ -1,147 +1,177 @@
-"""Dados estáticos da aplicação (naves, módulos e eventos).
+"""Catálogo da aplicação (naves, módulos e eventos), lido de `catalogo.json`.
 
-Mantém separação de responsabilidades, evitando inchar app.py.
+Mantém o conteúdo pedagógico separado da lógica (e de app.py), permitindo
+evoluções independentes e eventual internacionalização.
+
+O catálogo é imutável e compartilhado por todas as requisições e threads:
+registros `frozen`/`slots` atrás de mapeamentos somente leitura
+(`MappingProxyType`) e uma tupla de eventos. Estado de uma execução (como
+módulos avariados) fica na própria execução, nunca no catálogo.
+
+`Catalogo.versao` é o hash do conteúdo do arquivo: serve de ETag para
+`/api/catalogo` e de chave para o que é derivado do catálogo (regras
+compiladas, tabelas de eventos, cargas de referência), que é refeito sob
+demanda quando a versão muda. `verificar_catalogo()` relê o arquivo se ele
+mudou, sem reiniciar os workers; uma troca é atômica (um único objeto).
 """
 
-# --- BANCO DE DADOS DAS NAVES ESPACIAIS ---
-NAVES_ESPACIAIS = {
-    'falcon9': {
-        'nome': 'Falcon 9',
-        'operador': 'EUA / SpaceX',
-        'imagem': 'Falcon9.png',
-        'descricao': 'Foguete de dois estágios reutilizável com excelente relação empuxo-peso. Ideal para cargas pesadas em órbita baixa.',
-        'capacidade_carga': 22.8,
-        'perfil_missao': 'Dois Estágios',
-        'empuxo_total': 7607,
-        'impulso_especifico': 282,
-        'massa_seca': 28.2,
-        'massa_combustivel': 433.1,
-        'delta_v_total': 9300,
-        'taxa_empuxo_peso': 1.8
-    },
-    'pslv': {
-        'nome': 'PSLV',
-        'operador': 'Índia / ISRO',
-        'imagem': 'PSLV.jpg',
-        'descricao': 'Foguete confiável com múltiplos estágios e capacidade de inserção em órbitas polares e sincronizadas com o sol.',
-        'capacidade_carga': 3.8,
-        'perfil_missao': 'Múltiplas Queimas',
-        'empuxo_total': 4800,
-        'impulso_especifico': 262,
-        'massa_seca': 18.5,
-        'massa_combustivel': 230.0,
-        'delta_v_total': 8200,
-        'taxa_empuxo_peso': 1.4
-    },
-    'longmarch8a': {
-        'nome': 'Long-March8A',
-        'operador': 'China',
-        'imagem': 'foguete-longa-marcha.png',
-        'descricao': 'Foguete de médio porte com capacidade para múltiplas órbitas e fases de coasting estendidas.',
-        'capacidade_carga': 9.8,
-        'perfil_missao': 'Coasting Estendido',
-        'empuxo_total': 5800,
-        'impulso_especifico': 275,
-        'massa_seca': 22.1,
-        'massa_combustivel': 320.5,
-        'delta_v_total': 8800,
-        'taxa_empuxo_peso': 1.6
-    },
-    'gslv': {
-        'nome': 'GSLV',
-        'operador': 'Índia / ISRO',
-        'imagem': 'LVM3_M3.png',
-        'descricao': 'Foguete com estágio criogênico superior para inserção precisa em órbitas de transferência geossíncronas.',
-        'capacidade_carga': 2.5,
-        'perfil_missao': 'Estágio Criogênico',
-        'empuxo_total': 4200,
-        'impulso_especifico': 295,
-        'massa_seca': 16.8,
-        'massa_combustivel': 198.7,
-        'delta_v_total': 9500,
-        'taxa_empuxo_peso': 1.3
-    }
-}
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from types import MappingProxyType
+
+
+CAMINHO_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'catalogo.json')
+VERSAO_FORMATO = 1
+
+
+@dataclass(frozen=True, slots=True)
+class Nave:
+    nome: str
+    operador: str
+    imagem: str
+    descricao: str
+    capacidade_carga: float  # toneladas
+    perfil_missao: str
+    empuxo_total: float
+    impulso_especifico: float
+    massa_seca: float
+    massa_combustivel: float
+    delta_v_total: float
+    taxa_empuxo_peso: float
+
+
+@dataclass(frozen=True, slots=True)
+class Modulo:
+    nome: str
+    massa: float  # kg
+    energia: float  # kWh/dia
+    agua: float  # L/dia
+    imagem: str
+    obs: str
+
+
+@dataclass(frozen=True, slots=True)
+class Evento:
+    nome: str
+    descricao: str
+    efeito: str
+
+
+class Catalogo:
+    """Naves, módulos e eventos de uma versão do arquivo de catálogo."""
+
+    __slots__ = ('naves', 'modulos', 'eventos', 'aliases_naves', 'versao', '_json')
+
+    def __init__(self, bruto):
+        dados = json.loads(bruto)
+        if dados.get('versao_formato') != VERSAO_FORMATO:
+            raise ValueError(f"formato de catálogo não suportado: {dados.get('versao_formato')}")
+        self.naves = MappingProxyType({k: Nave(**v) for k, v in dados['naves'].items()})
+        self.modulos = MappingProxyType({k: Modulo(**v) for k, v in dados['modulos'].items()})
+        self.eventos = tuple(Evento(**e) for e in dados['eventos'])
+        self.aliases_naves = MappingProxyType({
+            k.lower(): v for k, v in dados.get('aliases_naves', {}).items() if v in self.naves
+        })
+        self.versao = hashlib.sha1(bruto).hexdigest()[:16]
+        self._json = None
 
-# --- BANCO DE DADOS DOS MÓDULOS (com imagens e observações para tooltips) ---
-MODULOS_HABITAT = {
-    'suporte_vida': {"nome": "Suporte à Vida", "massa": 800, "energia": 15, "agua": 50,
-                     "imagem": "suporte_vida.svg", "obs": "Essencial. Conecta-se ao Habitacional, Sanitário e Produção de Alimentos."},
-    'habitacional': {"nome": "Habitacional Privado", "massa": 200, "energia": 1, "agua": 5,
-                     "imagem": "Privado.svg", "obs": "Acomodações para a tripulação. Pode ser integrado com Lazer."},
-    'alimentacao': {"nome": "Alimentação e Refeições", "massa": 300, "energia": 3, "agua": 20,
-                    "imagem": "refeicao.svg", "obs": "Área de preparo e consumo de alimentos."},
-    'medico': {"nome": "Módulo Médico", "massa": 250, "energia": 2, "agua": 5,
-               "imagem": "Medicina.svg", "obs": "Para emergências médicas e monitoramento da saúde da tripulação."},
-    'exercicios': {"nome": "Exercícios", "massa": 400, "energia": 5, "agua": 2,
-                   "imagem": "Exercicio.svg", "obs": "Equipamentos para mitigar a perda de massa muscular e óssea."},
-    'pesquisa': {"nome": "Trabalho e Pesquisa", "massa": 350, "energia": 4, "agua": 2,
-                 "imagem": "Pesquisa.svg", "obs": "Laboratório para condução de experimentos científicos."},
-    'armazenamento': {"nome": "Armazenamento", "massa": 150, "energia": 0.5, "agua": 0,
-                      "imagem": "Armazenagem.svg", "obs": "Estoque de suprimentos, ferramentas e amostras."},
-    'sanitario': {"nome": "Sanitário e Higiene", "massa": 250, "energia": 2, "agua": 30,
-                  "imagem": "Sanitário.svg", "obs": "Banheiro, chuveiro e sistemas de reciclagem de água."},
-    'inflavel': {"nome": "Inflável Expansível", "massa": 500, "energia": 2, "agua": 5,
-                 "imagem": "Inflavel.svg", "obs": "Módulo de grande volume quando inflado, altamente versátil."},
-    'airlock': {"nome": "Airlock", "massa": 300, "energia": 2, "agua": 2,
-                "imagem": "AirLock.svg", "obs": "Câmara de descompressão para atividades extraveiculares (EVAs)."},
-    'blindagem': {"nome": "Blindagem/Proteção", "massa": 600, "energia": 0, "agua": 0,
-                  "imagem": "Blindagem.svg", "obs": "Integrado a módulos infláveis ou estruturais."},
-    'estrutural': {"nome": "Estrutural Modular (TESSERAE)", "massa": 400, "energia": 1, "agua": 0,
-                   "imagem": "Tesserea.svg", "obs": "Base para outros módulos, reconfiguração fácil."},
-    'lazer': {"nome": "Cultura e Lazer", "massa": 150, "energia": 1, "agua": 0,
-              "imagem": "Cultura.svg", "obs": "Integrado ao Habitacional, Inflável ou Pesquisa."},
-    'robotico': {"nome": "Robótico de Construção/Manutenção", "massa": 350, "energia": 6, "agua": 0,
-                 "imagem": "Robotica.svg", "obs": "Conexão: Estrutural Modular, Armazenamento."},
-    'hidroponia': {"nome": "Produção de Alimentos (Hidroponia)", "massa": 500, "energia": 8, "agua": 40,
-                   "imagem": "Hidroponia.svg", "obs": "Cultivo de plantas em ambiente controlado para suplementar a dieta."},
-    'controle': {"nome": "Controle e Comunicação", "massa": 200, "energia": 3, "agua": 0,
-                 "imagem": "Controle.svg", "obs": "Sobreposição: Pesquisa/Operações."},
-    'multifuncional': {"nome": "Módulo Multifuncional", "massa": 600, "energia": 4, "agua": 10,
-                       "imagem": "Multifuncional.svg", "obs": "Dormitório, refeições, lazer, trabalho."},
-    'impressao3d': {"nome": "Impressão 3D/Manufatura", "massa": 300, "energia": 5, "agua": 2,
-                    "imagem": "Impressora.svg", "obs": "Fabricação de peças de reposição e ferramentas sob demanda."}
+    def nave_id(self, nave_id):
+        """Id interno da nave para um id ou alias (como veio na URL); desconhecidos voltam iguais."""
+        chave = (nave_id or '').lower()
+        if chave in self.naves:
+            return chave
+        return self.aliases_naves.get(chave, nave_id)
+
+    def para_json(self):
+        """Catálogo em formato JSON (montado uma vez por versão)."""
+        if self._json is None:
+            self._json = {
+                'versao': self.versao,
+                'naves': {k: asdict(v) for k, v in self.naves.items()},
+                'modulos': {k: asdict(v) for k, v in self.modulos.items()},
+                'eventos': [asdict(e) for e in self.eventos],
+                'aliases_naves': dict(self.aliases_naves),
+            }
+        return self._json
+
+
+def carregar_catalogo(caminho=CAMINHO_PADRAO):
+    """Lê e valida o arquivo de catálogo (levanta erro se inválido)."""
+    with open(caminho, 'rb') as f:
+        return Catalogo(f.read())
+
+
+def _assinatura(caminho):
+    estado = os.stat(caminho)
+    return estado.st_mtime_ns, estado.st_size
+
+
+_estado = {
+    'caminho': CAMINHO_PADRAO,
+    'catalogo': None,
+    'assinatura': None,
+    'intervalo': 2.0,
+    'verificado_em': 0.0,
 }
+_trava = threading.Lock()
+
+
+def configurar_catalogo(caminho=None, intervalo_verificacao=None):
+    """Define o arquivo de catálogo e de quanto em quanto tempo (s) verificar mudanças."""
+    with _trava:
+        if caminho and caminho != _estado['caminho']:
+            _estado.update(caminho=caminho, catalogo=None, assinatura=None)
+        if intervalo_verificacao is not None:
+            _estado['intervalo'] = max(float(intervalo_verificacao), 0.0)
+
+
+def obter_catalogo():
+    """Catálogo atual (carregado no primeiro uso); compartilhado, não altere."""
+    catalogo = _estado['catalogo']
+    return catalogo if catalogo is not None else recarregar_catalogo()
+
+
+def recarregar_catalogo(forcar=False):
+    """Relê o arquivo se ele mudou (ou se `forcar`) e troca o catálogo atual.
+
+    Um arquivo inválido é registrado no log e o catálogo anterior continua
+    valendo; sem catálogo anterior, o erro é propagado.
+    """
+    with _trava:
+        caminho = _estado['caminho']
+        atual = _estado['catalogo']
+        assinatura = _assinatura(caminho)
+        if atual is not None and not forcar and assinatura == _estado['assinatura']:
+            return atual
+        try:
+            novo = carregar_catalogo(caminho)
+        except Exception:
+            if atual is None:
+                raise
+            logging.exception('Catálogo inválido em %s; mantendo a versão %s', caminho, atual.versao)
+            _estado['assinatura'] = assinatura
+            return atual
+        _estado['assinatura'] = assinatura
+        if atual is None or novo.versao != atual.versao:
+            _estado['catalogo'] = novo
+            if atual is not None:
+                logging.info('Catálogo recarregado: versão %s -> %s', atual.versao, novo.versao)
+        return _estado['catalogo']
+
 
-# --- BANCO DE DADOS DE EVENTOS ALEATÓRIOS ---
-EVENTOS_ALEATORIOS = [
-    {
-        "nome": "Tempestade Solar",
-        "descricao": "Uma onda de radiação atinge a nave. Módulos com baixa blindagem podem sofrer avarias.",
-        "efeito": "risco_avaria_modulo"
-    },
-    {
-        "nome": "Falha Mecânica Menor",
-        "descricao": "Um subsistema apresenta uma pequena falha, consumindo recursos extras para reparo e causando um pequeno atraso.",
-        "efeito": "atraso_e_consumo_extra"
-    },
-    {
-        "nome": "Impacto de Micrometeoroide",
-        "descricao": "Pequenos detritos espaciais colidem com o casco. A blindagem da nave é testada.",
-        "efeito": "risco_perda_carga"
-    },
-    {
-        "nome": "Surto de Energia",
-        "descricao": "Uma flutuação nos sistemas de energia força um desvio de recursos para estabilização.",
-        "efeito": "consumo_extra"
-    },
-    {
-        "nome": "Tudo Calmo",
-        "descricao": "A viagem prossegue sem incidentes. A equipe aproveita a calmaria para verificar os sistemas.",
-        "efeito": "nenhum"
-    },
-    {
-        "nome": "Navegação Otimizada",
-        "descricao": "A equipe de voo encontra uma trajetória mais eficiente, economizando propelente e adiantando levemente a chegada.",
-        "efeito": "bonus_economia"
-    }
-]
-"""Dados estáticos utilizados pela UI e simulação do Cosmo-Casa.
-
-- `NAVES_ESPACIAIS`: catálogo com nome, imagem e notas educativas;
-- `MODULOS_HABITAT`: módulos do habitat com descrição e atributos;
-- `EVENTOS_ALEATORIOS`: eventos para simulação em turnos com efeitos.
-
-Mantém o conteúdo pedagógico separado da lógica, permitindo evoluções
-independentes e eventual internacionalização.
-"""
\ No newline at end of file
+def verificar_catalogo():
+    """Recarrega o catálogo se o arquivo mudou, no máximo uma verificação por intervalo."""
+    agora = time.monotonic()
+    if agora - _estado['verificado_em'] < _estado['intervalo']:
+        return obter_catalogo()
+    _estado['verificado_em'] = agora
+    try:
+        return recarregar_catalogo()
+    except Exception:
+        logging.exception('Falha ao verificar o catálogo')
+        return obter_catalogo()
@@ -1,126 +1,808 @@
+import os
+import json
+import queue
+import logging
 import sqlite3
 import secrets
+import threading
+from concurrent.futures import TimeoutError as FuturoTimeoutError
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 
+from werkzeug.security import generate_password_hash
+
+from .fila_respostas import FilaRespostas
+from .placar_memoria import PlacarMemoria
+
+
+# Banco padrão na raiz do projeto; BANCO_ARQUIVO aponta para outro arquivo
+CAMINHO_PADRAO = os.getenv('BANCO_ARQUIVO') or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'salas_virtuais.db'
+)
+
+# Pragmas aplicados uma única vez na abertura de cada conexão persistente.
+# - WAL permite leitores concorrentes enquanto um escritor grava;
+# - synchronous=NORMAL é seguro em WAL e evita fsync a cada commit;
+# - busy_timeout faz o SQLite aguardar o lock em vez de falhar com "database is locked".
+BUSY_TIMEOUT_MS = 5000
+PRAGMAS_CONEXAO = (
+    ('synchronous', 'NORMAL'),
+    ('busy_timeout', BUSY_TIMEOUT_MS),
+    ('mmap_size', 64 * 1024 * 1024),
+    ('cache_size', -8000),  # valor negativo = KiB (~8 MB por conexão)
+    ('temp_store', 'MEMORY'),
+)
+
+
+def _migracao_001_schema_inicial(cursor):
+    """Tabelas originais do projeto e colunas adicionadas depois do lançamento."""
+    # Tabela de professores
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS professores (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            senha_hash TEXT NOT NULL,
+            data_criacao DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Tabela de salas virtuais
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS salas_virtuais (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            codigo_sala TEXT UNIQUE NOT NULL,
+            professor_id INTEGER NOT NULL,
+            nome_sala TEXT NOT NULL,
+            destino TEXT NOT NULL,
+            nave_id TEXT NOT NULL,
+            desafios_json TEXT NOT NULL,
+            ativa BOOLEAN DEFAULT 1,
+            data_criacao DATETIME DEFAULT CURRENT_TIMESTAMP,
+            data_expiracao DATETIME,
+            -- A coluna abaixo pode já existir em bancos criados previamente
+            -- Mantemos a criação aqui para ambientes novos.
+            desafio_selecionado_index INTEGER,
+            FOREIGN KEY (professor_id) REFERENCES professores (id)
+        )
+    ''')
+
+    # Tabela de alunos
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS alunos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            sala_id INTEGER NOT NULL,
+            nome TEXT NOT NULL,
+            email TEXT,
+            progresso_json TEXT,
+            data_ingresso DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (sala_id) REFERENCES salas_virtuais (id)
+        )
+    ''')
+
+    # Tabela de respostas aos desafios
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS respostas_desafios (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            aluno_id INTEGER NOT NULL,
+            sala_id INTEGER NOT NULL,
+            desafio_id TEXT NOT NULL,
+            resposta TEXT NOT NULL,
+            correta BOOLEAN,
+            pontuacao INTEGER,
+            data_resposta DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (aluno_id) REFERENCES alunos (id),
+            FOREIGN KEY (sala_id) REFERENCES salas_virtuais (id)
+        )
+    ''')
+
+    # Garantir coluna de exclusão no ranking para alunos
+    try:
+        cursor.execute("PRAGMA table_info(alunos)")
+        cols = [row[1] for row in cursor.fetchall()]
+        if 'excluir_ranking' not in cols:
+            cursor.execute("ALTER TABLE alunos ADD COLUMN excluir_ranking INTEGER DEFAULT 0")
+    except Exception:
+        pass
+
+    # Garantir coluna de seleção de desafio na sala
+    try:
+        cursor.execute("PRAGMA table_info(salas_virtuais)")
+        cols = [row[1] for row in cursor.fetchall()]
+        if 'desafio_selecionado_index' not in cols:
+            cursor.execute("ALTER TABLE salas_virtuais ADD COLUMN desafio_selecionado_index INTEGER")
+    except Exception:
+        pass
+
+
+def _migracao_002_indices_consultas(cursor):
+    """Índices de cobertura para ranking, login do aluno e estatísticas."""
+    # Login (sala_id + nome) e junção aluno -> sala no ranking
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_alunos_sala_nome ON alunos (sala_id, nome)')
+    # Agregação de ranking por aluno sem ler a tabela de respostas
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS idx_respostas_sala_aluno '
+        'ON respostas_desafios (sala_id, aluno_id, correta, pontuacao)'
+    )
+    # Estatísticas por desafio (colunas extras tornam o índice de cobertura)
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS idx_respostas_sala_desafio '
+        'ON respostas_desafios (sala_id, desafio_id, correta, pontuacao)'
+    )
+    # Listagens de salas ativas/inativas ordenadas por criação
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_salas_ativa_criacao ON salas_virtuais (ativa, data_criacao)')
+
+
+
+def _migracao_003_codigo_sala_canonico(cursor):
+    """Grava códigos de sala em maiúsculas para que a busca use o índice UNIQUE."""
+    # OR IGNORE: se dois códigos só diferirem por caixa, o mais antigo prevalece
+    cursor.execute(
+        'UPDATE OR IGNORE salas_virtuais SET codigo_sala = UPPER(codigo_sala) '
+        'WHERE codigo_sala <> UPPER(codigo_sala)'
+    )
+
+
+def _migracao_004_placar_alunos(cursor):
+    """Placar por aluno mantido por triggers, evitando agregar respostas no ranking."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS placar_alunos (
+            aluno_id INTEGER PRIMARY KEY,
+            sala_id INTEGER NOT NULL,
+            nome TEXT NOT NULL,
+            excluido INTEGER NOT NULL DEFAULT 0,
+            total INTEGER NOT NULL DEFAULT 0,
+            tentativas INTEGER NOT NULL DEFAULT 0,
+            concluidos INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    # Ranking por sala e consolidado já saem ordenados do índice
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS idx_placar_sala_ranking '
+        'ON placar_alunos (sala_id, excluido, total DESC, nome)'
+    )
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS idx_placar_ranking '
+        'ON placar_alunos (excluido, total DESC, nome)'
+    )
+    # Cada aluno tem uma linha de placar (alunos sem respostas aparecem com zero)
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_placar_aluno_inserido AFTER INSERT ON alunos
+        BEGIN
+            INSERT OR REPLACE INTO placar_alunos (aluno_id, sala_id, nome, excluido)
+            VALUES (NEW.id, NEW.sala_id, NEW.nome, COALESCE(NEW.excluir_ranking, 0));
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_placar_aluno_alterado
+        AFTER UPDATE OF nome, sala_id, excluir_ranking ON alunos
+        BEGIN
+            UPDATE placar_alunos
+            SET sala_id = NEW.sala_id, nome = NEW.nome, excluido = COALESCE(NEW.excluir_ranking, 0)
+            WHERE aluno_id = NEW.id;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_placar_aluno_excluido AFTER DELETE ON alunos
+        BEGIN
+            DELETE FROM placar_alunos WHERE aluno_id = OLD.id;
+        END
+    ''')
+    # Mesmas regras da agregação original: só conta respostas da sala do aluno
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_placar_resposta_inserida AFTER INSERT ON respostas_desafios
+        BEGIN
+            UPDATE placar_alunos
+            SET total = total + CASE WHEN NEW.correta = 1 THEN COALESCE(NEW.pontuacao, 0) ELSE 0 END,
+                tentativas = tentativas + 1,
+                concluidos = concluidos + CASE WHEN NEW.correta = 1 THEN 1 ELSE 0 END
+            WHERE aluno_id = NEW.aluno_id AND sala_id = NEW.sala_id;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_placar_resposta_excluida AFTER DELETE ON respostas_desafios
+        BEGIN
+            UPDATE placar_alunos
+            SET total = total - CASE WHEN OLD.correta = 1 THEN COALESCE(OLD.pontuacao, 0) ELSE 0 END,
+                tentativas = tentativas - 1,
+                concluidos = concluidos - CASE WHEN OLD.correta = 1 THEN 1 ELSE 0 END
+            WHERE aluno_id = OLD.aluno_id AND sala_id = OLD.sala_id;
+        END
+    ''')
+    reconstruir_placar(cursor)
+
+
+# Versão de dados: escopo = id da sala; ESCOPO_GLOBAL muda a cada alteração em qualquer sala
+ESCOPO_GLOBAL = 0
+
+# (nome do trigger, evento, expressões com o id da sala afetada)
+_GATILHOS_VERSAO = (
+    ('trg_versao_sala_inserida', 'AFTER INSERT ON salas_virtuais', ('NEW.id',)),
+    ('trg_versao_sala_alterada', 'AFTER UPDATE ON salas_virtuais', ('NEW.id',)),
+    ('trg_versao_sala_excluida', 'AFTER DELETE ON salas_virtuais', ('OLD.id',)),
+    ('trg_versao_aluno_inserido', 'AFTER INSERT ON alunos', ('NEW.sala_id',)),
+    ('trg_versao_aluno_alterado', 'AFTER UPDATE ON alunos', ('OLD.sala_id', 'NEW.sala_id')),
+    ('trg_versao_aluno_excluido', 'AFTER DELETE ON alunos', ('OLD.sala_id',)),
+    ('trg_versao_resposta_inserida', 'AFTER INSERT ON respostas_desafios', ('NEW.sala_id',)),
+    ('trg_versao_resposta_excluida', 'AFTER DELETE ON respostas_desafios', ('OLD.sala_id',)),
+)
+
+
+def _migracao_005_versoes_dados(cursor):
+    """Contadores de versão por sala (e global) incrementados por triggers.
+
+    Servem de ETag forte para dashboard, detalhes da sala e ranking: se a
+    versão não mudou, a página não precisa ser recalculada.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS versoes_dados (
+            escopo INTEGER PRIMARY KEY,
+            versao INTEGER NOT NULL
+        )
+    ''')
+    _criar_gatilhos_versao(cursor, _GATILHOS_VERSAO)
+
+
+def _criar_gatilhos_versao(cursor, gatilhos):
+    """Cria triggers que incrementam a versão das salas afetadas e a global."""
+    incremento = (
+        'INSERT INTO versoes_dados (escopo, versao) VALUES ({}, 1) '
+        'ON CONFLICT(escopo) DO UPDATE SET versao = versao + 1;'
+    )
+    for nome, evento, salas in gatilhos:
+        corpo = ' '.join(incremento.format(expr) for expr in salas + (str(ESCOPO_GLOBAL),))
+        cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {nome} {evento} BEGIN {corpo} END')
+
+
+def _migracao_006_contadores_salas(cursor):
+    """Contadores por sala (alunos, tentativas, acertos, pontos) mantidos por triggers.
+
+    O dashboard deixa de agregar todo o histórico de respostas a cada acesso.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS contadores_salas (
+            sala_id INTEGER PRIMARY KEY,
+            aluno_count INTEGER NOT NULL DEFAULT 0,
+            tentativas_total INTEGER NOT NULL DEFAULT 0,
+            corretas_total INTEGER NOT NULL DEFAULT 0,
+            soma_pontuacao INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_contadores_sala_inserida AFTER INSERT ON salas_virtuais
+        BEGIN
+            INSERT OR IGNORE INTO contadores_salas (sala_id) VALUES (NEW.id);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_contadores_sala_excluida AFTER DELETE ON salas_virtuais
+        BEGIN
+            DELETE FROM contadores_salas WHERE sala_id = OLD.id;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_contadores_aluno_inserido AFTER INSERT ON alunos
+        BEGIN
+            UPDATE contadores_salas SET aluno_count = aluno_count + 1 WHERE sala_id = NEW.sala_id;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_contadores_aluno_movido
+        AFTER UPDATE OF sala_id ON alunos WHEN OLD.sala_id IS NOT NEW.sala_id
+        BEGIN
+            UPDATE contadores_salas SET aluno_count = aluno_count - 1 WHERE sala_id = OLD.sala_id;
+            UPDATE contadores_salas SET aluno_count = aluno_count + 1 WHERE sala_id = NEW.sala_id;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_contadores_aluno_excluido AFTER DELETE ON alunos
+        BEGIN
+            UPDATE contadores_salas SET aluno_count = aluno_count - 1 WHERE sala_id = OLD.sala_id;
+        END
+    ''')
+    # Mesma regra de SQL_ESTATISTICAS_POR_SALA: toda resposta registrada na sala conta
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_contadores_resposta_inserida AFTER INSERT ON respostas_desafios
+        BEGIN
+            UPDATE contadores_salas
+            SET tentativas_total = tentativas_total + 1,
+                corretas_total = corretas_total + CASE WHEN NEW.correta = 1 THEN 1 ELSE 0 END,
+                soma_pontuacao = soma_pontuacao + COALESCE(NEW.pontuacao, 0)
+            WHERE sala_id = NEW.sala_id;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_contadores_resposta_excluida AFTER DELETE ON respostas_desafios
+        BEGIN
+            UPDATE contadores_salas
+            SET tentativas_total = tentativas_total - 1,
+                corretas_total = corretas_total - CASE WHEN OLD.correta = 1 THEN 1 ELSE 0 END,
+                soma_pontuacao = soma_pontuacao - COALESCE(OLD.pontuacao, 0)
+            WHERE sala_id = OLD.sala_id;
+        END
+    ''')
+    reconstruir_contadores_salas(cursor)
+
+
+def reconstruir_contadores_salas(cursor):
+    """Recalcula `contadores_salas` a partir de alunos e respostas brutas."""
+    cursor.execute('DELETE FROM contadores_salas')
+    cursor.execute('''
+        INSERT INTO contadores_salas (sala_id, aluno_count, tentativas_total, corretas_total, soma_pontuacao)
+        SELECT s.id,
+               (SELECT COUNT(*) FROM alunos a WHERE a.sala_id = s.id),
+               (SELECT COUNT(*) FROM respostas_desafios r WHERE r.sala_id = s.id),
+               (SELECT COUNT(*) FROM respostas_desafios r WHERE r.sala_id = s.id AND r.correta = 1),
+               (SELECT COALESCE(SUM(r.pontuacao), 0) FROM respostas_desafios r WHERE r.sala_id = s.id)
+        FROM salas_virtuais s
+    ''')
+
+
+def _migracao_007_desafios(cursor):
+    """Desafios normalizados por `(sala_id, posicao)`, com id estável e versão.
+
+    Substitui o read-modify-write de `salas_virtuais.desafios_json`: cada
+    desafio é inserido, editado ou excluído na própria linha. O JSON existente
+    é copiado uma única vez; a coluna antiga fica congelada (legado).
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS desafios (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            sala_id INTEGER NOT NULL,
+            posicao INTEGER NOT NULL,
+            titulo TEXT,
+            descricao TEXT,
+            dados_json TEXT,
+            versao INTEGER NOT NULL DEFAULT 1,
+            UNIQUE (sala_id, posicao)
+        )
+    ''')
+    _criar_gatilhos_versao(cursor, (
+        ('trg_versao_desafio_inserido', 'AFTER INSERT ON desafios', ('NEW.sala_id',)),
+        ('trg_versao_desafio_alterado', 'AFTER UPDATE ON desafios', ('NEW.sala_id',)),
+        ('trg_versao_desafio_excluido', 'AFTER DELETE ON desafios', ('OLD.sala_id',)),
+    ))
+    salas = cursor.execute('SELECT id, desafios_json FROM salas_virtuais').fetchall()
+    for sala_id, desafios_json in salas:
+        try:
+            desafios = json.loads(desafios_json or '[]')
+        except Exception:
+            logging.warning('desafios_json inválido na sala %s; ignorado na migração', sala_id)
+            continue
+        if isinstance(desafios, list):
+            _inserir_desafios(cursor, sala_id, desafios)
+
+
+def _inserir_desafios(cursor, sala_id, desafios):
+    """Insere a lista no formato antigo (dicts ou textos) ao fim dos desafios da sala."""
+    for desafio in desafios:
+        if not isinstance(desafio, dict):
+            desafio = {'descricao': str(desafio)}
+        extras = {k: v for k, v in desafio.items() if k not in ('titulo', 'descricao')}
+        cursor.execute(
+            SQL_INSERIR_DESAFIO,
+            (desafio.get('titulo'), desafio.get('descricao'),
+             json.dumps(extras, ensure_ascii=False) if extras else None, sala_id),
+        )
+
+
+def _migracao_008_missao_runs(cursor):
+    """Execuções da missão (diário, módulos e resultado) guardadas no servidor.
+
+    A sessão (cookie assinado) passa a carregar só o id da execução, em vez
+    do diário de bordo inteiro (até 250 turnos para exoplaneta).
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS missao_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            aluno_id INTEGER,
+            sala_id INTEGER,
+            destino TEXT NOT NULL,
+            nave_id TEXT NOT NULL,
+            modulos_json TEXT NOT NULL,
+            avariados_json TEXT NOT NULL,
+            diario_json TEXT NOT NULL,
+            chegada_ok INTEGER NOT NULL,
+            pontuacao INTEGER NOT NULL,
+            feedback TEXT,
+            criado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    # Histórico do aluno, mais recentes primeiro
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_missao_runs_aluno ON missao_runs (aluno_id, id DESC)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_missao_runs_sala ON missao_runs (sala_id)')
+
+
+def _migracao_009_semente_missao_runs(cursor):
+    """Semente da simulação: repete a viagem exatamente (`services.simulacao`)."""
+    cursor.execute("PRAGMA table_info(missao_runs)")
+    if 'semente' not in [col[1] for col in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE missao_runs ADD COLUMN semente INTEGER")
+
+
+def _migracao_010_recursos_missao_runs(cursor):
+    """Reservas de energia e água turno a turno (`simulacao.simular_recursos`)."""
+    cursor.execute("PRAGMA table_info(missao_runs)")
+    if 'recursos_json' not in [col[1] for col in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE missao_runs ADD COLUMN recursos_json TEXT")
+
+
+def _migracao_011_admins(cursor):
+    """Tabela de administradores com o admin padrão (senha 'admin', troca obrigatória).
+
+    Antes era criada pela rota de login a cada acesso.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS admins (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            must_change INTEGER DEFAULT 1,
+            created_at TEXT
+        )
+    ''')
+    if cursor.execute('SELECT COUNT(*) FROM admins').fetchone()[0] == 0:
+        cursor.execute(
+            'INSERT INTO admins (username, password_hash, must_change, created_at) VALUES (?, ?, ?, ?)',
+            ('admin', generate_password_hash('admin'), 1, datetime.utcnow().isoformat())
+        )
+
+
+def reconstruir_placar(cursor, sala_id=None):
+    """Recalcula `placar_alunos` a partir das respostas brutas (toda a base ou uma sala)."""
+    filtro = '' if sala_id is None else 'WHERE a.sala_id = ? '
+    params = () if sala_id is None else (sala_id,)
+    cursor.execute('DELETE FROM placar_alunos ' + ('' if sala_id is None else 'WHERE sala_id = ?'), params)
+    cursor.execute(
+        "INSERT INTO placar_alunos (aluno_id, sala_id, nome, excluido, total, tentativas, concluidos) "
+        "SELECT a.id, a.sala_id, a.nome, COALESCE(a.excluir_ranking, 0), "
+        "COALESCE(SUM(CASE WHEN r.correta = 1 THEN r.pontuacao ELSE 0 END), 0), "
+        "COUNT(r.id), "
+        "COALESCE(SUM(CASE WHEN r.correta = 1 THEN 1 ELSE 0 END), 0) "
+        "FROM alunos a "
+        "LEFT JOIN respostas_desafios r ON r.aluno_id = a.id AND r.sala_id = a.sala_id "
+        + filtro +
+        "GROUP BY a.id",
+        params,
+    )
+
+
+def normalizar_codigo_sala(codigo_sala):
+    """Forma canônica do código da sala (sem espaços e em maiúsculas)."""
+    return (codigo_sala or '').strip().upper()
+
+
+# Migrações em ordem: (versão, descrição, função que recebe o cursor).
+# Nunca altere uma migração já publicada; acrescente uma nova versão.
+MIGRACOES = (
+    (1, 'schema inicial', _migracao_001_schema_inicial),
+    (2, 'indices das consultas de ranking, login e estatisticas', _migracao_002_indices_consultas),
+    (3, 'codigo_sala canonico em maiusculas', _migracao_003_codigo_sala_canonico),
+    (4, 'placar_alunos mantido por triggers', _migracao_004_placar_alunos),
+    (5, 'versoes_dados por sala para ETag', _migracao_005_versoes_dados),
+    (6, 'contadores_salas mantidos por triggers', _migracao_006_contadores_salas),
+    (7, 'desafios normalizados por sala e posicao', _migracao_007_desafios),
+    (8, 'missao_runs com diario da viagem no servidor', _migracao_008_missao_runs),
+    (9, 'semente da simulacao em missao_runs', _migracao_009_semente_missao_runs),
+    (10, 'reservas de energia e agua em missao_runs', _migracao_010_recursos_missao_runs),
+    (11, 'admins com admin padrao', _migracao_011_admins),
+)
+VERSAO_SCHEMA = MIGRACOES[-1][0]
+
+
+# --- Consultas quentes (reutilizadas pelo script de verificação de planos) ---
+SQL_ALUNO_POR_NOME = 'SELECT id, nome FROM alunos WHERE sala_id = ? AND nome = ?'
+
+# Código sempre normalizado por `normalizar_codigo_sala` (igualdade usa o índice UNIQUE)
+SQL_SALA_POR_CODIGO = (
+    'SELECT s.*, p.nome as professor_nome '
+    'FROM salas_virtuais s '
+    'LEFT JOIN professores p ON s.professor_id = p.id '
+    'WHERE s.codigo_sala = ?'
+)
+
+SQL_INSERIR_RESPOSTA = (
+    'INSERT INTO respostas_desafios '
+    '(aluno_id, sala_id, desafio_id, resposta, correta, pontuacao) '
+    'VALUES (?, ?, ?, ?, ?, ?)'
+)
+
+# Rankings leem o placar incremental (ver _migracao_004_placar_alunos); o
+# ranking consolidado intercala em memória as salas de SQL_IDS_SALAS_ATIVAS,
+# que traz a versão de cada sala para validar o placar em memória.
+SQL_RANKING_SALA = (
+    "SELECT aluno_id, nome, total, tentativas, concluidos "
+    "FROM placar_alunos "
+    "WHERE sala_id = ? AND excluido = 0 "
+    "ORDER BY total DESC, nome ASC LIMIT ?"
+)
+
+SQL_IDS_SALAS_ATIVAS = (
+    'SELECT s.id, COALESCE(v.versao, 0) '
+    'FROM salas_virtuais s '
+    'LEFT JOIN versoes_dados v ON v.escopo = s.id '
+    'WHERE s.ativa = 1'
+)
+
+SQL_VERSAO_DADOS = 'SELECT versao FROM versoes_dados WHERE escopo = ?'
+
+# Id, situação e versão da sala em um único snapshot (ETag antes de ler o resto)
+SQL_VERSAO_SALA_POR_CODIGO = (
+    'SELECT s.id, s.ativa, COALESCE(v.versao, 0) '
+    'FROM salas_virtuais s '
+    'LEFT JOIN versoes_dados v ON v.escopo = s.id '
+    'WHERE s.codigo_sala = ?'
+)
+
+# Contagens vêm de contadores_salas (ver _migracao_006_contadores_salas)
+SQL_LISTAR_SALAS = '''
+    SELECT s.id, s.codigo_sala, s.nome_sala, s.destino, s.nave_id,
+           s.data_criacao, s.desafio_selecionado_index,
+           COALESCE(c.aluno_count, 0) AS aluno_count
+    FROM salas_virtuais s
+    LEFT JOIN contadores_salas c ON c.sala_id = s.id
+    WHERE s.ativa = ?
+    ORDER BY s.data_criacao DESC
+'''
+
+SQL_ESTATISTICAS_POR_SALA = '''
+    SELECT s.id AS sala_id,
+           s.codigo_sala,
+           s.nome_sala,
+           s.ativa,
+           COALESCE(c.tentativas_total, 0) AS tentativas_total,
+           COALESCE(c.corretas_total, 0) AS corretas_total,
+           CASE WHEN c.tentativas_total > 0
+                THEN CAST(c.soma_pontuacao AS REAL) / c.tentativas_total
+                ELSE 0 END AS media_pontuacao
+    FROM salas_virtuais s
+    LEFT JOIN contadores_salas c ON c.sala_id = s.id
+    ORDER BY s.data_criacao DESC
+'''
+
+# Desafios (ver _migracao_007_desafios). Novo desafio entra na próxima posição da sala.
+SQL_INSERIR_DESAFIO = (
+    'INSERT INTO desafios (sala_id, posicao, titulo, descricao, dados_json) '
+    'SELECT ?4, COALESCE(MAX(posicao) + 1, 0), ?1, ?2, ?3 FROM desafios WHERE sala_id = ?4'
+)
+
+SQL_DESAFIOS_SALA = (
+    'SELECT id, sala_id, posicao, titulo, descricao, dados_json, versao '
+    'FROM desafios WHERE sala_id = ? ORDER BY posicao'
+)
+
+SQL_DESAFIOS_SALAS_ATIVAS = (
+    'SELECT d.id, d.sala_id, d.posicao, d.titulo, d.descricao, d.dados_json, d.versao '
+    'FROM salas_virtuais s JOIN desafios d ON d.sala_id = s.id '
+    'WHERE s.ativa = 1 ORDER BY d.sala_id, d.posicao'
+)
+
+SQL_MISSAO_RUNS_ALUNO = (
+    'SELECT id, destino, nave_id, chegada_ok, pontuacao, criado_em '
+    'FROM missao_runs WHERE aluno_id = ? ORDER BY id DESC LIMIT ?'
+)
+
+SQL_ESTATISTICAS_POR_DESAFIO = '''
+    SELECT desafio_id,
+           COUNT(id) AS tentativas,
+           COALESCE(SUM(CASE WHEN correta = 1 THEN 1 ELSE 0 END), 0) AS corretas,
+           COALESCE(AVG(COALESCE(pontuacao, 0)), 0) AS media_pontuacao
+    FROM respostas_desafios
+    WHERE sala_id = ?
+    GROUP BY desafio_id
+    ORDER BY desafio_id ASC
+'''
+
 
 class DatabaseManager:
     """Gerencia conexão e operações no banco SQLite.
 
     Notas:
     - Usa `db_path` como arquivo único do banco;
+    - Nada é aberto na construção: o schema é verificado (e migrado) uma vez
+      por processo, na primeira conexão pedida;
+    - Conexões são persistentes: uma conexão de leitura por thread e uma
+      única conexão de escrita compartilhada, serializada por uma trava;
     - As operações são focadas em robustez e simplicidade para ambiente escolar;
     - Em produção, recomenda-se migração para um ORM (SQLAlchemy) e testes unitários.
     """
-    def __init__(self, db_path='salas_virtuais.db'):
+    def __init__(self, db_path=CAMINHO_PADRAO):
         self.db_path = db_path
-        self.init_db()
-    
+        self._local = threading.local()
+        self._trava_escrita = threading.RLock()
+        self._trava_schema = threading.RLock()
+        self._schema_pronto = False
+        self._migrando = False
+        self._escritor = None
+        self._leitores = []
+        self._pid = os.getpid()
+        self.fila_respostas = None
+        self.placar_memoria = PlacarMemoria()
+
+    def configurar(self, db_path):
+        """Troca o arquivo do banco (antes do primeiro uso, ou em testes)."""
+        if db_path == self.db_path:
+            return
+        self.fechar_conexoes()
+        with self._trava_schema:
+            self.db_path = db_path
+            self._schema_pronto = False
+
+    # --- Gerenciamento de conexões ---
+    def _conectar(self):
+        """Abre uma conexão nova já configurada com os pragmas de desempenho."""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=BUSY_TIMEOUT_MS / 1000,
+            check_same_thread=False,
+            isolation_level=None,  # transações explícitas via conexao_escrita()
+            cached_statements=256,
+        )
+        for nome, valor in PRAGMAS_CONEXAO:
+            conn.execute(f'PRAGMA {nome} = {valor}')
+        return conn
+
+    def _verificar_processo(self):
+        """Descarta conexões herdadas de outro processo (ex.: após fork de workers)."""
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._local = threading.local()
+            self._escritor = None
+            self._leitores = []
+            # A thread escritora não sobrevive ao fork: recria a fila no filho
+            if self.fila_respostas is not None:
+                self.fila_respostas = FilaRespostas(self._inserir_respostas, **self._opcoes_fila)
+
+    def _garantir_schema(self):
+        """Aplica as migrações na primeira conexão do processo.
+
+        Outras threads esperam a migração terminar; as conexões abertas pelo
+        próprio `init_db` passam direto (a trava é reentrante).
+        """
+        if self._schema_pronto:
+            return
+        with self._trava_schema:
+            if self._schema_pronto or self._migrando:
+                return
+            self._migrando = True
+            try:
+                self.init_db()
+                self._schema_pronto = True
+            finally:
+                self._migrando = False
+
+    @contextmanager
+    def conexao_leitura(self):
+        """Fornece a conexão de leitura da thread atual (aberta sob demanda).
+
+        Em WAL, leituras não bloqueiam nem são bloqueadas pelo escritor.
+        """
+        self._verificar_processo()
+        self._garantir_schema()
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._conectar()
+            self._local.conn = conn
+            self._leitores.append(conn)
+        profundidade = getattr(self._local, 'profundidade', 0)
+        self._local.profundidade = profundidade + 1
+        try:
+            yield conn
+        finally:
+            self._local.profundidade = profundidade
+            # Leituras não devem deixar transação aberta (mantém o snapshot atualizado);
+            # blocos aninhados deixam o encerramento para o bloco externo
+            if profundidade == 0 and conn.in_transaction:
+                conn.rollback()
+
+    @contextmanager
+    def snapshot_leitura(self):
+        """Agrupa as leituras do bloco em uma única transação (mesmo snapshot WAL).
+
+        Métodos de leitura chamados dentro do bloco reutilizam a transação.
+        Não carregue o placar em memória aqui dentro: ele precisa do estado
+        mais recente, não do snapshot.
+        """
+        with self.conexao_leitura() as conn:
+            if not conn.in_transaction:
+                conn.execute('BEGIN')
+            yield conn
+
+    @contextmanager
+    def conexao_escrita(self):
+        """Fornece a conexão de escrita compartilhada dentro de uma transação.
+
+        Faz commit ao final do bloco ou rollback em caso de exceção. Blocos
+        aninhados na mesma thread reutilizam a transação externa.
+        """
+        self._verificar_processo()
+        self._garantir_schema()
+        with self._trava_escrita:
+            if self._escritor is None:
+                conn = self._conectar()
+                conn.execute('PRAGMA journal_mode = WAL')
+                self._escritor = conn
+            conn = self._escritor
+            if conn.in_transaction:
+                yield conn
+                return
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn
+            except BaseException:
+                if conn.in_transaction:
+                    conn.rollback()
+                raise
+            else:
+                if conn.in_transaction:
+                    conn.commit()
+
+    def fechar_conexoes(self):
+        """Fecha todas as conexões persistentes (testes ou encerramento do processo)."""
+        with self._trava_escrita:
+            for conn in self._leitores + ([self._escritor] if self._escritor else []):
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            self._leitores = []
+            self._escritor = None
+            self._local = threading.local()
+
     def init_db(self):
-        """Inicializa o banco de dados com as tabelas necessárias"""
-        with sqlite3.connect(self.db_path) as conn:
+        """Aplica as migrações pendentes e registra a versão em `schema_version`.
+
+        Chamado sob demanda por `_garantir_schema` (uma vez por processo); com
+        o schema em dia, custa apenas uma leitura (sem pegar a trava de escrita).
+        """
+        if self._versao_schema() >= VERSAO_SCHEMA:
+            return
+        with self.conexao_escrita() as conn:
             cursor = conn.cursor()
-            
-            # Tabela de professores
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS professores (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nome TEXT NOT NULL,
-                    email TEXT UNIQUE NOT NULL,
-                    senha_hash TEXT NOT NULL,
-                    data_criacao DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Tabela de salas virtuais
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS salas_virtuais (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    codigo_sala TEXT UNIQUE NOT NULL,
-                    professor_id INTEGER NOT NULL,
-                    nome_sala TEXT NOT NULL,
-                    destino TEXT NOT NULL,
-                    nave_id TEXT NOT NULL,
-                    desafios_json TEXT NOT NULL,
-                    ativa BOOLEAN DEFAULT 1,
-                    data_criacao DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    data_expiracao DATETIME,
-                    -- A coluna abaixo pode já existir em bancos criados previamente
-                    -- Mantemos a criação aqui para ambientes novos.
-                    desafio_selecionado_index INTEGER,
-                    FOREIGN KEY (professor_id) REFERENCES professores (id)
-                )
-            ''')
-            
-            # Tabela de alunos
             cursor.execute('''
-                CREATE TABLE IF NOT EXISTS alunos (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    sala_id INTEGER NOT NULL,
-                    nome TEXT NOT NULL,
-                    email TEXT,
-                    progresso_json TEXT,
-                    data_ingresso DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (sala_id) REFERENCES salas_virtuais (id)
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    versao INTEGER PRIMARY KEY,
+                    descricao TEXT NOT NULL,
+                    aplicada_em DATETIME DEFAULT CURRENT_TIMESTAMP
                 )
             ''')
-            
-            # Tabela de respostas aos desafios
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS respostas_desafios (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    aluno_id INTEGER NOT NULL,
-                    sala_id INTEGER NOT NULL,
-                    desafio_id TEXT NOT NULL,
-                    resposta TEXT NOT NULL,
-                    correta BOOLEAN,
-                    pontuacao INTEGER,
-                    data_resposta DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (aluno_id) REFERENCES alunos (id),
-                    FOREIGN KEY (sala_id) REFERENCES salas_virtuais (id)
-                )
-            ''')
-            
-            conn.commit()
+            cursor.execute('SELECT COALESCE(MAX(versao), 0) FROM schema_version')
+            atual = cursor.fetchone()[0]
+            for versao, descricao, migracao in MIGRACOES:
+                if versao <= atual:
+                    continue
+                migracao(cursor)
+                cursor.execute('INSERT INTO schema_version (versao, descricao) VALUES (?, ?)', (versao, descricao))
 
-            # Garantir coluna de exclusão no ranking para alunos
-            try:
-                cursor.execute("PRAGMA table_info(alunos)")
-                cols = [row[1] for row in cursor.fetchall()]
-                if 'excluir_ranking' not in cols:
-                    cursor.execute("ALTER TABLE alunos ADD COLUMN excluir_ranking INTEGER DEFAULT 0")
-                    conn.commit()
-            except Exception:
-                pass
+    def _versao_schema(self):
+        """Versão atual do schema (0 quando o banco ainda não tem `schema_version`)."""
+        try:
+            with self.conexao_leitura() as conn:
+                return conn.execute('SELECT COALESCE(MAX(versao), 0) FROM schema_version').fetchone()[0]
+        except sqlite3.OperationalError:
+            return 0
 
-            # Garantir coluna de seleção de desafio na sala
-            try:
-                cursor.execute("PRAGMA table_info(salas_virtuais)")
-                cols = [row[1] for row in cursor.fetchall()]
-                if 'desafio_selecionado_index' not in cols:
-                    cursor.execute("ALTER TABLE salas_virtuais ADD COLUMN desafio_selecionado_index INTEGER")
-                    conn.commit()
-            except Exception:
-                pass
-    
     def gerar_codigo_sala(self):
         """Gera um código único para a sala"""
         return secrets.token_hex(4).upper()
     
     def criar_professor(self, nome, email, senha):
         """Cria um novo professor no banco de dados"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.conexao_escrita() as conn:
             cursor = conn.cursor()
             # Em produção, usar bcrypt para hash de senha
             cursor.execute(
                 "INSERT INTO professores (nome, email, senha_hash) VALUES (?, ?, ?)",
                 (nome, email, senha)  # Em produção, usar hash seguro
             )
-            conn.commit()
             return cursor.lastrowid
     
     def criar_sala_virtual(self, professor_id, nome_sala, destino, nave_id, desafios):
-        """Cria uma nova sala virtual"""
-        with sqlite3.connect(self.db_path) as conn:
+        """Cria uma nova sala virtual.
+
+        `desafios` (lista ou JSON no formato antigo) vira linhas de `desafios`.
+        """
+        with self.conexao_escrita() as conn:
             cursor = conn.cursor()
             # Garantir regra de exclusividade: somente uma sala ativa por vez
             try:
@@ -134,22 +816,19 @@ class DatabaseManager:
                 INSERT INTO salas_virtuais 
                 (codigo_sala, professor_id, nome_sala, destino, nave_id, desafios_json, data_expiracao, ativa)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (codigo_sala, professor_id, nome_sala, destino, nave_id, desafios, data_expiracao, 1))
-            
-            conn.commit()
+            ''', (codigo_sala, professor_id, nome_sala, destino, nave_id, '[]', data_expiracao, 1))
+            if isinstance(desafios, str):
+                desafios = json.loads(desafios or '[]')
+            _inserir_desafios(cursor, cursor.lastrowid, desafios or [])
+
             return codigo_sala
     
     def buscar_sala_por_codigo(self, codigo_sala):
         """Busca uma sala pelo código"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.conexao_leitura() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT s.*, p.nome as professor_nome
-                FROM salas_virtuais s
-                LEFT JOIN professores p ON s.professor_id = p.id
-                WHERE UPPER(s.codigo_sala) = UPPER(?) AND s.ativa = 1
-            ''', (codigo_sala,))
-            
+            cursor.execute(SQL_SALA_POR_CODIGO + ' AND s.ativa = 1', (normalizar_codigo_sala(codigo_sala),))
+
             sala = cursor.fetchone()
             if sala:
                 columns = [description[0] for description in cursor.description]
@@ -158,14 +837,9 @@ class DatabaseManager:
 
     def buscar_sala_por_codigo_any(self, codigo_sala):
         """Busca uma sala pelo código, incluindo inativas (uso administrativo/professor)."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.conexao_leitura() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT s.*, p.nome as professor_nome
-                FROM salas_virtuais s
-                LEFT JOIN professores p ON s.professor_id = p.id
-                WHERE UPPER(s.codigo_sala) = UPPER(?)
-            ''', (codigo_sala,))
+            cursor.execute(SQL_SALA_POR_CODIGO, (normalizar_codigo_sala(codigo_sala),))
             sala = cursor.fetchone()
             if sala:
                 columns = [description[0] for description in cursor.description]
@@ -174,7 +848,7 @@ class DatabaseManager:
 
     def buscar_sala_por_id(self, sala_id):
         """Busca uma sala pelo ID (inclui inativas), útil para sessão do aluno."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.conexao_leitura() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT s.*, p.nome as professor_nome
@@ -190,19 +864,18 @@ class DatabaseManager:
     
     def adicionar_aluno(self, sala_id, nome, email=None):
         """Adiciona um aluno à sala"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.conexao_escrita() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 INSERT INTO alunos (sala_id, nome, email, progresso_json)
                 VALUES (?, ?, ?, ?)
             ''', (sala_id, nome, email, '{}'))
-            
-            conn.commit()
+            self.placar_memoria.invalidar(sala_id)
             return cursor.lastrowid
     
     def buscar_alunos_por_sala(self, sala_id):
         """Busca todos os alunos de uma sala"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.conexao_leitura() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT id, nome, email, progresso_json, data_ingresso
@@ -215,134 +888,245 @@ class DatabaseManager:
             columns = [description[0] for description in cursor.description]
             return [dict(zip(columns, aluno)) for aluno in alunos]
 
+    def buscar_aluno_por_nome(self, sala_id, nome):
+        """Busca o aluno pelo nome exato dentro da sala (login estrito)."""
+        with self.conexao_leitura() as conn:
+            row = conn.execute(SQL_ALUNO_POR_NOME, (sala_id, nome)).fetchone()
+            if row:
+                return {'id': row[0], 'nome': row[1]}
+            return None
+
     # --- Operações administrativas de salas (professor) ---
     def fechar_sala_por_codigo(self, codigo_sala):
         """Desativa (fecha) a sala pelo código."""
-        with sqlite3.connect(self.db_path) as conn:
+        codigo_sala = normalizar_codigo_sala(codigo_sala)
+        with self.conexao_escrita() as conn:
             cursor = conn.cursor()
             cursor.execute('''
-                UPDATE salas_virtuais SET ativa = 0 WHERE UPPER(codigo_sala) = UPPER(?)
+                UPDATE salas_virtuais SET ativa = 0 WHERE codigo_sala = ?
             ''', (codigo_sala,))
-            conn.commit()
 
     def reabrir_sala_por_codigo(self, codigo_sala):
         """Reativa (reabre) a sala pelo código."""
-        with sqlite3.connect(self.db_path) as conn:
+        codigo_sala = normalizar_codigo_sala(codigo_sala)
+        with self.conexao_escrita() as conn:
             cursor = conn.cursor()
             cursor.execute('''
-                UPDATE salas_virtuais SET ativa = 1 WHERE UPPER(codigo_sala) = UPPER(?)
+                UPDATE salas_virtuais SET ativa = 1 WHERE codigo_sala = ?
             ''', (codigo_sala,))
-            conn.commit()
 
     def reabrir_sala_exclusiva(self, codigo_sala):
         """Ativa somente a sala informada, desativando todas as demais."""
-        with sqlite3.connect(self.db_path) as conn:
+        codigo_sala = normalizar_codigo_sala(codigo_sala)
+        with self.conexao_escrita() as conn:
             cursor = conn.cursor()
             cursor.execute('UPDATE salas_virtuais SET ativa = 0')
-            cursor.execute('UPDATE salas_virtuais SET ativa = 1 WHERE UPPER(codigo_sala) = UPPER(?)', (codigo_sala,))
-            conn.commit()
+            cursor.execute('UPDATE salas_virtuais SET ativa = 1 WHERE codigo_sala = ?', (codigo_sala,))
 
     def excluir_sala_por_codigo(self, codigo_sala):
         """Exclui definitivamente a sala e seus dados relacionados (alunos e respostas)."""
-        with sqlite3.connect(self.db_path) as conn:
+        codigo_sala = normalizar_codigo_sala(codigo_sala)
+        with self.conexao_escrita() as conn:
             cursor = conn.cursor()
             # Encontrar ID da sala
-            cursor.execute('SELECT id FROM salas_virtuais WHERE UPPER(codigo_sala) = UPPER(?)', (codigo_sala,))
+            cursor.execute('SELECT id FROM salas_virtuais WHERE codigo_sala = ?', (codigo_sala,))
             row = cursor.fetchone()
             if not row:
                 return False
             sala_id = row[0]
-            # Excluir respostas e alunos vinculados
+            # Excluir respostas, alunos, desafios e execuções vinculados
             cursor.execute('DELETE FROM respostas_desafios WHERE sala_id = ?', (sala_id,))
             cursor.execute('DELETE FROM alunos WHERE sala_id = ?', (sala_id,))
+            cursor.execute('DELETE FROM desafios WHERE sala_id = ?', (sala_id,))
+            cursor.execute('DELETE FROM missao_runs WHERE sala_id = ?', (sala_id,))
             # Excluir sala
             cursor.execute('DELETE FROM salas_virtuais WHERE id = ?', (sala_id,))
-            conn.commit()
+            self.placar_memoria.invalidar(sala_id)
             return True
 
     def atualizar_destino_e_nave(self, codigo_sala, destino, nave_id):
         """Atualiza destino e nave da sala pelo código."""
-        with sqlite3.connect(self.db_path) as conn:
+        codigo_sala = normalizar_codigo_sala(codigo_sala)
+        with self.conexao_escrita() as conn:
             cursor = conn.cursor()
             cursor.execute('''
-                UPDATE salas_virtuais SET destino = ?, nave_id = ? WHERE UPPER(codigo_sala) = UPPER(?)
+                UPDATE salas_virtuais SET destino = ?, nave_id = ? WHERE codigo_sala = ?
             ''', (destino, nave_id, codigo_sala))
-            conn.commit()
-
-    def atualizar_desafios_json(self, codigo_sala, desafios_json):
-        """Atualiza o campo desafios_json da sala pelo código."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                UPDATE salas_virtuais SET desafios_json = ? WHERE UPPER(codigo_sala) = UPPER(?)
-            ''', (desafios_json, codigo_sala))
-            conn.commit()
 
     def selecionar_desafio_index(self, codigo_sala, idx):
         """Define o índice do desafio selecionado para a sala."""
-        with sqlite3.connect(self.db_path) as conn:
+        codigo_sala = normalizar_codigo_sala(codigo_sala)
+        with self.conexao_escrita() as conn:
             cursor = conn.cursor()
             cursor.execute('''
-                UPDATE salas_virtuais SET desafio_selecionado_index = ? WHERE UPPER(codigo_sala) = UPPER(?)
+                UPDATE salas_virtuais SET desafio_selecionado_index = ? WHERE codigo_sala = ?
             ''', (idx, codigo_sala))
-            conn.commit()
+
+    # --- Desafios por sala (linhas de `desafios`) ---
+    @staticmethod
+    def _desafio(row):
+        """Linha de `desafios` no formato dos templates (dict com titulo/descricao)."""
+        desafio_id, sala_id, posicao, titulo, descricao, dados_json, versao = row
+        desafio = json.loads(dados_json) if dados_json else {}
+        desafio.update({
+            'id': desafio_id,
+            'sala_id': sala_id,
+            'posicao': posicao,
+            'titulo': titulo,
+            'descricao': descricao,
+            'versao': versao,
+        })
+        return desafio
+
+    def listar_desafios(self, sala_id):
+        """Desafios da sala em ordem de posição (substitui `json.loads(desafios_json)`)."""
+        with self.conexao_leitura() as conn:
+            return [self._desafio(r) for r in conn.execute(SQL_DESAFIOS_SALA, (sala_id,))]
+
+    def listar_desafios_salas_ativas(self):
+        """`{sala_id: [desafios]}` de todas as salas ativas em uma consulta."""
+        por_sala = {}
+        with self.conexao_leitura() as conn:
+            for r in conn.execute(SQL_DESAFIOS_SALAS_ATIVAS):
+                por_sala.setdefault(r[1], []).append(self._desafio(r))
+        return por_sala
+
+    def adicionar_desafio(self, codigo_sala, titulo, descricao):
+        """Acrescenta um desafio ao fim da sala; retorna o id (None se a sala não existe)."""
+        with self.conexao_escrita() as conn:
+            row = conn.execute('SELECT id FROM salas_virtuais WHERE codigo_sala = ?',
+                               (normalizar_codigo_sala(codigo_sala),)).fetchone()
+            if not row:
+                return None
+            cursor = conn.execute(SQL_INSERIR_DESAFIO, (titulo, descricao, None, row[0]))
+            return cursor.lastrowid
+
+    def atualizar_desafio(self, codigo_sala, desafio_id, titulo, descricao, versao=None):
+        """Edita título/descrição; com `versao`, só aplica se ninguém alterou antes.
+
+        Título vazio (None) vira "Desafio N", como na edição por índice.
+
+        Retorna False quando o desafio não existe na sala ou a versão mudou.
+        """
+        with self.conexao_escrita() as conn:
+            cursor = conn.execute(
+                "UPDATE desafios SET titulo = COALESCE(?, 'Desafio ' || (posicao + 1)), "
+                'descricao = ?, versao = versao + 1 '
+                'WHERE id = ? AND sala_id = (SELECT id FROM salas_virtuais WHERE codigo_sala = ?) '
+                'AND (? IS NULL OR versao = ?)',
+                (titulo, descricao, desafio_id, normalizar_codigo_sala(codigo_sala), versao, versao),
+            )
+            return cursor.rowcount == 1
+
+    def excluir_desafio(self, codigo_sala, desafio_id, versao=None):
+        """Exclui o desafio e fecha o buraco nas posições seguintes.
+
+        O índice selecionado da sala acompanha a renumeração. Retorna False
+        quando o desafio não existe na sala ou a versão mudou.
+        """
+        with self.conexao_escrita() as conn:
+            row = conn.execute(
+                'SELECT d.sala_id, d.posicao FROM desafios d '
+                'JOIN salas_virtuais s ON s.id = d.sala_id '
+                'WHERE d.id = ? AND s.codigo_sala = ? AND (? IS NULL OR d.versao = ?)',
+                (desafio_id, normalizar_codigo_sala(codigo_sala), versao, versao),
+            ).fetchone()
+            if not row:
+                return False
+            sala_id, posicao = row
+            conn.execute('DELETE FROM desafios WHERE id = ?', (desafio_id,))
+            # Em dois passos (via negativos) para não violar UNIQUE(sala_id, posicao)
+            conn.execute('UPDATE desafios SET posicao = -posicao WHERE sala_id = ? AND posicao > ?',
+                         (sala_id, posicao))
+            conn.execute('UPDATE desafios SET posicao = -posicao - 1 WHERE sala_id = ? AND posicao < 0',
+                         (sala_id,))
+            conn.execute(
+                'UPDATE salas_virtuais SET desafio_selecionado_index = CASE '
+                'WHEN desafio_selecionado_index = ? THEN NULL '
+                'ELSE desafio_selecionado_index - 1 END '
+                'WHERE id = ? AND desafio_selecionado_index >= ?',
+                (posicao, sala_id, posicao),
+            )
+            return True
+
+    def id_desafio_por_posicao(self, codigo_sala, posicao):
+        """Id do desafio na posição (índice dos formulários antigos) ou None."""
+        with self.conexao_leitura() as conn:
+            row = conn.execute(
+                'SELECT d.id FROM desafios d JOIN salas_virtuais s ON s.id = d.sala_id '
+                'WHERE s.codigo_sala = ? AND d.posicao = ?',
+                (normalizar_codigo_sala(codigo_sala), posicao),
+            ).fetchone()
+        return row[0] if row else None
+
+    # --- Execuções da missão (missao_runs) ---
+    def criar_missao_run(self, aluno_id, sala_id, destino, nave_id, modulos, avariados, diario,
+                         chegada_ok, pontuacao, feedback=None, semente=None, recursos=None):
+        """Grava uma execução da viagem e retorna o id (guardado na sessão)."""
+        with self.conexao_escrita() as conn:
+            cursor = conn.execute(
+                'INSERT INTO missao_runs (aluno_id, sala_id, destino, nave_id, modulos_json, '
+                'avariados_json, diario_json, chegada_ok, pontuacao, feedback, semente, recursos_json) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (aluno_id, sala_id, destino, nave_id,
+                 json.dumps(list(modulos), ensure_ascii=False),
+                 json.dumps(list(avariados), ensure_ascii=False),
+                 json.dumps(diario, ensure_ascii=False, separators=(',', ':')),
+                 1 if chegada_ok else 0, int(pontuacao), feedback, semente,
+                 json.dumps(recursos, ensure_ascii=False, separators=(',', ':')) if recursos else None),
+            )
+            return cursor.lastrowid
+
+    def buscar_missao_run(self, run_id):
+        """Execução completa (com diário) ou None."""
+        with self.conexao_leitura() as conn:
+            cursor = conn.execute('SELECT * FROM missao_runs WHERE id = ?', (run_id,))
+            row = cursor.fetchone()
+            if not row:
+                return None
+            run = dict(zip([d[0] for d in cursor.description], row))
+        run['modulos'] = json.loads(run.pop('modulos_json'))
+        run['avariados'] = json.loads(run.pop('avariados_json'))
+        run['diario'] = json.loads(run.pop('diario_json'))
+        recursos_json = run.pop('recursos_json', None)
+        run['recursos'] = json.loads(recursos_json) if recursos_json else None
+        run['chegada_ok'] = bool(run['chegada_ok'])
+        return run
+
+    def listar_missao_runs(self, aluno_id, limite=20):
+        """Resumo das últimas execuções do aluno (sem o diário)."""
+        with self.conexao_leitura() as conn:
+            cursor = conn.execute(SQL_MISSAO_RUNS_ALUNO, (aluno_id, limite))
+            cols = [d[0] for d in cursor.description]
+            return [dict(zip(cols, r)) for r in cursor.fetchall()]
+
+    def obter_must_change_admin(self, username='admin'):
+        """Flag de troca de senha obrigatória do admin (0 se não houver)."""
+        with self.conexao_leitura() as conn:
+            row = conn.execute('SELECT must_change FROM admins WHERE username = ?', (username,)).fetchone()
+        return (row[0] or 0) if row else 0
 
     # --- Listagens de salas para dashboards ---
     def listar_salas_ativas(self):
         """Lista salas ativas com contagem de alunos e desafios."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT s.id, s.codigo_sala, s.nome_sala, s.destino, s.nave_id,
-                       s.data_criacao, s.desafios_json, s.desafio_selecionado_index,
-                       COUNT(a.id) AS aluno_count
-                FROM salas_virtuais s
-                LEFT JOIN alunos a ON a.sala_id = s.id
-                WHERE s.ativa = 1
-                GROUP BY s.id
-                ORDER BY s.data_criacao DESC
-            ''')
-            rows = cursor.fetchall()
-            cols = [d[0] for d in cursor.description]
-            result = []
-            for r in rows:
-                result.append(dict(zip(cols, r)))
-            return result
+        return self._listar_salas(1)
 
     def listar_salas_inativas(self):
         """Lista salas inativas com contagem de alunos."""
-        with sqlite3.connect(self.db_path) as conn:
+        return self._listar_salas(0)
+
+    def _listar_salas(self, ativa):
+        with self.conexao_leitura() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT s.id, s.codigo_sala, s.nome_sala, s.destino, s.nave_id,
-                       s.data_criacao, COUNT(a.id) AS aluno_count
-                FROM salas_virtuais s
-                LEFT JOIN alunos a ON a.sala_id = s.id
-                WHERE s.ativa = 0
-                GROUP BY s.id
-                ORDER BY s.data_criacao DESC
-            ''')
-            rows = cursor.fetchall()
+            cursor.execute(SQL_LISTAR_SALAS, (ativa,))
             cols = [d[0] for d in cursor.description]
-            return [dict(zip(cols, r)) for r in rows]
+            return [dict(zip(cols, r)) for r in cursor.fetchall()]
 
     def obter_estatisticas_por_sala(self):
         """Retorna estatísticas agregadas por sala (tentativas, corretas, média de pontos, precisão)."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.conexao_leitura() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT s.id AS sala_id,
-                       s.codigo_sala,
-                       s.nome_sala,
-                       s.ativa,
-                       COALESCE(COUNT(r.id), 0) AS tentativas_total,
-                       COALESCE(SUM(CASE WHEN r.correta = 1 THEN 1 ELSE 0 END), 0) AS corretas_total,
-                       COALESCE(AVG(COALESCE(r.pontuacao, 0)), 0) AS media_pontuacao
-                FROM salas_virtuais s
-                LEFT JOIN respostas_desafios r ON r.sala_id = s.id
-                GROUP BY s.id, s.codigo_sala, s.nome_sala, s.ativa
-                ORDER BY s.data_criacao DESC
-            ''')
+            cursor.execute(SQL_ESTATISTICAS_POR_SALA)
             rows = cursor.fetchall()
             result = []
             for sala_id, codigo, nome, ativa, tent, corr, media in rows:
@@ -359,89 +1143,152 @@ class DatabaseManager:
                 })
             return result
     
-    def registrar_resposta_desafio(self, aluno_id, sala_id, desafio_id, resposta, correta, pontuacao):
-        """Registra uma resposta a um desafio"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO respostas_desafios 
-                (aluno_id, sala_id, desafio_id, resposta, correta, pontuacao)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (aluno_id, sala_id, desafio_id, resposta, correta, pontuacao))
-            
-            conn.commit()
-            return cursor.lastrowid
+    def registrar_resposta_desafio(self, aluno_id, sala_id, desafio_id, resposta, correta, pontuacao, aguardar=None):
+        """Registra uma resposta a um desafio.
+
+        Com a fila em lote ativa (`ativar_fila_respostas`), a linha entra no
+        próximo commit em grupo. `aguardar=False` não espera o commit e
+        retorna None; por padrão vale o modo configurado na fila.
+        """
+        params = (aluno_id, sala_id, desafio_id, resposta, correta, pontuacao)
+        # Após um fork, a fila herdada não tem thread escritora: recria antes de usar
+        self._verificar_processo()
+        if self.fila_respostas is not None:
+            try:
+                return self.fila_respostas.registrar(params, aguardar=aguardar)
+            except queue.Full:
+                logging.warning('Fila de respostas cheia; gravando diretamente')
+            except FuturoTimeoutError:
+                logging.warning('Fila de respostas sem confirmação em %.1f s; gravando diretamente',
+                                self.fila_respostas.timeout_confirmacao)
+        return self._inserir_respostas([params])[0]
+
+    def _inserir_respostas(self, lote):
+        """Insere várias respostas em uma única transação e devolve os ids gerados.
+
+        O placar em memória recebe os deltas após o commit, ainda sob a trava
+        de escrita, junto com a versão de cada sala antes e depois do lote
+        (ver `services.placar_memoria`).
+        """
+        ids = []
+        salas = sorted({params[1] for params in lote})
+        with self._trava_escrita:
+            aninhada = self._escritor is not None and self._escritor.in_transaction
+            with self.conexao_escrita() as conn:
+                cursor = conn.cursor()
+                antes = [self._versao_sala(cursor, sala_id) for sala_id in salas]
+                for params in lote:
+                    cursor.execute(SQL_INSERIR_RESPOSTA, params)
+                    ids.append(cursor.lastrowid)
+                depois = [self._versao_sala(cursor, sala_id) for sala_id in salas]
+            if aninhada:
+                # Commit fica a cargo da transação externa: recarrega depois
+                for sala_id in salas:
+                    self.placar_memoria.invalidar(sala_id)
+            else:
+                self.placar_memoria.registrar_respostas(
+                    dict(zip(salas, zip(antes, depois))),
+                    [(aluno_id, sala_id, correta, pontuacao)
+                     for aluno_id, sala_id, _, _, correta, pontuacao in lote],
+                )
+        return ids
+
+    def ativar_fila_respostas(self, **opcoes):
+        """Liga a gravação em lote (group commit) das respostas; idempotente."""
+        if self.fila_respostas is None:
+            self._opcoes_fila = opcoes
+            self.fila_respostas = FilaRespostas(self._inserir_respostas, **opcoes)
+        return self.fila_respostas
 
     # --- Ranking ---
-    def obter_ranking_sala(self, sala_id, limit=50):
-        """Retorna ranking de alunos por sala com total de pontos, tentativas e concluídos."""
-        with sqlite3.connect(self.db_path) as conn:
+    def reconstruir_placar(self, sala_id=None):
+        """Recalcula o placar incremental a partir das respostas brutas."""
+        with self.conexao_escrita() as conn:
+            reconstruir_placar(conn.cursor(), sala_id)
+            self.placar_memoria.invalidar(sala_id)
+
+    def excluir_aluno_do_ranking(self, aluno_id):
+        """Marca o aluno para não aparecer no ranking."""
+        with self.conexao_escrita() as conn:
             cursor = conn.cursor()
-            # Detectar coluna de exclusão no ranking
-            cursor.execute('PRAGMA table_info(alunos)')
-            cols = [row[1] for row in cursor.fetchall()]
-            exclude_col = 'excluir_ranking' if 'excluir_ranking' in cols else ('exclude_ranking' if 'exclude_ranking' in cols else None)
-
-            base_sql = (
-                "SELECT a.id AS aluno_id, a.nome AS nome, "
-                "COALESCE(SUM(CASE WHEN r.correta = 1 THEN r.pontuacao ELSE 0 END), 0) AS total, "
-                "COUNT(r.id) AS tentativas, "
-                "COALESCE(SUM(CASE WHEN r.correta = 1 THEN 1 ELSE 0 END), 0) AS concluidos "
-                "FROM alunos a "
-                "LEFT JOIN respostas_desafios r ON r.aluno_id = a.id AND r.sala_id = a.sala_id "
-                "WHERE a.sala_id = ? "
-            )
-            if exclude_col:
-                base_sql += f"AND COALESCE(a.{exclude_col}, 0) = 0 "
-            base_sql += "GROUP BY a.id, a.nome ORDER BY total DESC, a.nome ASC LIMIT ?"
+            cursor.execute('UPDATE alunos SET excluir_ranking = 1 WHERE id = ?', (aluno_id,))
+            row = cursor.execute('SELECT sala_id FROM alunos WHERE id = ?', (aluno_id,)).fetchone()
+            if row:
+                self.placar_memoria.invalidar(row[0])
 
-            cursor.execute(base_sql, (sala_id, limit))
-            rows = cursor.fetchall()
-            return [{'id': r[0], 'nome': r[1], 'total': r[2], 'tentativas': r[3], 'concluidos': r[4]} for r in rows]
+    def _carregar_placar_sala(self, sala_id):
+        """Carrega o placar da sala do SQLite para a memória (sob a trava de escrita).
+
+        Lê pela conexão de escrita: a de leitura pode estar presa a um
+        `snapshot_leitura()` mais antigo que o último commit. A versão da sala
+        é lida na mesma transação, para o placar valer exatamente para ela.
+        """
+        with self.conexao_escrita() as conn:
+            cursor = conn.cursor()
+            linhas = cursor.execute(SQL_RANKING_SALA, (sala_id, -1)).fetchall()
+            return self.placar_memoria.instalar(sala_id, linhas, self._versao_sala(cursor, sala_id))
+
+    @staticmethod
+    def _versao_sala(cursor, sala_id):
+        row = cursor.execute(SQL_VERSAO_DADOS, (sala_id,)).fetchone()
+        return row[0] if row else 0
+
+    def _salas_ativas_com_versao(self):
+        """`{sala_id: versao}` das salas ativas (uma consulta)."""
+        with self.conexao_leitura() as conn:
+            return dict(conn.execute(SQL_IDS_SALAS_ATIVAS).fetchall())
+
+    def obter_ranking_sala(self, sala_id, limit=50):
+        """Retorna ranking de alunos por sala com total de pontos, tentativas e concluídos."""
+        versoes = {sala_id: self.versao_dados(sala_id)}
+        return self.placar_memoria.top(sala_id, limit, self._carregar_placar_sala, versoes)
 
     def obter_ranking_salas_ativas(self, limit=100):
         """Ranking consolidado das salas ativas com total de pontos, tentativas e concluídos."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            # Detectar coluna de exclusão no ranking
-            cursor.execute('PRAGMA table_info(alunos)')
-            cols = [row[1] for row in cursor.fetchall()]
-            exclude_col = 'excluir_ranking' if 'excluir_ranking' in cols else ('exclude_ranking' if 'exclude_ranking' in cols else None)
-
-            base_sql = (
-                "SELECT a.id AS aluno_id, a.nome AS nome, "
-                "COALESCE(SUM(CASE WHEN r.correta = 1 THEN r.pontuacao ELSE 0 END), 0) AS total, "
-                "COUNT(r.id) AS tentativas, "
-                "COALESCE(SUM(CASE WHEN r.correta = 1 THEN 1 ELSE 0 END), 0) AS concluidos "
-                "FROM alunos a "
-                "JOIN salas_virtuais s ON s.id = a.sala_id AND s.ativa = 1 "
-                "LEFT JOIN respostas_desafios r ON r.aluno_id = a.id AND r.sala_id = a.sala_id "
-                "WHERE 1 = 1 "
-            )
-            if exclude_col:
-                base_sql += f"AND COALESCE(a.{exclude_col}, 0) = 0 "
-            base_sql += "GROUP BY a.id, a.nome ORDER BY total DESC, a.nome ASC LIMIT ?"
+        versoes = self._salas_ativas_com_versao()
+        return self.placar_memoria.top_salas(list(versoes), limit, self._carregar_placar_sala, versoes)
 
-            cursor.execute(base_sql, (limit,))
-            rows = cursor.fetchall()
-            return [{'id': r[0], 'nome': r[1], 'total': r[2], 'tentativas': r[3], 'concluidos': r[4]} for r in rows]
+    def versao_dados(self, sala_id=None):
+        """Versão de dados da sala (ou global, sem argumento); muda a cada alteração."""
+        with self.conexao_leitura() as conn:
+            row = conn.execute(SQL_VERSAO_DADOS, (ESCOPO_GLOBAL if sala_id is None else sala_id,)).fetchone()
+        return row[0] if row else 0
+
+    def versao_dados_por_codigo(self, codigo_sala):
+        """`{'id', 'ativa', 'versao'}` da sala pelo código (inclui inativas) ou None."""
+        with self.conexao_leitura() as conn:
+            row = conn.execute(SQL_VERSAO_SALA_POR_CODIGO, (normalizar_codigo_sala(codigo_sala),)).fetchone()
+        if not row:
+            return None
+        return {'id': row[0], 'ativa': row[1], 'versao': row[2]}
+
+    def codigo_sala_existente(self, codigo_sala):
+        """Código normalizado se a sala existe (inclui inativas); senão None.
+
+        Para códigos vindos da URL antes de entrarem em chaves de cache.
+        """
+        codigo = normalizar_codigo_sala(codigo_sala)
+        if not codigo or len(codigo) > 32:
+            return None
+        return codigo if self.versao_dados_por_codigo(codigo) else None
+
+    def obter_ranking_pagina(self, sala_id=None, limite=20, apos=None):
+        """Página do ranking por keyset: itens após `apos` = (total, nome, aluno_id).
+
+        Sem `sala_id`, considera as salas ativas (mesmo recorte de
+        `obter_ranking_salas_ativas`).
+        """
+        if sala_id is not None:
+            versoes = {sala_id: self.versao_dados(sala_id)}
+        else:
+            versoes = self._salas_ativas_com_versao()
+        return self.placar_memoria.pagina(list(versoes), limite, apos, self._carregar_placar_sala, versoes)
 
     def obter_estatisticas_por_desafio(self, sala_id):
         """Agrupa respostas por desafio dentro da sala e calcula tentativas, corretas e média de pontuação."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.conexao_leitura() as conn:
             cursor = conn.cursor()
-            cursor.execute(
-                '''
-                SELECT desafio_id,
-                       COUNT(id) AS tentativas,
-                       COALESCE(SUM(CASE WHEN correta = 1 THEN 1 ELSE 0 END), 0) AS corretas,
-                       COALESCE(AVG(COALESCE(pontuacao, 0)), 0) AS media_pontuacao
-                FROM respostas_desafios
-                WHERE sala_id = ?
-                GROUP BY desafio_id
-                ORDER BY desafio_id ASC
-                '''
-            , (sala_id,))
+            cursor.execute(SQL_ESTATISTICAS_POR_DESAFIO, (sala_id,))
             rows = cursor.fetchall()
             return [
                 {
@@ -455,14 +1302,16 @@ class DatabaseManager:
             ]
 
 
-# Instância compartilhada
-db_manager = DatabaseManager('C:\\Users\\ricardo.moretti\\CosmoCasa\\Cosmo-Casa\\salas_virtuais.db')
+# Instância compartilhada (o banco só é aberto no primeiro uso)
+db_manager = DatabaseManager()
 """Camada de acesso a dados (SQLite) do Cosmo-Casa.
 
 Fornece operações para professores e alunos:
 - Salas virtuais: criar, atualizar destino/nave, fechar/reabrir, excluir;
 - Alunos: adicionar, listar, ranking e estatísticas;
-- Desafios: armazenados em JSON por sala (simplificado para esta versão).
+- Desafios: tabela `desafios`, uma linha por desafio com id estável, posição
+  única por sala (`sala_id, posicao`) e `versao` para edição otimista
+  (`desafios_json` em salas_virtuais é só o legado da migração 7).
 
 Mantém a aplicação simples e portável, sem dependências de servidor externo.
 """
\ No newline at end of file
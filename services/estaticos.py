@@ -0,0 +1,197 @@
+"""Assets estáticos versionados: nome com hash do conteúdo e variantes gzip/brotli.
+
+`construir(pasta_static)` (via `python scripts/construir_estaticos.py`) copia
+CSS, JS, fontes, imagens e as variantes de `scripts/otimizar_imagens.py` para
+`static/dist/` com o hash do conteúdo no nome
+(`css/style.css` -> `css/style.3f2a9c1b07.css`), grava `.gz` (e `.br`, com o
+pacote opcional `brotli`) dos arquivos de texto e registra tudo em
+`static/dist/manifest.json`. Referências `url(...)` entre arquivos do CSS são
+reescritas para os nomes com hash.
+
+Com o manifesto presente, `AssetsVersionados` faz `url_for('static', ...)`
+(templates e Python) apontar para `/static/dist/<nome com hash>` e serve esses
+caminhos com `Cache-Control: immutable` e a variante comprimida aceita pelo
+navegador: cada arquivo é baixado uma vez por navegador até mudar de conteúdo.
+Sem manifesto (desenvolvimento), nada muda. Arquivos editados depois do build
+voltam a ser servidos pelo caminho original até o próximo build.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import posixpath
+import re
+import shutil
+
+from flask import abort, request, send_from_directory
+
+try:
+    import brotli
+except ImportError:  # opcional: sem ele só há variantes gzip
+    brotli = None
+
+
+PASTA_DIST = 'dist'
+MANIFESTO = 'manifest.json'
+PASTAS_FONTE = ('css', 'js', 'fontes', 'imagens', 'otimizadas')
+EXTENSOES_COMPRIMIVEIS = {'.css', '.js', '.svg', '.json', '.otf', '.ttf', '.txt'}
+# Variante comprimida só vale a pena abaixo desta fração do original
+GANHO_MINIMO = 0.9
+CACHE_IMUTAVEL = 'public, max-age=31536000, immutable'
+
+_URL_CSS = re.compile(r'''url\(\s*(['"]?)([^'")]+)\1\s*\)''')
+
+
+def _nome_com_hash(caminho, conteudo):
+    raiz, extensao = posixpath.splitext(caminho)
+    return f'{raiz}.{hashlib.sha256(conteudo).hexdigest()[:10]}{extensao}'
+
+
+def _reescrever_css(conteudo, caminho, arquivos):
+    """Troca `url(...)` relativos a outros assets pelos nomes com hash."""
+    pasta = posixpath.dirname(caminho)
+
+    def trocar(m):
+        alvo = m.group(2)
+        if ':' in alvo or alvo.startswith(('/', '#')):
+            return m.group(0)
+        logico = posixpath.normpath(posixpath.join(pasta, alvo))
+        entrada = arquivos.get(logico)
+        if entrada is None:
+            return m.group(0)
+        return f"url({m.group(1)}{posixpath.relpath(entrada['caminho'], pasta)}{m.group(1)})"
+
+    return _URL_CSS.sub(trocar, conteudo.decode('utf-8')).encode('utf-8')
+
+
+def _gravar_variantes(destino, conteudo):
+    variantes = []
+    comprimido = gzip.compress(conteudo, compresslevel=9, mtime=0)
+    if len(comprimido) < len(conteudo) * GANHO_MINIMO:
+        with open(destino + '.gz', 'wb') as f:
+            f.write(comprimido)
+        variantes.append('gzip')
+    if brotli is not None:
+        comprimido = brotli.compress(conteudo, quality=11)
+        if len(comprimido) < len(conteudo) * GANHO_MINIMO:
+            with open(destino + '.br', 'wb') as f:
+                f.write(comprimido)
+            variantes.append('br')
+    return variantes
+
+
+def construir(pasta_static):
+    """Gera `static/dist/` e o manifesto; retorna o manifesto."""
+    dist = os.path.join(pasta_static, PASTA_DIST)
+    if os.path.isdir(dist):
+        shutil.rmtree(dist)
+    fontes = []
+    for pasta in PASTAS_FONTE:
+        for raiz, _, nomes in os.walk(os.path.join(pasta_static, pasta)):
+            for nome in sorted(nomes):
+                absoluto = os.path.join(raiz, nome)
+                fontes.append(os.path.relpath(absoluto, pasta_static).replace(os.sep, '/'))
+    # CSS por último: suas referências apontam para fontes e imagens já com hash
+    fontes.sort(key=lambda c: (c.endswith('.css'), c))
+
+    arquivos = {}
+    for caminho in fontes:
+        with open(os.path.join(pasta_static, caminho), 'rb') as f:
+            conteudo = f.read()
+        if caminho.endswith('.css'):
+            conteudo = _reescrever_css(conteudo, caminho, arquivos)
+        versionado = _nome_com_hash(caminho, conteudo)
+        destino = os.path.join(dist, *versionado.split('/'))
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        with open(destino, 'wb') as f:
+            f.write(conteudo)
+        variantes = []
+        if posixpath.splitext(caminho)[1].lower() in EXTENSOES_COMPRIMIVEIS:
+            variantes = _gravar_variantes(destino, conteudo)
+        arquivos[caminho] = {'caminho': versionado, 'bytes': len(conteudo), 'variantes': variantes}
+
+    manifesto = {'arquivos': arquivos}
+    with open(os.path.join(dist, MANIFESTO), 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, ensure_ascii=False, indent=1, sort_keys=True)
+    return manifesto
+
+
+def _escolher_variante(variantes):
+    """Melhor codificação aceita pelo navegador entre as variantes gravadas."""
+    aceitas = request.accept_encodings
+    for codificacao in ('br', 'gzip'):
+        if codificacao in variantes and aceitas[codificacao]:
+            return codificacao
+    return None
+
+
+class AssetsVersionados:
+    """Liga o manifesto de `static/dist/` ao `url_for('static', ...)` de um app Flask."""
+
+    def __init__(self):
+        self.arquivos = {}
+        self._por_versionado = {}
+        self._pasta = None
+
+    def carregar(self, pasta_static):
+        """Lê o manifesto; entradas cujo fonte mudou depois do build são ignoradas."""
+        self.arquivos, self._por_versionado = {}, {}
+        caminho = os.path.join(pasta_static, PASTA_DIST, MANIFESTO)
+        try:
+            gerado_em = os.path.getmtime(caminho)
+            with open(caminho, encoding='utf-8') as f:
+                arquivos = json.load(f)['arquivos']
+        except FileNotFoundError:
+            return
+        except Exception:
+            logging.exception('Manifesto de estáticos inválido em %s', caminho)
+            return
+        desatualizados = []
+        for logico, entrada in arquivos.items():
+            try:
+                if os.path.getmtime(os.path.join(pasta_static, logico)) > gerado_em:
+                    desatualizados.append(logico)
+                    continue
+            except OSError:
+                continue
+            self.arquivos[logico] = entrada
+            self._por_versionado[entrada['caminho']] = entrada
+        if desatualizados:
+            logging.warning('Estáticos alterados depois do build (servidos sem hash): %s',
+                            ', '.join(desatualizados))
+
+    def init_app(self, app):
+        self.carregar(app.static_folder)
+        self._pasta = os.path.join(app.static_folder, PASTA_DIST)
+        app.url_defaults(self._url_defaults)
+        app.add_url_rule(f'{app.static_url_path}/{PASTA_DIST}/<path:filename>',
+                         'estatico_versionado', self.servir)
+
+    def _url_defaults(self, endpoint, values):
+        if endpoint == 'static':
+            entrada = self.arquivos.get(values.get('filename'))
+            if entrada is not None:
+                values['filename'] = f"{PASTA_DIST}/{entrada['caminho']}"
+
+    def servir(self, filename):
+        """Arquivo com hash: imutável e na variante comprimida aceita (Vary: Accept-Encoding)."""
+        entrada = self._por_versionado.get(filename)
+        if entrada is None:
+            abort(404)
+        codificacao = _escolher_variante(entrada['variantes'])
+        sufixo = {'br': '.br', 'gzip': '.gz'}.get(codificacao, '')
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        resposta = send_from_directory(self._pasta, filename + sufixo, mimetype=mimetype)
+        if codificacao:
+            resposta.headers['Content-Encoding'] = codificacao
+        if entrada['variantes']:
+            resposta.vary.add('Accept-Encoding')
+        resposta.headers['Cache-Control'] = CACHE_IMUTAVEL
+        return resposta
+
+
+# Instância compartilhada (ligada ao app em create_app)
+assets_versionados = AssetsVersionados()
@@ -0,0 +1,194 @@
+"""Fila de gravação em lote (group commit) para respostas dos alunos.
+
+Quando muitos alunos lançam a missão ao mesmo tempo, cada INSERT isolado
+disputa a trava de escrita do SQLite e faz seu próprio commit. A fila
+concentra as respostas em uma única thread escritora, que grava várias
+linhas por transação a cada poucos milissegundos (ou a cada `max_lote`).
+
+Modos de confirmação:
+- com espera (durável): `registrar` só retorna após o commit do lote;
+- sem espera (fire-and-forget): retorna imediatamente, o commit vem depois.
+
+A espera é limitada por `timeout_confirmacao`: se a thread escritora não
+começou a gravar a resposta nesse prazo, ela é retirada da fila e `registrar`
+levanta `TimeoutError` (o chamador grava diretamente).
+"""
+
+import atexit
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+
+
+_PARAR = object()
+
+
+class FilaRespostas:
+    """Thread escritora única que agrupa inserções em transações maiores.
+
+    `gravar_lote(lista_de_parametros)` deve inserir todas as linhas em uma
+    transação e devolver a lista de ids na mesma ordem.
+    """
+
+    def __init__(self, gravar_lote, intervalo_ms=5, max_lote=200, max_pendentes=5000,
+                 aguardar_confirmacao=True, timeout_enfileirar=2.0, timeout_confirmacao=5.0):
+        self._gravar_lote = gravar_lote
+        self.intervalo = intervalo_ms / 1000
+        self.max_lote = max_lote
+        self.aguardar_confirmacao = aguardar_confirmacao
+        self.timeout_enfileirar = timeout_enfileirar
+        self.timeout_confirmacao = timeout_confirmacao
+        self._fila = queue.Queue(maxsize=max_pendentes)
+        self._trava_metricas = threading.Lock()
+        self._metricas = {
+            'enfileiradas': 0,
+            'gravadas': 0,
+            'falhas': 0,
+            'lotes': 0,
+            'maior_lote': 0,
+            'flush_total_ms': 0.0,
+            'ultimo_flush_ms': 0.0,
+            'esperas_backpressure': 0,
+            'rejeitadas_fila_cheia': 0,
+            'expiradas': 0,
+        }
+        self._thread = threading.Thread(target=self._executar, name='fila-respostas', daemon=True)
+        self._thread.start()
+        atexit.register(self.parar)
+
+    # --- API pública ---
+    def registrar(self, params, aguardar=None):
+        """Enfileira uma resposta; com espera, devolve o id após o commit.
+
+        Levanta `queue.Full` se a fila continuar cheia após `timeout_enfileirar`
+        e `TimeoutError` se a gravação não começou em `timeout_confirmacao`
+        (a resposta sai da fila); o chamador decide se grava diretamente ou descarta.
+        """
+        if aguardar is None:
+            aguardar = self.aguardar_confirmacao
+        futuro = Future()
+        self._enfileirar((params, futuro))
+        with self._trava_metricas:
+            self._metricas['enfileiradas'] += 1
+        if not aguardar:
+            return None
+        try:
+            return futuro.result(timeout=self.timeout_confirmacao)
+        except TimeoutError:
+            # Só desiste se a escritora ainda não pegou a resposta (evita gravar duas vezes)
+            if futuro.cancel():
+                with self._trava_metricas:
+                    self._metricas['expiradas'] += 1
+                raise
+        return futuro.result()
+
+    def flush(self, timeout=None):
+        """Bloqueia até que tudo o que foi enfileirado antes da chamada esteja gravado."""
+        marcador = Future()
+        self._enfileirar((None, marcador))
+        return marcador.result(timeout=timeout)
+
+    def parar(self):
+        """Grava o que estiver pendente e encerra a thread escritora."""
+        if not self._thread.is_alive():
+            return
+        self._fila.put(_PARAR)
+        self._thread.join()
+
+    def metricas(self):
+        """Retrato das métricas de flush e de backpressure da fila."""
+        with self._trava_metricas:
+            dados = dict(self._metricas)
+        lotes = dados['lotes']
+        dados['pendentes'] = self._fila.qsize()
+        dados['capacidade'] = self._fila.maxsize
+        dados['media_lote'] = (dados['gravadas'] / lotes) if lotes else 0.0
+        dados['media_flush_ms'] = (dados['flush_total_ms'] / lotes) if lotes else 0.0
+        return dados
+
+    # --- Implementação ---
+    def _enfileirar(self, item):
+        try:
+            self._fila.put_nowait(item)
+            return
+        except queue.Full:
+            with self._trava_metricas:
+                self._metricas['esperas_backpressure'] += 1
+        try:
+            self._fila.put(item, timeout=self.timeout_enfileirar)
+        except queue.Full:
+            with self._trava_metricas:
+                self._metricas['rejeitadas_fila_cheia'] += 1
+            raise
+
+    def _executar(self):
+        parar = False
+        while not parar:
+            item = self._fila.get()
+            if item is _PARAR:
+                break
+            lote = [item]
+            limite = time.monotonic() + self.intervalo
+            # Acumula até o fim da janela, até max_lote ou até um flush explícito
+            while len(lote) < self.max_lote and lote[-1][0] is not None:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    break
+                try:
+                    proximo = self._fila.get(timeout=restante)
+                except queue.Empty:
+                    break
+                if proximo is _PARAR:
+                    parar = True
+                    break
+                lote.append(proximo)
+            self._gravar(lote)
+        # Drena o que sobrou antes de encerrar
+        restantes = []
+        while True:
+            try:
+                item = self._fila.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _PARAR:
+                restantes.append(item)
+        if restantes:
+            self._gravar(restantes)
+
+    def _gravar(self, lote):
+        # Respostas canceladas por timeout em `registrar` já foram gravadas pelo chamador
+        lote = [(params, futuro) for params, futuro in lote if futuro.set_running_or_notify_cancel()]
+        respostas = [(params, futuro) for params, futuro in lote if params is not None]
+        marcadores = [futuro for params, futuro in lote if params is None]
+        if respostas:
+            inicio = time.perf_counter()
+            gravadas = falhas = 0
+            try:
+                ids = self._gravar_lote([params for params, _ in respostas])
+                for (_, futuro), novo_id in zip(respostas, ids):
+                    futuro.set_result(novo_id)
+                gravadas = len(respostas)
+            except Exception:
+                # Um registro inválido não deve derrubar o lote: regrava individualmente
+                logging.exception('Falha no commit em lote; regravando respostas individualmente')
+                for params, futuro in respostas:
+                    try:
+                        futuro.set_result(self._gravar_lote([params])[0])
+                        gravadas += 1
+                    except Exception as exc:
+                        logging.exception('Falha ao gravar resposta enfileirada')
+                        futuro.set_exception(exc)
+                        falhas += 1
+            duracao_ms = (time.perf_counter() - inicio) * 1000
+            with self._trava_metricas:
+                m = self._metricas
+                m['gravadas'] += gravadas
+                m['falhas'] += falhas
+                m['lotes'] += 1
+                m['maior_lote'] = max(m['maior_lote'], len(respostas))
+                m['flush_total_ms'] += duracao_ms
+                m['ultimo_flush_ms'] = duracao_ms
+        for futuro in marcadores:
+            futuro.set_result(True)
@@ -0,0 +1,128 @@
+"""Sprite SVG único com os ícones do editor de Habitat.
+
+Os ícones de `templates/icons` viram `<symbol id="icone-<chave>">` de um só
+SVG, com as chaves do editor (os valores do `mapper` de `habitat()`). O editor
+baixa o sprite uma vez e usa `<use href="#icone-<chave>">` em cada peça, em vez
+de um pedido por ícone.
+
+O sprite é servido em `/icons/sprite.svg?v=<versao>` com cache imutável: a
+versão é o hash do conteúdo, então um ícone alterado muda a URL. Quando
+`scripts/otimizar_imagens.py` já gravou o sprite em `static/otimizadas/` (com
+os PNGs embutidos recodificados em WebP), é ele que vai; senão o sprite é
+montado no primeiro uso a partir dos arquivos, só minificados.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import threading
+
+from services.imagens import PASTA_SAIDA, minificar_svg
+
+
+ARQUIVO_SPRITE = 'icones-habitat.svg'
+
+# Chave do editor -> arquivo em templates/icons
+ICONES_HABITAT = {
+    'suporte': 'suportevida.svg',
+    'habitacional': 'privado.svg',
+    'refeicoes': 'refeicao.svg',
+    'medico': 'medicina.svg',
+    'exercicios': 'exercicio.svg',
+    'trabalho': 'pesquisa.svg',
+    'armazenamento': 'armazenagem.svg',
+    'sanitario': 'sanitario.svg',
+    'blindagem': 'blindagem.svg',
+    'inflavel': 'inflavel.svg',
+    'airlock': 'airlock.svg',
+    'tesserae': 'tesserea.svg',
+    'cultura': 'cultura.svg',
+    'robotico': 'robotica.svg',
+    'hidroponia': 'hidroponia.svg',
+    'controle': 'controle.svg',
+    'multifuncional': 'multifuncional.svg',
+    'imp3d': 'impressora.svg',
+}
+
+_RAIZ_SVG = re.compile(r'<svg\b([^>]*)>(.*)</svg>', re.S)
+_VIEWBOX = re.compile(r'''viewBox=(["'])([^"']+)\1''')
+_LARGURA_ALTURA = re.compile(r'''\b(width|height)=(["'])([\d.]+)\2''')
+_ID = re.compile(r'''\sid=(["'])([^"']+)\1''')
+
+
+def _simbolo(chave, texto):
+    """`<symbol>` do ícone, com ids prefixados pela chave (os exports do Figma repetem ids)."""
+    m = _RAIZ_SVG.search(texto)
+    if m is None:
+        raise ValueError('arquivo sem elemento <svg>')
+    atributos, corpo = m.groups()
+    viewbox = _VIEWBOX.search(atributos)
+    if viewbox is not None:
+        viewbox = viewbox.group(2)
+    else:
+        medidas = {nome: valor for nome, _, valor in _LARGURA_ALTURA.findall(atributos)}
+        viewbox = f"0 0 {medidas.get('width', 100)} {medidas.get('height', 100)}"
+    for _, id_ in _ID.findall(corpo):
+        novo = f'{chave}-{id_}'
+        corpo = re.sub(rf'''(\s)id=(["']){re.escape(id_)}\2''', rf'\1id="{novo}"', corpo)
+        corpo = corpo.replace(f'url(#{id_})', f'url(#{novo})')
+        corpo = re.sub(rf'''href=(["'])#{re.escape(id_)}\1''', f'href="#{novo}"', corpo)
+    return f'<symbol id="icone-{chave}" viewBox="{viewbox}">{corpo}</symbol>'
+
+
+def montar_sprite(pasta_icones, recodificar=True):
+    """SVG com um `<symbol>` por chave de `ICONES_HABITAT` (ícones ilegíveis ficam de fora)."""
+    simbolos = []
+    for chave, arquivo in ICONES_HABITAT.items():
+        try:
+            with open(os.path.join(pasta_icones, arquivo), encoding='utf-8') as f:
+                simbolos.append(_simbolo(chave, minificar_svg(f.read(), recodificar)))
+        except Exception:
+            logging.exception('Ícone %s (%s) fora do sprite', chave, arquivo)
+    # Sem display:none: padrões e recortes de símbolos ocultos assim não são pintados
+    return ('<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+            'width="0" height="0" style="position:absolute" aria-hidden="true">'
+            + ''.join(simbolos) + '</svg>')
+
+
+class SpriteIcones:
+    """Sprite do editor de Habitat em memória, montado no primeiro uso."""
+
+    def __init__(self):
+        self.pasta_icones = None
+        self.pasta_static = None
+        self._sprite = None  # (versao, bytes)
+        self._trava = threading.Lock()
+
+    def init_app(self, app):
+        self.pasta_icones = os.path.join(app.root_path, 'templates', 'icons')
+        self.pasta_static = app.static_folder
+        self._sprite = None
+
+    def _carregar(self):
+        pronto = os.path.join(self.pasta_static, PASTA_SAIDA, ARQUIVO_SPRITE)
+        try:
+            with open(pronto, 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return montar_sprite(self.pasta_icones, recodificar=False).encode('utf-8')
+
+    def obter(self):
+        """`(versao, conteudo)` do sprite."""
+        sprite = self._sprite
+        if sprite is None:
+            with self._trava:
+                if self._sprite is None:
+                    conteudo = self._carregar()
+                    self._sprite = (hashlib.sha1(conteudo).hexdigest()[:16], conteudo)
+                sprite = self._sprite
+        return sprite
+
+    @property
+    def versao(self):
+        return self.obter()[0]
+
+
+# Instância compartilhada (ligada ao app em create_app)
+sprite_icones = SpriteIcones()
@@ -0,0 +1,194 @@
+"""Otimização das imagens do catálogo e `<picture>` responsivo nos templates.
+
+`otimizar(pasta_static)` (via `python scripts/otimizar_imagens.py`) lê
+`static/imagens/` e grava em `static/otimizadas/`:
+
+- PNG/JPEG: cópias redimensionadas em `LARGURAS` (até a largura original),
+  em WebP e no formato original, sem metadados;
+- SVG: sem comentários, metadados e espaços entre tags; os rasters embutidos
+  (os SVGs exportados do Figma são basicamente um PNG em base64) são
+  recodificados em WebP quando isso reduz o tamanho.
+
+O manifesto `static/otimizadas/imagens.json` liga cada imagem original às
+variantes. O helper `imagem(...)` dos templates monta `<picture>` com
+`srcset`/`sizes` a partir dele; sem manifesto (ou sem a imagem nele), gera o
+`<img>` simples de antes. Rode antes de `scripts/construir_estaticos.py` para
+as variantes também ganharem hash e cache imutável.
+
+Redimensionar e recodificar exige o pacote opcional Pillow; sem ele só os SVGs
+são minificados (com os rasters embutidos intactos).
+"""
+
+import base64
+import io
+import json
+import logging
+import os
+import re
+import shutil
+
+from flask import url_for
+from markupsafe import Markup, escape
+
+
+PASTA_ORIGEM = 'imagens'
+PASTA_SAIDA = 'otimizadas'
+MANIFESTO = 'imagens.json'
+LARGURAS = (160, 320, 640, 1280)
+QUALIDADE_WEBP = 80
+QUALIDADE_JPEG = 82
+# Largura usada no `src` de fallback (navegadores sem srcset)
+LARGURA_FALLBACK = 640
+
+_COMENTARIO_SVG = re.compile(r'<!--.*?-->', re.S)
+_METADADOS_SVG = re.compile(r'<(metadata|title|desc)\b.*?</\1>', re.S)
+_ENTRE_TAGS = re.compile(r'>\s+<')
+_RASTER_EMBUTIDO = re.compile(r'data:image/(png|jpeg|jpg);base64,([A-Za-z0-9+/=\s]+)')
+
+
+def pillow():
+    """Módulo `PIL.Image`, ou None sem Pillow (importado só pelo otimizador, não na subida do app)."""
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    return Image
+
+def _recodificar_raster(m):
+    Image = pillow()
+    original = base64.b64decode(re.sub(r'\s+', '', m.group(2)))
+    saida = io.BytesIO()
+    with Image.open(io.BytesIO(original)) as imagem:
+        imagem.save(saida, 'WEBP', quality=QUALIDADE_WEBP, method=6)
+    if saida.tell() >= len(original):
+        return m.group(0)
+    return 'data:image/webp;base64,' + base64.b64encode(saida.getvalue()).decode('ascii')
+
+
+def minificar_svg(texto, recodificar=True):
+    """SVG sem comentários, metadados e espaços entre tags; rasters embutidos em WebP (com Pillow)."""
+    texto = _COMENTARIO_SVG.sub('', texto)
+    texto = _METADADOS_SVG.sub('', texto)
+    texto = _ENTRE_TAGS.sub('><', texto.strip())
+    if recodificar and pillow() is not None:
+        texto = _RASTER_EMBUTIDO.sub(_recodificar_raster, texto)
+    return texto
+
+
+def _variantes_raster(Image, origem, nome, destino):
+    raiz, extensao = os.path.splitext(nome)
+    formato = 'JPEG' if extensao.lower() in ('.jpg', '.jpeg') else 'PNG'
+    with Image.open(origem) as imagem:
+        imagem.load()
+        largura, altura = imagem.size
+        # A maior variante é a original (limitada à maior largura), para telas de alta densidade
+        larguras = sorted({w for w in LARGURAS if w < largura} | {min(largura, LARGURAS[-1])})
+        webp, fallback = [], []
+        for w in larguras:
+            h = max(round(altura * w / largura), 1)
+            reduzida = imagem.resize((w, h), Image.LANCZOS) if w != largura else imagem.copy()
+            caminho_webp = f'{PASTA_SAIDA}/{raiz}-{w}.webp'
+            reduzida.save(os.path.join(destino, f'{raiz}-{w}.webp'), 'WEBP', quality=QUALIDADE_WEBP, method=6)
+            webp.append((w, caminho_webp))
+            caminho_fallback = f'{PASTA_SAIDA}/{raiz}-{w}{extensao.lower()}'
+            arquivo_fallback = os.path.join(destino, f'{raiz}-{w}{extensao.lower()}')
+            if formato == 'JPEG':
+                reduzida.convert('RGB').save(arquivo_fallback, 'JPEG', quality=QUALIDADE_JPEG,
+                                             optimize=True, progressive=True)
+            else:
+                reduzida.save(arquivo_fallback, 'PNG', optimize=True)
+            fallback.append((w, caminho_fallback))
+    return {'largura': largura, 'altura': altura, 'webp': webp, 'fallback': fallback}
+
+
+def otimizar(pasta_static):
+    """Gera `static/otimizadas/` e o manifesto; retorna `{imagem: entrada}`."""
+    origem = os.path.join(pasta_static, PASTA_ORIGEM)
+    destino = os.path.join(pasta_static, PASTA_SAIDA)
+    if os.path.isdir(destino):
+        shutil.rmtree(destino)
+    os.makedirs(destino)
+    Image = pillow()
+    imagens = {}
+    for nome in sorted(os.listdir(origem)):
+        caminho = os.path.join(origem, nome)
+        extensao = os.path.splitext(nome)[1].lower()
+        logico = f'{PASTA_ORIGEM}/{nome}'
+        try:
+            if extensao == '.svg':
+                with open(caminho, encoding='utf-8') as f:
+                    texto = minificar_svg(f.read())
+                with open(os.path.join(destino, nome), 'w', encoding='utf-8') as f:
+                    f.write(texto)
+                imagens[logico] = {'svg': f'{PASTA_SAIDA}/{nome}'}
+            elif extensao in ('.png', '.jpg', '.jpeg') and Image is not None:
+                imagens[logico] = _variantes_raster(Image, caminho, nome, destino)
+        except Exception:
+            logging.exception('Falha ao otimizar %s; a original continua sendo usada', logico)
+    with open(os.path.join(destino, MANIFESTO), 'w', encoding='utf-8') as f:
+        json.dump(imagens, f, ensure_ascii=False, indent=1, sort_keys=True)
+    return imagens
+
+
+def _atributos(atributos):
+    return ''.join(
+        f' {escape(nome.rstrip("_"))}="{escape(valor)}"'
+        for nome, valor in atributos.items() if valor is not None
+    )
+
+
+def _srcset(variantes):
+    return ', '.join(f"{url_for('static', filename=caminho)} {w}w" for w, caminho in variantes)
+
+
+class ImagensResponsivas:
+    """Manifesto de `static/otimizadas/` e o helper `imagem(...)` dos templates."""
+
+    def __init__(self):
+        self.imagens = {}
+        self._sem_caixa = {}
+
+    def carregar(self, pasta_static):
+        caminho = os.path.join(pasta_static, PASTA_SAIDA, MANIFESTO)
+        try:
+            with open(caminho, encoding='utf-8') as f:
+                self.imagens = json.load(f)
+        except FileNotFoundError:
+            self.imagens = {}
+        except Exception:
+            logging.exception('Manifesto de imagens inválido em %s', caminho)
+            self.imagens = {}
+        # O catálogo nem sempre acerta maiúsculas ('lua.png' x 'Lua.png')
+        self._sem_caixa = {logico.lower(): entrada for logico, entrada in self.imagens.items()}
+
+    def init_app(self, app):
+        self.carregar(app.static_folder)
+        app.add_template_global(self.imagem, 'imagem')
+
+    def imagem(self, caminho, sizes='100vw', **atributos):
+        """`<picture>` com WebP e fallback em `srcset` (ou `<img>` simples sem variantes).
+
+        `caminho` é relativo a `static/` (ex.: `imagens/Falcon9.png`); demais
+        argumentos viram atributos do `<img>` (`class_` para `class`).
+        """
+        entrada = self.imagens.get(caminho) or self._sem_caixa.get(caminho.lower())
+        if entrada is None or 'svg' in entrada:
+            alvo = entrada['svg'] if entrada else caminho
+            return Markup(f"<img src=\"{url_for('static', filename=alvo)}\"{_atributos(atributos)}>")
+        fallback = [v for v in entrada['fallback'] if v[0] <= LARGURA_FALLBACK] or entrada['fallback'][:1]
+        img = {
+            'src': url_for('static', filename=fallback[-1][1]),
+            'srcset': _srcset(entrada['fallback']),
+            'sizes': sizes,
+            'width': entrada['largura'],
+            'height': entrada['altura'],
+        }
+        img.update(atributos)
+        return Markup(
+            f'<picture><source type="image/webp" srcset="{_srcset(entrada["webp"])}" sizes="{escape(sizes)}">'
+            f'<img{_atributos(img)}></picture>'
+        )
+
+
+# Instância compartilhada (ligada ao app em create_app)
+imagens_responsivas = ImagensResponsivas()
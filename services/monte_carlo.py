@@ -0,0 +1,349 @@
+"""Estimativa Monte Carlo da chance de chegada de uma carga (destino, nave, módulos).
+
+Usa as mesmas tabelas de eventos de `services.simulacao` e as mesmas regras
+de `calcular_resultado_e_pontos`. Como massa e módulos essenciais não mudam
+entre viagens, o resultado de cada viagem depende só de quais módulos foram
+avariados e de quantas reservas (energia, água) acabaram. As reservas
+dependem só de quantos turnos tiveram cada tipo de evento, então cada amostra
+sorteia essas contagens (multinomial como binomiais sucessivas, por CDFs
+pré-calculadas, sem percorrer turno a turno) e quais módulos foram atingidos.
+Pontuação e chegada saem das regras por número de avarias e de esgotamentos.
+
+As amostras rodam em lotes de `TAMANHO_LOTE` com sementes derivadas da
+semente pedida, então o resultado é o mesmo com ou sem o pool de processos
+(`configurar(processos=...)`). Resultados ficam em cache por
+(versão do catálogo, destino, nave, módulos, n, semente).
+"""
+
+import logging
+import math
+import random
+import threading
+from bisect import bisect_right
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from .data import obter_catalogo
+from .regras import RECURSOS, obter_regras
+from .simulacao import DESTINOS, TOLERANCIA_ORCAMENTO, avaliar_carga, resultado_com_avarias, tabela_destino
+
+
+N_PADRAO = 10_000
+N_MAXIMO = 1_000_000
+TAMANHO_LOTE = 100_000
+SEMENTE_PADRAO = 0
+# Combinações de contagens com probabilidade menor que isto são ignoradas
+_PROBABILIDADE_MINIMA = 1e-12
+
+_config = {'processos': 0}
+_pool = None
+_trava_pool = threading.Lock()
+
+
+def configurar(processos=0):
+    """Define quantos processos usar em estimativas com mais de um lote (0 = serial)."""
+    _config['processos'] = max(int(processos or 0), 0)
+
+
+def _executor():
+    global _pool
+    with _trava_pool:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=_config['processos'])
+        return _pool
+
+
+def probabilidade_avaria_por_turno(destino):
+    """Chance de um turno avariar algum módulo (evento sorteado com risco de avaria)."""
+    _, chance, sorteaveis, avaria = tabela_destino(destino)
+    return chance * len(avaria) / len(sorteaveis)
+
+
+@lru_cache(maxsize=4096)
+def _pmf_binomial(n, q):
+    p = (1 - q) ** n
+    if not 0 < q < 1 or p == 0.0:
+        return tuple(math.comb(n, k) * q ** k * (1 - q) ** (n - k) for k in range(n + 1))
+    # Recorrência P(k + 1) = P(k) × (n - k) / (k + 1) × q / (1 - q)
+    razao = q / (1 - q)
+    pmf = [p]
+    for k in range(n):
+        p *= (n - k) / (k + 1) * razao
+        pmf.append(p)
+    return tuple(pmf)
+
+
+@lru_cache(maxsize=4096)
+def _cdf_binomial(n, q):
+    """CDF de Binomial(n, q), montada uma vez por (n, q)."""
+    acumulado, cdf = 0.0, []
+    for p in _pmf_binomial(n, q):
+        acumulado += p
+        cdf.append(acumulado)
+    return cdf
+
+
+def categorias_turno(destino, plano):
+    """Tipos de turno que mudam o resultado e limite de consumo extra por recurso.
+
+    `categorias`: `((probabilidade, avaria, extras por recurso), ...)`, agrupando
+    eventos de mesmo efeito (turnos sem efeito ficam de fora). Uma reserva
+    esgota quando a soma dos extras da viagem passa do seu limite (em dias de
+    consumo): com orçamento `consumo × turnos × (1 + margem)` e consumo
+    líquido `consumo × (1 - reciclagem)`, o limite é
+    `turnos × (1 + margem) / (1 - reciclagem) - turnos`.
+    """
+    turnos, chance, sorteaveis, avaria = tabela_destino(destino)
+    grupos = Counter()
+    for e in sorteaveis:
+        extras = tuple(plano[r][2][e] for r in RECURSOS)
+        if e in avaria or any(extras):
+            grupos[(e in avaria, extras)] += 1
+    categorias = tuple((chance * n / len(sorteaveis), av, ex) for (av, ex), n in sorted(grupos.items()))
+    limites = []
+    for r in RECURSOS:
+        consumo, reciclagem, _, margem = plano[r]
+        if consumo > 0 and reciclagem < 1:
+            limites.append(turnos * (1 + margem) / (1 - reciclagem) - turnos)
+        else:
+            limites.append(math.inf)
+    return categorias, tuple(limites)
+
+
+def _etapas(categorias):
+    # Multinomial como binomiais sucessivas: probabilidade condicional de cada categoria
+    etapas, resto = [], 1.0
+    for p, avaria, extras in categorias:
+        etapas.append((min(p / resto, 1.0) if resto > 0 else 0.0, avaria, extras))
+        resto -= p
+    return etapas
+
+
+def _esgotou(soma, limite):
+    return soma > limite + TOLERANCIA_ORCAMENTO
+
+
+def distribuicao_avarias(destino, n_modulos):
+    """Distribuição exata do número de módulos distintos avariados: `[P(0), ..., P(n_modulos)]`.
+
+    Combina a binomial dos turnos com avaria com a ocupação de `n_modulos`
+    módulos sorteados ao acaso (referência para `services/carga_otima.py`).
+    """
+    if not n_modulos:
+        return (1.0,)
+    return _distribuicao_avarias(tabela_destino(destino)[0], probabilidade_avaria_por_turno(destino), n_modulos)
+
+
+@lru_cache(maxsize=None)
+def _distribuicao_avarias(turnos, q, n_modulos):
+    # Em cache pelos parâmetros (não pelo destino): muda junto com o catálogo
+    total = [0.0] * (n_modulos + 1)
+    ocupacao = [1.0] + [0.0] * n_modulos  # P(k distintos | d avarias), começando em d = 0
+    for d in range(turnos + 1):
+        peso = math.comb(turnos, d) * q ** d * (1 - q) ** (turnos - d)
+        for k, p in enumerate(ocupacao):
+            total[k] += peso * p
+        proxima = [0.0] * (n_modulos + 1)
+        for k, p in enumerate(ocupacao):
+            if p:
+                proxima[k] += p * k / n_modulos
+                if k < n_modulos:
+                    proxima[k + 1] += p * (n_modulos - k) / n_modulos
+        ocupacao = proxima
+    return tuple(total)
+
+
+def _intervalo_esgotamento(soma, extra, limite, n):
+    """Valores k em [0, n] com `soma + k × extra` acima do limite, como (início, fim)."""
+    alvo = limite + TOLERANCIA_ORCAMENTO - soma
+    if math.isinf(alvo):
+        return (1, 0) if alvo > 0 else (0, n)
+    if extra > 0:
+        return max(math.floor(alvo / extra) + 1, 0), n
+    if extra < 0:
+        return 0, min(math.ceil(alvo / extra) - 1, n)
+    return (0, n) if alvo < 0 else (1, 0)
+
+
+@lru_cache(maxsize=None)
+def distribuicao_esgotamento(destino, categorias, limites):
+    """Distribuição exata do número de reservas esgotadas: `[P(0), ..., P(len(limites))]`.
+
+    Soma sobre as contagens de cada tipo de evento que gasta recursos; a
+    última contagem entra por intervalos da CDF. Avarias ficam de fora
+    (ver `distribuicao_avarias`). Argumentos de `categorias_turno`.
+    """
+    turnos = tabela_destino(destino)[0]
+    # Só as categorias que gastam recursos; as demais entram no "resto" da multinomial
+    etapas = [(q, extras) for q, _, extras in _etapas(tuple(c for c in categorias if any(c[2])))]
+    total = [0.0] * (len(limites) + 1)
+    if not etapas or all(math.isinf(lim) for lim in limites):
+        total[sum(_esgotou(0.0, lim) for lim in limites)] = 1.0
+        return tuple(total)
+
+    def percorrer(i, restantes, somas, peso):
+        q, extras = etapas[i]
+        if i == len(etapas) - 1:
+            cdf = _cdf_binomial(restantes, q)
+            intervalos = [_intervalo_esgotamento(s, x, lim, restantes) for s, x, lim in zip(somas, extras, limites)]
+            intervalos = [(ini, fim) for ini, fim in intervalos if ini <= fim]
+            cortes = sorted({0, restantes + 1, *(c for ini, fim in intervalos for c in (ini, fim + 1))})
+            for a, b in zip(cortes, cortes[1:]):
+                p = cdf[b - 1] - (cdf[a - 1] if a else 0.0)
+                total[sum(ini <= a <= fim for ini, fim in intervalos)] += peso * p
+            return
+        for k, p in enumerate(_pmf_binomial(restantes, q)):
+            if peso * p >= _PROBABILIDADE_MINIMA:
+                percorrer(i + 1, restantes - k, [s + k * x for s, x in zip(somas, extras)], peso * p)
+
+    percorrer(0, turnos, [0.0] * len(limites), 1.0)
+    return tuple(total)
+
+
+def _amostrar_lote(destino, n_modulos, categorias, limites, n, semente):
+    """Conta `(módulos avariados (índices), reservas esgotadas)` em `n` viagens."""
+    resultados = Counter()
+    turnos = tabela_destino(destino)[0]
+    # Por categoria: CDFs indexadas pelos turnos ainda sem categoria (montadas sob demanda)
+    etapas = [([None] * (turnos + 1), q, avaria, extras) for q, avaria, extras in _etapas(categorias)]
+    rng = random.Random(semente)
+    sortear, escolher, indices = rng.random, rng.choices, range(n_modulos)
+    nenhum = frozenset()
+    esgotados_por_contagem = {}
+    for _ in range(n):
+        # Quantos turnos de cada tipo; cada avaria atinge um módulo a bordo ao acaso
+        restantes, d = turnos, 0
+        contagens = []
+        for cdfs, q, avaria, _ in etapas:
+            cdf = cdfs[restantes]
+            if cdf is None:
+                cdf = cdfs[restantes] = _cdf_binomial(restantes, q)
+            k = bisect_right(cdf, sortear())
+            if k > restantes:
+                k = restantes
+            contagens.append(k)
+            restantes -= k
+            if avaria:
+                d += k
+        contagens = tuple(contagens)
+        esgotados = esgotados_por_contagem.get(contagens)
+        if esgotados is None:
+            somas = [sum(k * e[3][i] for k, e in zip(contagens, etapas)) for i in range(len(limites))]
+            esgotados = esgotados_por_contagem[contagens] = tuple(
+                _esgotou(soma, lim) for soma, lim in zip(somas, limites)
+            )
+        avariados = frozenset(escolher(indices, k=d)) if d and n_modulos else nenhum
+        resultados[(avariados, esgotados)] += 1
+    return resultados
+
+
+def _lotes(n, semente):
+    rng = random.Random(semente)
+    lotes = []
+    while n > 0:
+        tamanho = min(n, TAMANHO_LOTE)
+        lotes.append((tamanho, rng.getrandbits(63)))
+        n -= tamanho
+    return lotes
+
+
+def _validar(catalogo, destino, nave_id, modulos, n):
+    if destino not in DESTINOS:
+        raise ValueError(f'destino inválido: {destino}')
+    if nave_id not in catalogo.naves:
+        raise ValueError(f'nave inválida: {nave_id}')
+    desconhecidos = [m for m in modulos if m not in catalogo.modulos]
+    if desconhecidos:
+        raise ValueError(f"módulos inválidos: {', '.join(desconhecidos)}")
+    if not 1 <= n <= N_MAXIMO:
+        raise ValueError(f'n deve estar entre 1 e {N_MAXIMO}')
+
+
+def estimar_chegada(destino, nave_id, modulos_ids, n=N_PADRAO, semente=SEMENTE_PADRAO):
+    """Roda `n` viagens da carga e retorna chance de chegada, pontuações e avarias.
+
+    Levanta ValueError para destino, nave ou módulos desconhecidos.
+    O dicionário retornado é compartilhado pelo cache; não altere.
+    """
+    modulos = tuple(sorted(set(modulos_ids)))
+    try:
+        n, semente = int(n), int(semente)
+    except (TypeError, ValueError):
+        raise ValueError('n e semente devem ser inteiros')
+    catalogo = obter_catalogo()
+    _validar(catalogo, destino, nave_id, modulos, n)
+    return _estimar(catalogo.versao, destino, nave_id, modulos, n, semente)
+
+
+@lru_cache(maxsize=256)
+def _estimar(versao_catalogo, destino, nave_id, modulos, n, semente):
+    lotes = _lotes(n, semente)
+    regras = obter_regras()
+    categorias, limites = categorias_turno(destino, regras.plano_recursos(destino, regras.mascara(modulos)))
+    avariados = Counter()
+    if _config['processos'] > 1 and len(lotes) > 1:
+        try:
+            args = [(destino, len(modulos), categorias, limites, tamanho, s) for tamanho, s in lotes]
+            for parcial in _executor().map(_amostrar_lote_args, args):
+                avariados.update(parcial)
+        except Exception:
+            logging.exception('Falha no pool de processos do Monte Carlo; seguindo em série')
+            avariados.clear()
+            lotes_seriais = lotes
+        else:
+            lotes_seriais = []
+    else:
+        lotes_seriais = lotes
+    for tamanho, s in lotes_seriais:
+        avariados.update(_amostrar_lote(destino, len(modulos), categorias, limites, tamanho, s))
+
+    carga = avaliar_carga(destino, obter_catalogo().naves[nave_id], modulos)
+    por_quantidade = Counter()
+    por_modulo = Counter()
+    por_resultado = Counter()
+    esgotamentos = Counter()
+    for (conjunto, esgotados), vezes in avariados.items():
+        por_quantidade[len(conjunto)] += vezes
+        por_resultado[(len(conjunto), sum(esgotados))] += vezes
+        for i in conjunto:
+            por_modulo[modulos[i]] += vezes
+        for recurso, esgotou in zip(RECURSOS, esgotados):
+            if esgotou:
+                esgotamentos[recurso] += vezes
+
+    chegadas = 0
+    pontuacoes = Counter()
+    for (quantidade, esgotados), vezes in por_resultado.items():
+        chegou, pontos = resultado_com_avarias(carga, quantidade, esgotados)
+        chegadas += vezes if chegou else 0
+        pontuacoes[pontos] += vezes
+
+    p = chegadas / n
+    margem = 1.96 * math.sqrt(p * (1 - p) / n)
+    return {
+        'destino': destino,
+        'nave_id': nave_id,
+        'modulos': list(modulos),
+        'n': n,
+        'semente': semente,
+        'probabilidade_chegada': p,
+        'intervalo_95': [max(p - margem, 0.0), min(p + margem, 1.0)],
+        'massa_total': carga[4],
+        'capacidade_kg': carga[5],
+        'pontuacao': {
+            'media': sum(pts * vezes for pts, vezes in pontuacoes.items()) / n,
+            'minima': min(pontuacoes),
+            'maxima': max(pontuacoes),
+            'distribuicao': {str(pts): vezes for pts, vezes in sorted(pontuacoes.items())},
+        },
+        'avarias': {
+            'por_quantidade': {str(k): vezes for k, vezes in sorted(por_quantidade.items())},
+            'por_modulo': {m: por_modulo.get(m, 0) for m in modulos},
+        },
+        'recursos_esgotados': {r: esgotamentos.get(r, 0) for r in RECURSOS},
+    }
+
+
+def _amostrar_lote_args(args):
+    return _amostrar_lote(*args)
@@ -0,0 +1,87 @@
+"""Visão do dashboard do professor montada a partir de um único snapshot.
+
+Salas ativas (com seus desafios), inativas, estatísticas por sala e a flag
+`must_change` do admin saem da mesma transação de leitura (contagens vêm de
+`contadores_salas`, sem agregar o histórico de respostas). A visão fica em
+cache até a versão global de dados mudar; a flag, que é da sessão, não.
+"""
+
+import logging
+
+from .db import db_manager
+
+
+class PainelProfessor:
+    """Monta e guarda em cache o view model do dashboard do professor."""
+
+    def __init__(self, db):
+        self.db = db
+        self._cache = None  # (versao, painel)
+
+    def obter(self, admin=False):
+        """`(view model, must_change)` do dashboard.
+
+        O view model é compartilhado entre requisições, não altere;
+        `must_change` só é lido com `admin` (senão 0).
+        """
+        with self.db.snapshot_leitura():
+            must_change = self.db.obter_must_change_admin() if admin else 0
+            versao = self.db.versao_dados()
+            cache = self._cache
+            if cache is not None and cache[0] == versao:
+                return cache[1], must_change
+            ativas = self.db.listar_salas_ativas()
+            desafios = self.db.listar_desafios_salas_ativas()
+            inativas = self.db.listar_salas_inativas()
+            estatisticas_salas = self.db.obter_estatisticas_por_sala()
+
+        salas = [self._sala_ativa(d, desafios.get(d['id'], [])) for d in ativas]
+        painel = {
+            'versao': versao,
+            'salas': salas,
+            'salas_inativas': [self._sala_inativa(d) for d in inativas],
+            'estatisticas_salas': estatisticas_salas,
+            # Fora do snapshot: o placar em memória nunca está atrás da versão lida
+            'ranking': self._ranking(salas),
+        }
+        self._cache = (versao, painel)
+        return painel, must_change
+
+    def _ranking(self, salas):
+        try:
+            if len(salas) == 1 and salas[0].get('id'):
+                return self.db.obter_ranking_sala(salas[0]['id'], limit=50)
+            if len(salas) > 1:
+                return self.db.obter_ranking_salas_ativas(limit=100)
+        except Exception:
+            logging.exception('Falha ao obter ranking')
+        return []
+
+    @staticmethod
+    def _sala_ativa(d, desafios):
+        return {
+            'id': d.get('id'),
+            'codigo': d.get('codigo_sala'),
+            'nome_sala': d.get('nome_sala'),
+            'destino': d.get('destino'),
+            'nave_id': d.get('nave_id'),
+            'aluno_count': d.get('aluno_count') or 0,
+            'data_criacao': d.get('data_criacao'),
+            'desafios': desafios,
+            'desafio_selecionado_index': d.get('desafio_selecionado_index'),
+        }
+
+    @staticmethod
+    def _sala_inativa(d):
+        return {
+            'codigo': d.get('codigo_sala'),
+            'nome_sala': d.get('nome_sala'),
+            'destino': d.get('destino'),
+            'nave_id': d.get('nave_id'),
+            'aluno_count': d.get('aluno_count') or 0,
+            'data_criacao': d.get('data_criacao'),
+        }
+
+
+# Instância compartilhada (mesmo banco de `db_manager`)
+painel_professor = PainelProfessor(db_manager)
@@ -0,0 +1,144 @@
+"""Placar em memória (top-K) por sala, espelho de `placar_alunos`.
+
+O projetor da `/ranking-rodada` e o dashboard pedem o ranking a cada
+atualização; em vez de ir ao SQLite, a leitura sai de listas já ordenadas
+por `(total desc, nome)` mantidas em memória no processo.
+
+Regras de consistência:
+- cada sala é carregada sob demanda a partir do SQLite (após reinício ou
+  invalidação), sempre com a trava de escrita do banco segurada;
+- respostas gravadas pelo `DatabaseManager` aplicam o delta depois do commit,
+  ainda sob a mesma trava, então carga e atualização nunca se intercalam;
+- alterações de cadastro (novo aluno, exclusão do ranking, exclusão de sala)
+  apenas invalidam a sala, que é recarregada na próxima leitura;
+- cada sala guarda a `versoes_dados.versao` com que foi carregada; a leitura
+  recebe a versão atual do banco e recarrega a sala se ela mudou. Assim
+  gravações de outros processos (vários workers, scripts) aparecem na leitura
+  seguinte, sem servir um ranking antigo sob um ETag novo.
+
+Os deltas de uma gravação só são aplicados se a sala em memória estava na
+versão anterior a ela; senão a sala é descartada e recarregada.
+"""
+
+import heapq
+import threading
+from bisect import bisect_left, bisect_right, insort
+from itertools import islice
+
+
+class _PlacarSala:
+    """Ranking de uma sala: chaves ordenadas e dados por aluno."""
+
+    __slots__ = ('ordem', 'por_aluno', 'versao')
+
+    def __init__(self, versao=None):
+        self.ordem = []       # [(-total, nome, aluno_id)] em ordem crescente
+        self.por_aluno = {}   # aluno_id -> [nome, total, tentativas, concluidos]
+        self.versao = versao  # versoes_dados.versao da sala quando carregada
+
+
+class PlacarMemoria:
+    """Rankings por sala mantidos em memória com atualização write-through."""
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self._salas = {}
+
+    def instalar(self, sala_id, linhas, versao=None):
+        """Substitui o ranking da sala por `linhas` (aluno_id, nome, total, tentativas, concluidos)."""
+        sala = _PlacarSala(versao)
+        for aluno_id, nome, total, tentativas, concluidos in linhas:
+            sala.por_aluno[aluno_id] = [nome, total, tentativas, concluidos]
+            sala.ordem.append((-total, nome, aluno_id))
+        sala.ordem.sort()
+        with self._trava:
+            self._salas[sala_id] = sala
+        return sala
+
+    def invalidar(self, sala_id=None):
+        """Descarta o ranking de uma sala (ou de todas, sem argumento)."""
+        with self._trava:
+            if sala_id is None:
+                self._salas.clear()
+            else:
+                self._salas.pop(sala_id, None)
+
+    def registrar_respostas(self, versoes, respostas):
+        """Aplica os deltas de respostas já confirmadas (mesma regra do trigger).
+
+        `versoes` = {sala_id: (versao_antes, versao_depois)} da gravação; salas
+        em memória em outra versão que não a anterior são descartadas.
+        `respostas` = [(aluno_id, sala_id, correta, pontuacao)].
+        """
+        with self._trava:
+            for sala_id, (antes, depois) in versoes.items():
+                sala = self._salas.get(sala_id)
+                if sala is None:
+                    continue
+                if sala.versao != antes:
+                    del self._salas[sala_id]
+                else:
+                    sala.versao = depois
+            for aluno_id, sala_id, correta, pontuacao in respostas:
+                self._registrar_resposta(aluno_id, sala_id, correta, pontuacao)
+
+    def _registrar_resposta(self, aluno_id, sala_id, correta, pontuacao):
+        sala = self._salas.get(sala_id)
+        if sala is None:
+            return
+        dados = sala.por_aluno.get(aluno_id)
+        if dados is None:
+            # Aluno fora do ranking (excluído) ou de outra sala
+            return
+        nome, total, tentativas, concluidos = dados
+        novo_total = total + ((pontuacao or 0) if correta == 1 else 0)
+        if novo_total != total:
+            antiga = (-total, nome, aluno_id)
+            del sala.ordem[bisect_left(sala.ordem, antiga)]
+            insort(sala.ordem, (-novo_total, nome, aluno_id))
+        dados[1] = novo_total
+        dados[2] = tentativas + 1
+        dados[3] = concluidos + (1 if correta == 1 else 0)
+
+    def top(self, sala_id, limite, carregar, versoes=None):
+        """Primeiros `limite` alunos da sala; `carregar(sala_id)` instala a sala se ausente."""
+        return self.pagina([sala_id], limite, None, carregar, versoes)
+
+    def top_salas(self, sala_ids, limite, carregar, versoes=None):
+        """Ranking consolidado de várias salas (intercalação das listas ordenadas)."""
+        return self.pagina(sala_ids, limite, None, carregar, versoes)
+
+    def pagina(self, sala_ids, limite, apos, carregar, versoes=None):
+        """Página do ranking (keyset) logo após a chave `apos` = (total, nome, aluno_id).
+
+        `versoes` = {sala_id: versão atual no banco}: salas em memória em outra
+        versão são recarregadas por `carregar(sala_id)`, como as ausentes.
+        Cada item traz `posicao` (1 = primeiro lugar) no ranking intercalado.
+        """
+        salas = []
+        for sala_id in sala_ids:
+            with self._trava:
+                sala = self._salas.get(sala_id)
+            if sala is None or (versoes is not None and sala.versao != versoes.get(sala_id, 0)):
+                sala = carregar(sala_id)
+            salas.append(sala)
+        chave_apos = None if apos is None else (-apos[0], apos[1], apos[2])
+        with self._trava:
+            inicios = [0 if chave_apos is None else bisect_right(sala.ordem, chave_apos) for sala in salas]
+            chaves = heapq.merge(*[self._chaves(sala, inicio) for sala, inicio in zip(salas, inicios)])
+            anteriores = sum(inicios)
+            itens = []
+            for i, (chave, sala) in enumerate(islice(chaves, limite)):
+                item = self._item(sala, chave[2])
+                item['posicao'] = anteriores + i + 1
+                itens.append(item)
+            return itens
+
+    @staticmethod
+    def _chaves(sala, inicio=0):
+        return ((sala.ordem[i], sala) for i in range(inicio, len(sala.ordem)))
+
+    @staticmethod
+    def _item(sala, aluno_id):
+        nome, total, tentativas, concluidos = sala.por_aluno[aluno_id]
+        return {'id': aluno_id, 'nome': nome, 'total': total, 'tentativas': tentativas, 'concluidos': concluidos}
@@ -0,0 +1,291 @@
+"""Regras da missão compiladas: essenciais, gates de massa, avarias e pontuação.
+
+Única fonte das regras usadas pela `viagem` (chegada e pontos), pelo
+feedback de Game Over, pelo `habitat_finalizar` e pelos estimadores
+(`monte_carlo`, `carga_otima`). Os módulos do catálogo viram bits de uma
+máscara inteira (na ordem do catálogo); essenciais por destino são máscaras,
+então presença, faltantes e contagens são operações de bits.
+
+As regras são compiladas uma vez por versão do catálogo (`obter_regras`
+recompila quando `Catalogo.versao` muda; `recompilar` força) e `para_json()` exporta tudo para o navegador avaliar as mesmas regras
+(`static/js/regras.js`). Máscaras cabem nos 32 bits do JavaScript enquanto o
+catálogo tiver até 31 módulos.
+"""
+
+import hashlib
+import json
+
+from .data import obter_catalogo
+
+
+PONTOS_POR_ESSENCIAL = 20
+PENAL_POR_FALTANTE = 25
+
+RECURSOS = ('energia', 'agua')
+
+# Consumo extra do turno por efeito de evento (fração do consumo diário)
+EFEITOS_RECURSOS = {
+    'consumo_extra': {'energia': 0.5},
+    'atraso_e_consumo_extra': {'energia': 1.0, 'agua': 1.0},
+    'bonus_economia': {'energia': -0.5, 'agua': -0.5},
+}
+# Módulo a bordo -> (efeito atenuado, fator aplicado ao consumo extra)
+MITIGACOES_RECURSOS = {
+    'controle': ('consumo_extra', 0.5),
+    'impressao3d': ('atraso_e_consumo_extra', 0.5),
+}
+# Módulo a bordo -> fração da água consumida que volta para a reserva
+RECICLAGEM_AGUA = {'sanitario': 0.3}
+
+# Gates e faixas de massa são razões da capacidade da nave:
+# - `massa_maxima`: chegada exige massa <= capacidade × razão;
+# - `excessos`: [(razão, pontos)], o primeiro com massa > capacidade × razão vale;
+# - `faixa_bonus`: (mín, máx, pontos) para ocupação dentro da faixa (sem excesso).
+# Reservas de energia e água levam `margem_recursos` além do consumo diário
+# planejado; esgotar uma delas impede a chegada e custa `penal_recurso_esgotado`.
+REGRAS_DESTINO = {
+    'lua': {
+        'base': 50,
+        'essenciais': ['suporte_vida', 'habitacional'],
+        'faltantes_permitidos': 2,
+        'tolerancia_avarias': 3,
+        'penal_por_avaria': 8,
+        'massa_maxima': 1.2,
+        'excessos': [[1.2, -60], [1.0, -30]],
+        'faixa_bonus': [0.5, 1.0, 20],
+        'margem_recursos': 0.25,
+        'penal_recurso_esgotado': 20,
+        'causa_massa': 'Excesso de massa acima de 120% da capacidade da nave.',
+    },
+    'marte': {
+        'base': 120,
+        'essenciais': ['suporte_vida', 'habitacional', 'medico'],
+        'faltantes_permitidos': 1,
+        'tolerancia_avarias': 2,
+        'penal_por_avaria': 10,
+        'massa_maxima': 1.0,
+        'excessos': [[1.0, -50]],
+        'faixa_bonus': [0.6, 0.95, 30],
+        'margem_recursos': 0.15,
+        'penal_recurso_esgotado': 30,
+        'causa_massa': 'Massa total excedeu a capacidade da nave.',
+    },
+    'exoplaneta': {
+        'base': 300,
+        'essenciais': ['suporte_vida', 'habitacional', 'blindagem', 'controle', 'hidroponia'],
+        'faltantes_permitidos': 0,
+        'tolerancia_avarias': 1,
+        'penal_por_avaria': 14,
+        'massa_maxima': 0.95,
+        'excessos': [[0.95, -60]],
+        'faixa_bonus': [0.6, 0.9, 25],
+        'margem_recursos': 0.10,
+        'penal_recurso_esgotado': 40,
+        'causa_massa': 'Para exoplaneta, a margem de segurança de massa não foi atendida (95%).',
+    },
+}
+
+# Destino desconhecido: pontuação de Lua, gates intermediários e massa de exoplaneta
+REGRA_PADRAO = {
+    'base': 50,
+    'essenciais': ['suporte_vida', 'habitacional'],
+    'faltantes_permitidos': 1,
+    'tolerancia_avarias': 2,
+    'penal_por_avaria': 10,
+    'massa_maxima': 0.95,
+    'excessos': [[0.95, -60]],
+    'faixa_bonus': [0.6, 0.9, 25],
+    'margem_recursos': 0.15,
+    'penal_recurso_esgotado': 30,
+    'causa_massa': None,
+}
+
+
+def _contar(mascara):
+    return bin(mascara).count('1')
+
+
+class RegrasMissao:
+    """Regras de todos os destinos compiladas para um catálogo de módulos."""
+
+    def __init__(self, modulos, destinos=None, padrao=None, eventos=None):
+        self.ids = tuple(modulos)
+        self.bits = {m: 1 << i for i, m in enumerate(self.ids)}
+        self.massas = tuple(modulos[m].massa for m in self.ids)
+        self.consumos = {r: tuple(getattr(modulos[m], r) or 0 for m in self.ids) for r in RECURSOS}
+        self._fonte = {
+            'destinos': REGRAS_DESTINO if destinos is None else destinos,
+            'padrao': REGRA_PADRAO if padrao is None else padrao,
+        }
+        self.destinos = {d: self._compilar(r) for d, r in self._fonte['destinos'].items()}
+        self.padrao = self._compilar(self._fonte['padrao'])
+        self._efeitos = tuple(e.efeito for e in (obter_catalogo().eventos if eventos is None else eventos))
+        self._atenuantes = self.mascara([*MITIGACOES_RECURSOS, *RECICLAGEM_AGUA])
+        self._consumidores = tuple(
+            sum(1 << i for i, c in enumerate(self.consumos[r]) if c > 0) for r in RECURSOS
+        )
+        bruto = json.dumps(
+            [self.ids, self.massas, self.consumos, self._fonte, self._efeitos, self._recursos_json()],
+            sort_keys=True, ensure_ascii=False,
+        )
+        self.versao = hashlib.sha1(bruto.encode('utf-8')).hexdigest()[:16]
+
+    def _compilar(self, regra):
+        compilada = dict(regra)
+        compilada['essenciais'] = self.mascara(regra['essenciais'])
+        compilada['excessos'] = tuple(tuple(e) for e in regra['excessos'])
+        compilada['faixa_bonus'] = tuple(regra['faixa_bonus'])
+        return compilada
+
+    def regra(self, destino):
+        return self.destinos.get(destino, self.padrao)
+
+    def mascara(self, ids):
+        """Máscara dos módulos `ids` (ids fora do catálogo são ignorados)."""
+        mascara = 0
+        for m in ids:
+            mascara |= self.bits.get(m, 0)
+        return mascara
+
+    def ids_de(self, mascara):
+        """Ids da máscara, na ordem do catálogo."""
+        return [m for i, m in enumerate(self.ids) if mascara >> i & 1]
+
+    def massa(self, mascara):
+        return sum(massa for i, massa in enumerate(self.massas) if mascara >> i & 1)
+
+    def limiares(self, destino):
+        """Razões de ocupação em que pontuação ou gate de massa mudam."""
+        r = self.regra(destino)
+        return sorted({r['massa_maxima'], *(e[0] for e in r['excessos']), *r['faixa_bonus'][:2]})
+
+    def avaliar(self, destino, mascara, massa_total, capacidade_kg):
+        """Parte do resultado sem avarias: `(pontos, penal_por_avaria,
+        chegada_sem_avarias, tolerancia_avarias, massa_total, capacidade_kg,
+        penal_recurso_esgotado)`."""
+        r = self.regra(destino)
+        presentes = _contar(mascara & r['essenciais'])
+        faltantes = _contar(r['essenciais']) - presentes
+        pontos = r['base'] + PONTOS_POR_ESSENCIAL * presentes - PENAL_POR_FALTANTE * faltantes
+        massa_ok = True
+        if capacidade_kg > 0:
+            for razao, delta in r['excessos']:
+                if massa_total > capacidade_kg * razao:
+                    pontos += delta
+                    break
+            else:
+                minimo, maximo, bonus = r['faixa_bonus']
+                if minimo <= massa_total / capacidade_kg <= maximo:
+                    pontos += bonus
+            massa_ok = massa_total <= capacidade_kg * r['massa_maxima']
+        chegada = faltantes <= r['faltantes_permitidos'] and massa_ok
+        return (pontos, r['penal_por_avaria'], chegada, r['tolerancia_avarias'], massa_total, capacidade_kg,
+                r['penal_recurso_esgotado'])
+
+    def plano_recursos(self, destino, mascara):
+        """Por recurso: `(consumo_diario, reciclagem, extras por evento_id, margem)`.
+
+        `extras[i]` é o consumo extra (fração do diário) no turno do evento `i`
+        do catálogo, já atenuado pelos módulos a bordo.
+        """
+        atenuacao = {}
+        for modulo, (efeito, fator) in MITIGACOES_RECURSOS.items():
+            if mascara & self.bits.get(modulo, 0):
+                atenuacao[efeito] = atenuacao.get(efeito, 1.0) * fator
+        margem = self.regra(destino)['margem_recursos']
+        plano = {}
+        for recurso in RECURSOS:
+            consumo = sum(c for i, c in enumerate(self.consumos[recurso]) if mascara >> i & 1)
+            extras = tuple(
+                EFEITOS_RECURSOS.get(efeito, {}).get(recurso, 0.0) * atenuacao.get(efeito, 1.0)
+                for efeito in self._efeitos
+            )
+            reciclagem = 0.0
+            if recurso == 'agua':
+                reciclagem = sum(f for m, f in RECICLAGEM_AGUA.items() if mascara & self.bits.get(m, 0))
+            plano[recurso] = (consumo, min(reciclagem, 1.0), extras, margem)
+        return plano
+
+    def chave_recursos(self, mascara):
+        """Resume o que decide o esgotamento das reservas: módulos que atenuam
+        eventos ou reciclam água e quais recursos a carga consome (o volume do
+        consumo se cancela com o orçamento). Chaves se combinam com `|`."""
+        chave = mascara & self._atenuantes
+        for j, consumidores in enumerate(self._consumidores):
+            if mascara & consumidores:
+                chave |= 1 << (len(self.ids) + j)
+        return chave
+
+    def faltantes(self, destino, mascara):
+        """Ids dos essenciais ausentes da máscara."""
+        return self.ids_de(self.regra(destino)['essenciais'] & ~mascara)
+
+    def sobrevivencia(self, destino, mascara):
+        """`(ok, faltantes)`: o habitat sobrevive só com todos os essenciais."""
+        faltantes = self.faltantes(destino, mascara)
+        return not faltantes, faltantes
+
+    def causas_falha(self, destino, mascara, massa_total, capacidade_kg, avariados, esgotados=None):
+        """Frases explicando por que a carga não chegaria (feedback de Game Over).
+
+        `esgotados`: `{recurso: turno}` das reservas que acabaram na viagem.
+        """
+        r = self.regra(destino)
+        causas = []
+        faltantes = self.faltantes(destino, mascara)
+        if faltantes:
+            causas.append(f"Módulos essenciais ausentes: {', '.join(faltantes)}.")
+        if r['causa_massa'] and capacidade_kg and massa_total > capacidade_kg * r['massa_maxima']:
+            causas.append(r['causa_massa'])
+        if avariados:
+            causas.append(f"Avarias em módulos críticos: {', '.join(avariados)}.")
+        for recurso, turno in (esgotados or {}).items():
+            nome = 'energia' if recurso == 'energia' else 'água'
+            causas.append(f"Reservas de {nome} esgotadas no turno {turno}.")
+        return causas
+
+    @staticmethod
+    def _recursos_json():
+        return {
+            'efeitos': EFEITOS_RECURSOS,
+            'mitigacoes': {m: list(v) for m, v in MITIGACOES_RECURSOS.items()},
+            'reciclagem_agua': RECICLAGEM_AGUA,
+        }
+
+    def para_json(self):
+        """Regras compiladas em formato JSON (máscaras como inteiros)."""
+        def exportar(r):
+            return dict(r, excessos=[list(e) for e in r['excessos']], faixa_bonus=list(r['faixa_bonus']))
+        return {
+            'versao': self.versao,
+            'modulos': list(self.ids),
+            'massas': list(self.massas),
+            'pontos_por_essencial': PONTOS_POR_ESSENCIAL,
+            'penal_por_faltante': PENAL_POR_FALTANTE,
+            'consumos': {r: list(c) for r, c in self.consumos.items()},
+            'recursos': self._recursos_json(),
+            'destinos': {d: exportar(r) for d, r in self.destinos.items()},
+            'padrao': exportar(self.padrao),
+        }
+
+
+# (versão do catálogo, regras compiladas)
+_regras = (None, None)
+
+
+def obter_regras():
+    """Regras compiladas do catálogo atual (recompiladas quando a versão do catálogo muda)."""
+    catalogo = obter_catalogo()
+    versao, regras = _regras
+    if regras is None or versao != catalogo.versao:
+        regras = recompilar()
+    return regras
+
+
+def recompilar(modulos=None):
+    """Recompila as regras (do catálogo atual ou de outro conjunto de módulos)."""
+    global _regras
+    catalogo = obter_catalogo()
+    regras = RegrasMissao(catalogo.modulos if modulos is None else modulos, eventos=catalogo.eventos)
+    _regras = (catalogo.versao, regras)
+    return regras
@@ -0,0 +1,295 @@
+"""Motor da viagem em turnos, determinístico a partir de uma semente.
+
+Cada execução usa o próprio `random.Random(semente)` (nada do `random`
+global, compartilhado entre as threads do waitress) e devolve uma lista
+compacta `[(turno, evento_id, modulo_avariado)]`:
+
+- `evento_id` >= 0 é o índice nos eventos do catálogo (`obter_catalogo().eventos`);
+- `EVENTO_OPERACAO` é a operação rotineira de um módulo a bordo (o módulo
+  sai do turno, em rodízio);
+- `EVENTO_ROTINA` é o fallback quando não há módulos;
+- `modulo_avariado` é o id do módulo avariado no turno (ou None).
+
+Ícones e textos são montados uma vez na importação e as tabelas de eventos
+por destino uma vez por versão do catálogo (`tabela_destino`);
+`montar_diario` só expande a lista compacta no formato usado pelos templates.
+Guardar a semente basta para repetir a missão exatamente.
+
+`simular_recursos` acompanha as reservas de energia e água da mesma lista
+compacta: consumo por turno em um vetor, somas acumuladas para a viagem
+inteira e busca binária para o turno em que uma reserva acaba.
+"""
+
+import random
+import secrets
+from bisect import bisect_right
+from itertools import accumulate
+
+from .data import obter_catalogo
+from .regras import obter_regras
+
+
+EVENTO_OPERACAO = -1
+EVENTO_ROTINA = -2
+
+# Empate com o orçamento (erro de ponto flutuante) não esgota a reserva
+TOLERANCIA_ORCAMENTO = 1e-9
+
+# destino -> (turnos, chance de evento aleatório)
+_PARAMETROS_DESTINO = {
+    'lua': (15, 0.3),
+    'marte': (60, 0.3),
+    'exoplaneta': (250, 0.4),
+}
+_PARAMETROS_PADRAO = (15, 0.3)
+
+ICONES_EVENTOS = {
+    'Tempestade Solar': 'solar-storm.svg',
+    'Falha Mecânica Menor': 'wrench.svg',
+    'Impacto de Micrometeoroide': 'meteor.svg',
+    'Surto de Energia': 'surge.svg',
+    'Navegação Otimizada': 'navigation.svg',
+}
+
+# nome do evento -> (módulo, complemento se presente, complemento se ausente)
+COMPLEMENTOS_EVENTOS = {
+    'Tempestade Solar': (
+        'suporte_vida',
+        ' Sistemas de suporte mantêm níveis estáveis para a tripulação.',
+        ' A ausência de Suporte à Vida agrava a resposta da tripulação.',
+    ),
+    'Falha Mecânica Menor': ('impressao3d', ' A Impressão 3D fabrica uma peça de reposição e reduz o atraso.', ''),
+    'Impacto de Micrometeoroide': ('armazenamento', ' A carga está bem acondicionada; danos são mínimos.', ''),
+    'Surto de Energia': ('controle', ' O módulo de Controle estabiliza rapidamente os sistemas.', ''),
+    'Navegação Otimizada': ('exercicios', ' A equipe em boa forma física mantém procedimentos com precisão.', ''),
+}
+
+DICAS_MODULOS = {
+    'hidroponia': 'Produção de alimentos estabiliza moral e reduz consumo de estoque.',
+    'medico': 'Atendimento médico lida com indisposição leve na tripulação.',
+    'airlock': 'EVA realizada para inspeção externa; retorno seguro ao habitat.',
+    'impressao3d': 'Peça fabricada para reparo rápido de um subsistema.',
+    'sanitario': 'Sistema de reciclagem de água mantém níveis adequados.',
+    'armazenamento': 'Reorganização de suprimentos otimiza acesso e segurança.',
+    'exercicios': 'Rotina de exercícios mitiga fadiga em microgravidade.',
+    'inflavel': 'Módulo expansível aumenta volume útil para operações.',
+    'pesquisa': 'Experimento científico rende dados importantes da missão.',
+    'alimentacao': 'Refeição balanceada melhora coesão da equipe.',
+    'habitacional': 'Descanso adequado melhora desempenho da equipe.',
+    'suporte_vida': 'Níveis de oxigênio e pressão se mantêm estáveis.',
+}
+
+ICONES_MODULOS = {
+    'hidroponia': 'plant.svg',
+    'medico': 'medical.svg',
+    'airlock': 'airlock.svg',
+    'impressao3d': 'printer3d.svg',
+    'sanitario': 'water-recycle.svg',
+    'armazenamento': 'storage.svg',
+    'exercicios': 'dumbbell.svg',
+    'inflavel': 'expand.svg',
+    'pesquisa': 'flask.svg',
+    'alimentacao': 'food.svg',
+    'habitacional': 'habitat.svg',
+    'suporte_vida': 'life-support.svg',
+}
+
+_EVENTO_ROTINA = {
+    "nome": "Rotina Estável",
+    "descricao": "A equipe segue procedimentos padrão enquanto sistemas operam normalmente.",
+    "efeito": "nenhum",
+    "icone": "calm.svg",
+}
+
+
+DESTINOS = tuple(_PARAMETROS_DESTINO)
+
+
+def _compilar_tabela(eventos, turnos, chance):
+    # "Tudo Calmo" fica de fora: turnos sem evento viram operação de módulo
+    sorteaveis = tuple(i for i, e in enumerate(eventos) if e.nome != 'Tudo Calmo')
+    avaria = frozenset(i for i in sorteaveis if eventos[i].efeito == 'risco_avaria_modulo')
+    return turnos, chance, sorteaveis, avaria
+
+
+# (versão do catálogo, {destino: tabela}, tabela padrão)
+_tabelas = (None, None, None)
+
+
+def tabela_destino(destino):
+    """`(turnos, chance, ids sorteáveis, ids que avariam um módulo)` do destino."""
+    global _tabelas
+    catalogo = obter_catalogo()
+    versao, tabelas, padrao = _tabelas
+    if versao != catalogo.versao:
+        tabelas = {d: _compilar_tabela(catalogo.eventos, *p) for d, p in _PARAMETROS_DESTINO.items()}
+        padrao = _compilar_tabela(catalogo.eventos, *_PARAMETROS_PADRAO)
+        _tabelas = (catalogo.versao, tabelas, padrao)
+    return tabelas.get(destino, padrao)
+
+
+def nova_semente():
+    """Semente aleatória (63 bits) para uma nova execução."""
+    return secrets.randbits(63)
+
+
+def _modulos_ordenados(modulos_ids):
+    # Ordem da seleção, sem repetições (estável entre processos, ao contrário de set)
+    return tuple(dict.fromkeys(modulos_ids))
+
+
+def simular(destino, modulos_ids, semente):
+    """Executa a viagem e retorna `[(turno, evento_id, modulo_avariado)]`."""
+    turnos, chance, sorteaveis, avaria = tabela_destino(destino)
+    modulos = _modulos_ordenados(modulos_ids)
+    rng = random.Random(semente)
+    sortear, escolher = rng.random, rng.choice
+    calmo = EVENTO_OPERACAO if modulos else EVENTO_ROTINA
+    eventos = []
+    for turno in range(1, turnos + 1):
+        if sortear() < chance:
+            evento_id = escolher(sorteaveis)
+            avariado = escolher(modulos) if evento_id in avaria and modulos else None
+            eventos.append((turno, evento_id, avariado))
+        else:
+            eventos.append((turno, calmo, None))
+    return eventos
+
+
+def modulos_avariados(eventos):
+    """Módulos avariados na execução, na ordem da primeira avaria."""
+    return list(dict.fromkeys(m for _, _, m in eventos if m is not None))
+
+
+def mascara_avarias(eventos):
+    """Avarias da execução como bitset (bits de `RegrasMissao`); o catálogo não muda."""
+    return obter_regras().mascara(m for _, _, m in eventos if m is not None)
+
+
+def _eventos_aleatorios(presentes):
+    textos = []
+    for base in obter_catalogo().eventos:
+        evt = {'nome': base.nome, 'descricao': base.descricao, 'efeito': base.efeito}
+        evt['icone'] = ICONES_EVENTOS.get(base.nome, 'event-default.svg')
+        complemento = COMPLEMENTOS_EVENTOS.get(base.nome)
+        if complemento:
+            modulo, se_presente, se_ausente = complemento
+            evt['descricao'] += se_presente if modulo in presentes else se_ausente
+        textos.append(evt)
+    return textos
+
+
+def _evento_operacao(mod_id):
+    mod = obter_catalogo().modulos.get(mod_id)
+    return {
+        "nome": f"Operação do Módulo: {mod.nome if mod else mod_id}",
+        "descricao": DICAS_MODULOS.get(mod_id, 'O módulo contribui positivamente para o andamento da missão.'),
+        "efeito": "nenhum",
+        "icone": ICONES_MODULOS.get(mod_id, 'module-default.svg'),
+    }
+
+
+def montar_diario(eventos, modulos_ids):
+    """Expande a lista compacta no diário de bordo `[{turno, evento}]`.
+
+    Os textos são montados uma vez por execução; turnos com o mesmo evento
+    compartilham o mesmo dicionário (somente leitura).
+    """
+    modulos = _modulos_ordenados(modulos_ids)
+    aleatorios = _eventos_aleatorios(set(modulos))
+    operacoes = [_evento_operacao(m) for m in modulos]
+    diario = []
+    for turno, evento_id, _ in eventos:
+        if evento_id >= 0:
+            evento = aleatorios[evento_id]
+        elif evento_id == EVENTO_OPERACAO:
+            evento = operacoes[(turno - 1) % len(operacoes)]
+        else:
+            evento = _EVENTO_ROTINA
+        diario.append({"turno": turno, "evento": evento})
+    return diario
+
+
+def simular_recursos(destino, modulos_ids, eventos):
+    """Reservas de energia e água turno a turno, a partir da lista compacta.
+
+    O consumo diário é a soma dos módulos a bordo (menos a água reciclada);
+    no turno de um evento ele é multiplicado por `1 + extra` (ver
+    `RegrasMissao.plano_recursos`). O orçamento é o consumo planejado para a
+    viagem mais a margem do destino. Retorna, por recurso:
+    `{consumo_diario, orcamento, consumido, restante_pct, reservas_pct, esgotado_turno}`,
+    com `reservas_pct[i]` a reserva ao fim do turno `i + 1`.
+    """
+    regras = obter_regras()
+    plano = regras.plano_recursos(destino, regras.mascara(modulos_ids))
+    ids = [e for _, e, _ in eventos]
+    turnos = len(ids)
+    recursos = {}
+    for recurso, (consumo, reciclagem, extras, margem) in plano.items():
+        liquido = consumo * (1 - reciclagem)
+        por_evento = {EVENTO_OPERACAO: liquido, EVENTO_ROTINA: liquido}
+        por_evento.update((e, liquido * (1 + extra)) for e, extra in enumerate(extras))
+        # Consumo sempre >= 0, então o acumulado é crescente (busca binária vale)
+        acumulado = list(accumulate(map(por_evento.__getitem__, ids)))
+        orcamento = consumo * turnos * (1 + margem)
+        indice = bisect_right(acumulado, orcamento * (1 + TOLERANCIA_ORCAMENTO))
+        if orcamento > 0:
+            # Décimos de ponto percentual (round para inteiro é bem mais rápido que round(x, 1))
+            escala = 1000 / orcamento
+            reservas = [round(1000 - c * escala) / 10 for c in acumulado]
+            reservas[indice:] = [max(r, 0.0) for r in reservas[indice:]]
+        else:
+            reservas = [100.0] * turnos
+        recursos[recurso] = {
+            'consumo_diario': consumo,
+            'orcamento': round(orcamento, 2),
+            'consumido': round(acumulado[-1], 2) if acumulado else 0.0,
+            'restante_pct': reservas[-1] if reservas else 100.0,
+            'reservas_pct': reservas,
+            'esgotado_turno': indice + 1 if indice < turnos else None,
+        }
+    return recursos
+
+
+def recursos_esgotados(recursos):
+    """`{recurso: turno}` das reservas que acabaram na viagem."""
+    return {r: d['esgotado_turno'] for r, d in recursos.items() if d['esgotado_turno']}
+
+
+# --- Resultado da missão (chegada e pontuação): regras em `services/regras.py` ---
+def avaliar_carga(destino, nave, modulos_ids):
+    """Parte do resultado que não depende das avarias.
+
+    Retorna `(pontos, penal_por_avaria, chegada_sem_avarias, tolerancia_avarias,
+    massa_total, capacidade_kg, penal_recurso_esgotado)`; `resultado_com_avarias`
+    completa o cálculo.
+    """
+    regras = obter_regras()
+    mascara = regras.mascara(modulos_ids)
+    capacidade_kg = (nave.capacidade_carga or 0) * 1000 if nave else 0
+    return regras.avaliar(destino, mascara, regras.massa(mascara), capacidade_kg)
+
+
+def avaliar_presentes(destino, presentes, massa_total, capacidade_kg):
+    """Como `avaliar_carga`, a partir dos ids presentes e da massa já somada."""
+    regras = obter_regras()
+    return regras.avaliar(destino, regras.mascara(presentes), massa_total, capacidade_kg)
+
+
+def resultado_com_avarias(carga, avariados, esgotados=0):
+    """`(chegou, pontos)` para `avariados` módulos avariados e `esgotados`
+    reservas esgotadas, dada `avaliar_carga`."""
+    pontos, penal_por_avaria, chegada, tolerancia_avarias = carga[:4]
+    chegou = chegada and (avariados <= tolerancia_avarias) and not esgotados
+    return chegou, max(pontos - avariados * penal_por_avaria - esgotados * carga[6], 0)
+
+
+def calcular_resultado_e_pontos(destino, nave, modulos_ids, avarias=0, esgotados=0):
+    """Chegada, pontuação, massa e capacidade de uma viagem já simulada.
+
+    `avarias`: bitset de `mascara_avarias`; `esgotados`: reservas esgotadas.
+    """
+    carga = avaliar_carga(destino, nave, modulos_ids)
+    avariados = bin(avarias & obter_regras().mascara(modulos_ids)).count('1')
+    chegou, pontos = resultado_com_avarias(carga, avariados, esgotados)
+    return chegou, pontos, carga[4], carga[5]
@@ -0,0 +1,56 @@
+// static/js/regras.js
+// Avalia uma carga com as mesmas regras do servidor (services/regras.py),
+// a partir do JSON de /api/regras-missao. Máscaras: bit i = regras.modulos[i].
+
+const RegrasMissao = {
+    contar(mascara) {
+        let n = 0;
+        while (mascara) { mascara &= mascara - 1; n++; }
+        return n;
+    },
+
+    mascara(regras, ids) {
+        let mascara = 0;
+        ids.forEach(id => {
+            const i = regras.modulos.indexOf(id);
+            if (i >= 0) mascara |= (1 << i);
+        });
+        return mascara;
+    },
+
+    massa(regras, mascara) {
+        return regras.massas.reduce((total, m, i) => total + ((mascara >> i) & 1 ? m : 0), 0);
+    },
+
+    // Espelha RegrasMissao.avaliar: pontos e chegada sem contar avarias
+    avaliar(regras, destino, ids, capacidadeKg) {
+        const r = regras.destinos[destino] || regras.padrao;
+        const mascara = RegrasMissao.mascara(regras, ids);
+        const massaTotal = RegrasMissao.massa(regras, mascara);
+        const presentes = RegrasMissao.contar(mascara & r.essenciais);
+        const faltantes = RegrasMissao.contar(r.essenciais) - presentes;
+        let pontos = r.base + regras.pontos_por_essencial * presentes - regras.penal_por_faltante * faltantes;
+        let massaOk = true;
+        if (capacidadeKg > 0) {
+            const excesso = r.excessos.find(([razao]) => massaTotal > capacidadeKg * razao);
+            if (excesso) {
+                pontos += excesso[1];
+            } else {
+                const [minimo, maximo, bonus] = r.faixa_bonus;
+                const ocupacao = massaTotal / capacidadeKg;
+                if (minimo <= ocupacao && ocupacao <= maximo) pontos += bonus;
+            }
+            massaOk = massaTotal <= capacidadeKg * r.massa_maxima;
+        }
+        const faltantesIds = regras.modulos.filter((id, i) => ((r.essenciais & ~mascara) >> i) & 1);
+        return {
+            pontos: Math.max(pontos, 0),
+            chegada: faltantes <= r.faltantes_permitidos && massaOk,
+            massaTotal,
+            faltantes: faltantesIds,
+            penalPorAvaria: r.penal_por_avaria,
+            toleranciaAvarias: r.tolerancia_avarias,
+            penalRecursoEsgotado: r.penal_recurso_esgotado,
+        };
+    },
+};